@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк проверки адресов и портов прокси.
+
+Сравнивает прежнюю поштучную проверку через объект ipaddress (шесть
+свойств на адрес), Proxy.is_valid_public_ip по таблице bogon-сетей и
+пакетную проверку valid_mask без NumPy и с ним на --addresses случайных
+адресов, около 10% которых частные или зарезервированные. Отдельно
+измеряется bogon_mask на уже упакованных целых числах: разница с
+valid_mask - это разбор строк адресов.
+
+Запуск:
+    python benchmarks/bench_bogons.py --addresses 1000000
+"""
+
+import argparse
+import builtins
+import ipaddress
+import random
+import time
+from unittest.mock import patch
+from proxy_manager.bogons import address_number, bogon_mask, valid_mask
+from proxy_manager.models import Proxy
+
+
+def per_object(ip: str, port) -> bool:
+    """Прежняя проверка: объект ipaddress и шесть свойств."""
+    try:
+        address = ipaddress.ip_address(ip)
+    except ValueError:
+        return False
+    return 0 < int(port) < 65536 and not (
+        address.is_private or address.is_loopback or address.is_link_local
+        or address.is_multicast or address.is_reserved or address.is_unspecified
+    )
+
+
+def generate(count: int, seed: int = 0):
+    rnd = random.Random(seed)
+    ips, ports = [], []
+    for _ in range(count):
+        if rnd.random() < 0.1:
+            ips.append(f"{rnd.choice([10, 127, 192, 172])}.{rnd.randrange(256)}.1.{rnd.randrange(256)}")
+        else:
+            ips.append(f"{rnd.randrange(1, 224)}.{rnd.randrange(256)}.{rnd.randrange(256)}.{rnd.randrange(256)}")
+        ports.append(rnd.choice([80, 8080, 3128, 1080, 0, 70000]))
+    return ips, ports
+
+
+def without_numpy():
+    real_import = builtins.__import__
+
+    def no_numpy(name, *args, **kwargs):
+        if name == "numpy":
+            raise ImportError(name)
+        return real_import(name, *args, **kwargs)
+
+    return patch("builtins.__import__", side_effect=no_numpy)
+
+
+def measure(label: str, func, count: int, baseline=None):
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    speedup = f"x{baseline / elapsed:.1f}" if baseline else ""
+    print(f"{label:<36} {elapsed * 1000:>9.1f} ms {elapsed / count * 1e9:>8.0f} ns/addr  {speedup}")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--addresses", type=int, default=1_000_000, help="Адресов для проверки")
+    args = parser.parse_args()
+
+    ips, ports = generate(args.addresses)
+    proxies = [Proxy(ip, port) for ip, port in zip(ips, ports)]
+    count = len(ips)
+    print(f"{count} addresses\n")
+
+    baseline = measure("ipaddress per object", lambda: [per_object(*p) for p in zip(ips, ports)], count)
+    measure("Proxy.is_valid_public_ip", lambda: [p.is_valid_public_ip for p in proxies], count, baseline)
+    with without_numpy():
+        measure("valid_mask (bisect)", lambda: valid_mask(ips, ports), count, baseline)
+    try:
+        import numpy
+    except ImportError:
+        print("valid_mask (numpy)                   skipped: numpy is not installed")
+    else:
+        measure("valid_mask (numpy)", lambda: valid_mask(ips, ports), count, baseline)
+        addresses = numpy.array([address_number(ip) for ip in ips], dtype=numpy.int64)
+        measure("bogon_mask on packed ints (numpy)", lambda: bogon_mask(addresses), count, baseline)
+
+    # Таблица строже ipaddress: CGNAT, 6to4 relay и служебные /24 отсеиваются
+    sample = list(zip(ips[:100000], ports[:100000]))
+    differ = sum(a != b for a, b in zip(valid_mask(*zip(*sample)), (per_object(*p) for p in sample)))
+    print(f"\n{differ} of {len(sample)} sampled addresses differ from the ipaddress check")
+
+
+if __name__ == "__main__":
+    main()
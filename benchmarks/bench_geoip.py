@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк офлайн-базы GeoIP.
+
+Генерирует CSV с заданным числом непересекающихся диапазонов, компилирует
+его и измеряет время открытия базы, поиска по одному адресу, пакетного
+поиска (NumPy, если установлен, и без него) и обогащения прокси.
+
+Запуск:
+    python benchmarks/bench_geoip.py --ranges 500000 --lookups 100000
+"""
+
+import argparse
+import builtins
+import os
+import random
+import socket
+import tempfile
+import time
+from unittest.mock import patch
+from proxy_manager.geoip import GeoIPDatabase, compile_database
+from proxy_manager.proxy import Proxy
+
+COUNTRIES = ["US", "DE", "BR", "ID", "RU", "IN", "FR", "GB", "CN", "SG"]
+
+
+def write_ranges(path: str, count: int, seed: int = 0):
+    """Пишет CSV: адресное пространство делится на count диапазонов с пропусками."""
+    rnd = random.Random(seed)
+    step = (2 ** 32 - 2 ** 24) // count
+    with open(path, "w") as f:
+        for i in range(count):
+            start = 2 ** 24 + i * step
+            end = start + rnd.randint(step // 2, step - 1)
+            f.write(f"{start},{end},{rnd.choice(COUNTRIES)},AS{rnd.randint(1, 400000)}\n")
+
+
+def measure(label: str, func, count: int):
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<32} {elapsed * 1000:>9.1f} ms {elapsed / count * 1e6:>8.2f} us/ip")
+    return result
+
+
+def without_numpy():
+    real_import = builtins.__import__
+
+    def no_numpy(name, *args, **kwargs):
+        if name == "numpy":
+            raise ImportError(name)
+        return real_import(name, *args, **kwargs)
+
+    return patch("builtins.__import__", side_effect=no_numpy)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--ranges", type=int, default=500_000, help="Диапазонов в базе")
+    parser.add_argument("--lookups", type=int, default=100_000, help="Адресов для поиска")
+    args = parser.parse_args()
+
+    rnd = random.Random(1)
+    ips = [socket.inet_ntoa(rnd.getrandbits(32).to_bytes(4, "big")) for _ in range(args.lookups)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "ranges.csv")
+        path = os.path.join(tmp, "geoip.bin")
+        write_ranges(source, args.ranges)
+
+        start = time.perf_counter()
+        compile_database(source, path)
+        print(f"Compiled {args.ranges} ranges in {time.perf_counter() - start:.1f}s "
+              f"({os.path.getsize(path) / 2 ** 20:.1f} MiB)")
+
+        start = time.perf_counter()
+        db = GeoIPDatabase(path)
+        print(f"Opened in {(time.perf_counter() - start) * 1000:.3f} ms\n")
+
+        try:
+            measure("lookup (bisect)", lambda: [db.lookup(ip) for ip in ips], len(ips))
+            try:
+                import numpy  # noqa: F401
+                measure("lookup_many (numpy)", lambda: db.lookup_many(ips), len(ips))
+            except ImportError:
+                print("lookup_many (numpy)              not installed")
+            with without_numpy():
+                measure("lookup_many (bisect)", lambda: db.lookup_many(ips), len(ips))
+            proxies = [Proxy(ip, 8080) for ip in ips]
+            measure("enrich", lambda: db.enrich(proxies), len(ips))
+        finally:
+            db.close()
+
+
+if __name__ == "__main__":
+    main()
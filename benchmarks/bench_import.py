@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк времени импорта и холодного старта.
+
+Каждый сценарий запускается в отдельном интерпретаторе несколько раз,
+печатается медиана и лучшее время.
+
+Запуск:
+    python benchmarks/bench_import.py --repeat 10
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+SCENARIOS = {
+    "import proxy_manager": "import proxy_manager",
+    "from proxy_manager import ProxyManager": "from proxy_manager import ProxyManager",
+    "ProxyManager().get_working_proxy()": (
+        "from proxy_manager import ProxyManager\n"
+        "ProxyManager(db_path={db!r}).get_working_proxy()"
+    ),
+    "from proxy_manager import ProxyChecker": "from proxy_manager import ProxyChecker",
+    "import aiohttp (reference)": "import aiohttp",
+}
+
+_TIMER = """
+import time
+_start = time.perf_counter()
+{code}
+print(time.perf_counter() - _start)
+"""
+
+
+def run(code: str, repeat: int):
+    """Возвращает время выполнения кода в свежем интерпретаторе для каждого повтора."""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    times = []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", _TIMER.format(code=code)],
+            cwd=root, capture_output=True, text=True, check=True
+        ).stdout
+        times.append(float(output.strip().splitlines()[-1]))
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=10, help="Количество запусков")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, "bench.db")
+        for label, code in SCENARIOS.items():
+            times = run(code.format(db=db), args.repeat)
+            print(f"{label:<40} median {statistics.median(times) * 1000:>7.1f} ms"
+                  f"   best {min(times) * 1000:>7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк запросов выборки SQLite на большой таблице.
+
+Заполняет базу заданным числом строк (по умолчанию 1 000 000), печатает
+EXPLAIN QUERY PLAN и время горячих запросов. Завершается с ошибкой, если
+какой-либо из них полностью сканирует таблицу или сортирует результат.
+
+Запуск:
+    python benchmarks/bench_queries.py --rows 1000000
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from proxy_manager.storage import SQLiteStorage
+from proxy_manager.storage.base import to_epoch
+from proxy_manager.storage.sqlite import COUNT_WORKING_SQL, UNCHECKED_SQL
+
+
+def populate(storage: SQLiteStorage, rows: int, seed: int = 0):
+    """Заполняет таблицу: ~10% рабочих, ~60% нерабочих, остальные не проверены."""
+    rnd = random.Random(seed)
+    now = to_epoch(datetime.now())
+    countries = ["US", "DE", "BR", "ID", "RU", "IN", "FR", "GB", "CN", "SG"]
+    levels = ["elite", "anonymous", "transparent"]
+
+    def generate():
+        for i in range(rows):
+            ip = f"{(i >> 24) & 255 or 1}.{(i >> 16) & 255}.{(i >> 8) & 255}.{i & 255}"
+            roll = rnd.random()
+            if roll < 0.1:
+                status, rt = "working", rnd.uniform(0.05, 10)
+            elif roll < 0.7:
+                status, rt = "failed", None
+            else:
+                status, rt = None, None
+            collected = now - rnd.randint(0, 14 * 86400)
+            checked = collected + rnd.randint(0, 3600) if status else None
+            protocol = rnd.choice(("http", "http", "https", "socks4", "socks5"))
+            yield (ip, 8080, protocol, status, rt, checked, collected,
+                   rnd.choice(countries), rnd.choice(levels))
+
+    with storage.get_connection() as conn:
+        conn.executemany("""
+            INSERT INTO proxies (ip, port, protocol, status, response_time, last_check,
+                                 collection_date, country, anonymity)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, generate())
+        conn.execute("ANALYZE")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Количество строк")
+    parser.add_argument("--repeat", type=int, default=100, help="Повторов каждого запроса")
+    args = parser.parse_args()
+
+    min_date = datetime.now() - timedelta(hours=24)
+    with tempfile.TemporaryDirectory() as tmp:
+        storage = SQLiteStorage(os.path.join(tmp, "bench.db"))
+        storage.setup()
+
+        start = time.perf_counter()
+        populate(storage, args.rows)
+        print(f"Populated {args.rows} rows in {time.perf_counter() - start:.1f}s\n")
+
+        queries = [
+            ("get_working_proxy", *storage.working_query(1, min_last_check=min_date)),
+            ("get_multiple_working_proxies", *storage.working_query(100, min_collection_date=min_date)),
+            ("get_working_proxies", *storage.working_query(10)),
+            ("get_working_proxy(country)", *storage.working_query(1, min_last_check=min_date, country="DE")),
+            ("get_working_proxies(anonymity)", *storage.working_query(10, anonymity="elite")),
+            ("get_working_proxies(protocol)", *storage.working_query(10, protocol="socks5")),
+            ("needs_update", COUNT_WORKING_SQL, [to_epoch(min_date)]),
+            ("get_unchecked_proxies", UNCHECKED_SQL, [100]),
+        ]
+
+        failed = False
+        with storage.get_connection() as conn:
+            for name, sql, params in queries:
+                plan = [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params)]
+                start = time.perf_counter()
+                for _ in range(args.repeat):
+                    conn.execute(sql, params).fetchall()
+                elapsed = (time.perf_counter() - start) / args.repeat
+
+                full_scan = any(step == "SCAN proxies" for step in plan)
+                sorts = any("TEMP B-TREE" in step for step in plan)
+                verdict = "FAIL" if full_scan or sorts else "ok"
+                failed = failed or verdict == "FAIL"
+                print(f"{name:<30} {elapsed * 1000:>9.3f} ms  [{verdict}]")
+                for step in plan:
+                    print(f"    {step}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк масштабирования проверки прокси по числу процессов.
+
+Запускает локальную имитацию прокси в отдельном процессе: она слушает все
+адреса 127.0.0.0/8 и сразу отвечает 200, поэтому время уходит только на
+сторону проверяющего. Проверяет --proxies адресов с 1, 2, 4... процессами
+до --max-processes и печатает проверки в секунду.
+
+Запуск:
+    python benchmarks/bench_sharded_check.py --proxies 20000 --max-processes 8
+"""
+
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+import socket
+from proxy_manager import ProxyManager
+from proxy_manager.latency import CheckTimeouts
+from proxy_manager.proxy import Proxy
+from proxy_manager.workers import ShardedChecker
+
+RESPONSE = b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\nConnection: close\r\n\r\n{}"
+
+
+def serve(sock: socket.socket):
+    """Имитация прокси: отвечает 200 на любой запрос."""
+    async def handle(reader, writer):
+        try:
+            while await reader.readline() not in (b"\r\n", b""):
+                pass
+            writer.write(RESPONSE)
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def main():
+        server = await asyncio.start_server(handle, sock=sock, backlog=4096)
+        async with server:
+            await server.serve_forever()
+
+    asyncio.run(main())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--proxies", type=int, default=20000, help="Количество проверок")
+    parser.add_argument("--max-processes", type=int, default=os.cpu_count() or 1,
+                        help="Наибольшее число процессов")
+    parser.add_argument("--concurrency", type=int, default=200,
+                        help="Одновременных проверок в процессе")
+    args = parser.parse_args()
+    logging.getLogger("proxy_manager").setLevel(logging.WARNING)
+
+    sock = socket.socket()
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind(("0.0.0.0", 0))
+    port = sock.getsockname()[1]
+    server = multiprocessing.Process(target=serve, args=(sock,), daemon=True)
+    server.start()
+
+    counts = []
+    processes = 1
+    while processes <= args.max_processes:
+        counts.append(processes)
+        processes *= 2
+
+    print(f"{args.proxies} checks against a local stand-in proxy, {os.cpu_count()} CPUs\n")
+    baseline = None
+    for processes in counts:
+        manager = ProxyManager(storage="memory")
+        proxies = [
+            Proxy(f"127.{(i >> 16) & 255}.{(i >> 8) & 255}.{i & 255 or 1}", port)
+            for i in range(1, args.proxies + 1)
+        ]
+        manager.add_proxies(proxies)
+        checker = ShardedChecker(
+            manager, processes=processes, concurrency=args.concurrency,
+            timeouts=CheckTimeouts(5.0, 5.0)
+        )
+        report = checker.check(proxies)
+        rate = report.checks_per_second
+        baseline = baseline or rate
+        print(f"{processes:>3} processes  {rate:>9.0f} checks/s  x{rate / baseline:.2f}  "
+              f"({len(report.working)}/{report.checked} working)")
+
+    server.terminate()
+
+
+if __name__ == "__main__":
+    main()
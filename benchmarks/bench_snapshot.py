@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк теплого старта из снимка пула рабочих прокси.
+
+Сравнивает время загрузки снимка (чтение через mmap и загрузка в
+хранилище) со временем чтения того же пула из базы SQLite.
+
+Запуск:
+    python benchmarks/bench_snapshot.py --rows 50000
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from proxy_manager.snapshot import read_snapshot, write_snapshot
+from proxy_manager.storage import MemoryStorage, ProxyRecord, SQLiteStorage
+
+
+def make_records(count: int, seed: int = 0):
+    """Генерирует записи рабочих прокси."""
+    rnd = random.Random(seed)
+    now = int(time.time())
+    return [
+        ProxyRecord(
+            f"{i >> 16 & 255 or 1}.{i >> 8 & 255}.{i & 255}.{rnd.randint(1, 254)}",
+            8080, "http", rnd.uniform(0.05, 5), now - rnd.randint(0, 3600), now - 86400
+        )
+        for i in range(count)
+    ]
+
+
+def measure(label: str, func):
+    start = time.perf_counter()
+    result = func()
+    print(f"{label:<32} {(time.perf_counter() - start) * 1000:>9.1f} ms")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=50000, help="Размер пула рабочих прокси")
+    args = parser.parse_args()
+
+    records = make_records(args.rows)
+    with tempfile.TemporaryDirectory() as tmp:
+        snap_path = os.path.join(tmp, "pool.snap")
+        db = SQLiteStorage(os.path.join(tmp, "pool.db"))
+        db.setup()
+        db.restore_working(records)
+
+        measure("write_snapshot", lambda: write_snapshot(snap_path, records))
+        print(f"{'snapshot size':<32} {os.path.getsize(snap_path) / 1024:>9.1f} KiB")
+        _, loaded = measure("read_snapshot (mmap)", lambda: read_snapshot(snap_path))
+        measure("restore_working -> memory", lambda: MemoryStorage().restore_working(loaded))
+        measure("working_records from SQLite", db.working_records)
+
+
+if __name__ == "__main__":
+    main()
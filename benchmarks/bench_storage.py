@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк движков хранения прокси.
+
+Прогоняет одинаковую нагрузку на каждом движке из BACKENDS и печатает
+количество операций в секунду, чтобы выбрать движок под конкретный сценарий.
+
+Запуск:
+    python benchmarks/bench_storage.py --rows 50000
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+from proxy_manager.proxy import Proxy
+from proxy_manager.storage import BACKENDS, create_storage
+
+
+def make_proxies(count: int, seed: int = 0):
+    """Генерирует уникальные прокси со случайными адресами."""
+    rnd = random.Random(seed)
+    seen = set()
+    proxies = []
+    while len(proxies) < count:
+        ip = ".".join(str(rnd.randint(1, 254)) for _ in range(4))
+        port = rnd.choice((80, 3128, 8080, 8888)) + rnd.randint(0, 1000)
+        if (ip, port) in seen:
+            continue
+        seen.add((ip, port))
+        proxies.append(Proxy(ip=ip, port=port))
+    return proxies
+
+
+def timed(func, *args, **kwargs):
+    """Выполняет функцию и возвращает (результат, секунды)."""
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def run_backend(storage, rows: int, queries: int):
+    """Прогоняет нагрузку на одном хранилище и возвращает результаты."""
+    proxies = make_proxies(rows)
+    results = []
+
+    _, elapsed = timed(storage.add_proxies, proxies)
+    results.append(("add_proxies", rows, elapsed))
+
+    checked = proxies[: rows // 2]
+    for i, proxy in enumerate(checked):
+        proxy.status = "working" if i % 3 else "failed"
+        proxy.response_time = (i % 1000) / 100
+    _, elapsed = timed(storage.update_proxy_statuses, checked)
+    results.append(("update_proxy_statuses", len(checked), elapsed))
+
+    single = proxies[rows // 2: rows // 2 + min(queries, rows // 2)]
+    start = time.perf_counter()
+    for proxy in single:
+        proxy.status = "working"
+        proxy.response_time = 0.5
+        storage.update_proxy_status(proxy)
+    results.append(("update_proxy_status", len(single), time.perf_counter() - start))
+
+    min_date = datetime.now() - timedelta(hours=24)
+    start = time.perf_counter()
+    for _ in range(queries):
+        storage.get_working(1, min_last_check=min_date)
+    results.append(("get_working(1)", queries, time.perf_counter() - start))
+
+    start = time.perf_counter()
+    for _ in range(queries):
+        storage.get_working(100, min_collection_date=min_date)
+    results.append(("get_working(100)", queries, time.perf_counter() - start))
+
+    start = time.perf_counter()
+    for _ in range(queries):
+        storage.get_unchecked(100)
+    results.append(("get_unchecked(100)", queries, time.perf_counter() - start))
+
+    start = time.perf_counter()
+    for _ in range(max(1, queries // 10)):
+        storage.get_statistics()
+    results.append(("get_statistics", max(1, queries // 10), time.perf_counter() - start))
+
+    _, elapsed = timed(storage.cleanup, datetime.now() + timedelta(days=1))
+    results.append(("cleanup", rows, elapsed))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20000, help="Количество прокси")
+    parser.add_argument("--queries", type=int, default=200, help="Количество запросов выборки")
+    parser.add_argument("--backend", choices=sorted(BACKENDS), action="append",
+                        help="Движок для замера (по умолчанию все)")
+    args = parser.parse_args()
+
+    for name in args.backend or sorted(BACKENDS):
+        with tempfile.TemporaryDirectory() as tmp:
+            kwargs = {"db_path": os.path.join(tmp, "bench.db")} if name == "sqlite" else {}
+            storage = create_storage(name, **kwargs)
+            storage.setup()
+            print(f"\n== {name} ({args.rows} rows) ==")
+            for operation, count, elapsed in run_backend(storage, args.rows, args.queries):
+                rate = count / elapsed if elapsed else float("inf")
+                print(f"{operation:<24} {elapsed * 1000:>10.1f} ms {rate:>14.0f} ops/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк разбора табличных страниц источников прокси.
+
+Сравнивает строки в секунду для парсеров regex, lxml (если установлен)
+и исходного BeautifulSoup на сохраненных страницах, а также разбор
+нескольких страниц в пуле процессов против последовательного.
+
+Страница-образец размножается до заданного числа строк таблицы.
+
+Запуск:
+    python benchmarks/bench_tables.py --rows 5000 --pages 8
+    python benchmarks/bench_tables.py saved_page1.html saved_page2.html
+"""
+
+import argparse
+import os
+import re
+import time
+from functools import partial
+from proxy_manager.sources.freeproxylist import parse_page
+from proxy_manager.sources.tables import PARSERS, extract_rows, parse_pages
+
+FIXTURE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "tests", "fixtures", "free_proxy_list.html"
+)
+
+
+def scale_page(html: str, rows: int) -> str:
+    """Размножает строки <tbody> страницы до нужного количества."""
+    body = re.search(r"<tbody>(.*?)</tbody>", html, re.S)
+    sample = re.findall(r"<tr>.*?</tr>", body.group(1), re.S)
+    scaled = "".join(sample[i % len(sample)] for i in range(rows))
+    return html[:body.start(1)] + scaled + html[body.end(1):]
+
+
+def measure(label: str, func, rows: int):
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<40} {elapsed * 1000:>9.1f} ms {rows / elapsed:>12,.0f} rows/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("files", nargs="*", help="Сохраненные страницы (по умолчанию - образец)")
+    parser.add_argument("--rows", type=int, default=5000, help="Строк на странице-образце")
+    parser.add_argument("--pages", type=int, default=8, help="Копий страницы-образца")
+    args = parser.parse_args()
+
+    if args.files:
+        pages = []
+        for path in args.files:
+            with open(path, encoding="utf-8", errors="replace") as f:
+                pages.append(f.read())
+    else:
+        with open(FIXTURE, encoding="utf-8") as f:
+            pages = [scale_page(f.read(), args.rows)] * args.pages
+
+    rows = sum(len(extract_rows(page)) for page in pages)
+    print(f"{len(pages)} pages, {rows} rows")
+
+    for name in PARSERS:
+        try:
+            extract_rows("<table></table>", name)
+        except ImportError:
+            print(f"{name:<40} not installed")
+            continue
+        measure(f"{name}: extract_rows", lambda: [extract_rows(p, name) for p in pages], rows)
+        measure(f"{name}: parse_page", lambda: [parse_page(p, name) for p in pages], rows)
+
+    for name in ("regex", "bs4"):
+        measure(f"{name}: parse_page in process pool", lambda: parse_pages(partial(parse_page, parser=name), pages), rows)
+
+
+if __name__ == "__main__":
+    main()
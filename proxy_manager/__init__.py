@@ -1,13 +1,38 @@
-from .manager import ProxyManager
-from .collector import ProxyCollector
-from .checker import ProxyChecker
-from .models import Proxy
+"""
+Пакет для сбора, проверки и выдачи рабочих прокси.
+
+Классы загружаются при первом обращении: `import proxy_manager` не тянет
+aiohttp, requests и BeautifulSoup, пока они не понадобятся.
+"""
+
+from importlib import import_module
 
 __version__ = "0.1.0"
 
+# Публичное имя -> модуль, в котором оно определено
+_LAZY_ATTRIBUTES = {
+    'ProxyManager': '.manager',
+    'ProxyCollector': '.collector',
+    'ProxyChecker': '.checker',
+    'Proxy': '.models',
+}
+
 __all__ = [
     'ProxyManager',
     'ProxyCollector',
     'ProxyChecker',
     'Proxy'
 ]
+
+
+def __getattr__(name):
+    module = _LAZY_ATTRIBUTES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_LAZY_ATTRIBUTES))
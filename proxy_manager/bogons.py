@@ -0,0 +1,194 @@
+"""
+Модуль пакетной проверки адресов и портов прокси.
+
+Адрес годится, если это публичный IPv4: он не попадает ни в один
+диапазон из таблицы специальных и зарезервированных сетей (bogons).
+Таблица отсортирована и слита, поэтому проверка адреса - один бинарный
+поиск. Пакет адресов упаковывается в массив целых чисел, и с NumPy весь
+пакет проверяется одним searchsorted, без NumPy - bisect по каждому
+адресу. Адреса, которые не разобрались как IPv4 (IPv6 или мусор),
+проверяются модулем ipaddress поштучно.
+"""
+
+import logging
+import socket
+from bisect import bisect_right
+from functools import partial
+from itertools import compress, repeat
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+#: Сети, адреса из которых не бывают публичными прокси
+BOGON_NETWORKS = (
+    "0.0.0.0/8",        # «эта» сеть
+    "10.0.0.0/8",       # частные сети
+    "100.64.0.0/10",    # CGNAT
+    "127.0.0.0/8",      # loopback
+    "169.254.0.0/16",   # link-local
+    "172.16.0.0/12",    # частные сети
+    "192.0.0.0/24",     # служебные адреса IETF
+    "192.0.2.0/24",     # TEST-NET-1
+    "192.88.99.0/24",   # 6to4 relay, выведен из употребления
+    "192.168.0.0/16",   # частные сети
+    "198.18.0.0/15",    # тестирование производительности
+    "198.51.100.0/24",  # TEST-NET-2
+    "203.0.113.0/24",   # TEST-NET-3
+    "224.0.0.0/4",      # multicast
+    "240.0.0.0/4",      # зарезервировано, включая 255.255.255.255
+)
+
+# Строгий разбор: в отличие от inet_aton не принимает '1.2.3' и '01.2.3.4'
+_pack = partial(socket.inet_pton, socket.AF_INET)
+
+
+def _merge(networks: Iterable[str]) -> Tuple[List[int], List[int]]:
+    """Сливает сети в отсортированные непересекающиеся диапазоны [начало, конец]."""
+    ranges = []
+    for network in networks:
+        address, prefix = network.split('/')
+        start = int.from_bytes(_pack(address), 'big')
+        ranges.append((start, start + (1 << (32 - int(prefix))) - 1))
+    merged: List[List[int]] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return [start for start, _ in merged], [end for _, end in merged]
+
+
+STARTS, ENDS = _merge(BOGON_NETWORKS)
+
+
+def address_number(ip) -> Optional[int]:
+    """Адрес IPv4 в точечной записи как целое число или None."""
+    try:
+        return int.from_bytes(_pack(ip), 'big')
+    except (OSError, TypeError):
+        return None
+
+
+def is_bogon(number: int) -> bool:
+    """Попадает ли адрес (целое число) в таблицу bogon-сетей."""
+    index = bisect_right(STARTS, number) - 1
+    return index >= 0 and number <= ENDS[index]
+
+
+def bogon_mask(addresses: Sequence[int]):
+    """
+    Проверяет пакет адресов, заданных целыми числами.
+
+    Returns:
+        Массив bool NumPy (или список без NumPy): True у адресов из bogon-сетей
+    """
+    try:
+        import numpy as np
+    except ImportError:
+        return [is_bogon(number) for number in addresses]
+    addresses = np.asarray(addresses, dtype=np.int64)
+    indexes = np.searchsorted(np.asarray(STARTS, dtype=np.int64), addresses, side='right') - 1
+    ends = np.asarray(ENDS, dtype=np.int64)
+    return (indexes >= 0) & (addresses <= ends[np.maximum(indexes, 0)])
+
+
+def _is_public_other(ip) -> bool:
+    """Проверка адреса, который не разобрался как IPv4 (IPv6 или мусор)."""
+    import ipaddress
+
+    try:
+        address = ipaddress.ip_address(ip)
+    except ValueError:
+        return False
+    return not (
+        address.is_private or address.is_loopback or address.is_link_local
+        or address.is_multicast or address.is_reserved or address.is_unspecified
+    )
+
+
+def is_public(ip) -> bool:
+    """Публичный ли адрес."""
+    number = address_number(ip)
+    if number is None:
+        return _is_public_other(ip)
+    return not is_bogon(number)
+
+
+def _port_number(value) -> int:
+    """Порт как целое число или 0, если он не разбирается."""
+    try:
+        return int(value)
+    except (TypeError, ValueError, OverflowError):
+        return 0
+
+
+def valid_mask(ips: Sequence, ports: Sequence) -> List[bool]:
+    """
+    Проверяет пакет адресов и портов.
+
+    Args:
+        ips: Адреса в точечной записи
+        ports: Порты той же длины (числа или строки)
+
+    Returns:
+        List[bool]: True для публичного адреса с портом 1-65535
+    """
+    try:
+        import numpy as np
+    except ImportError:
+        return [
+            0 < _port_number(port) < 65536 and is_public(ip)
+            for ip, port in zip(ips, ports)
+        ]
+    if not len(ips):
+        return []
+
+    try:
+        packed = b''.join(map(socket.inet_pton, repeat(socket.AF_INET, len(ips)), ips))
+        addresses = np.frombuffer(packed, dtype='>u4').astype(np.int64)
+    except (OSError, TypeError):
+        addresses = np.fromiter(
+            (-1 if n is None else n for n in map(address_number, ips)),
+            dtype=np.int64, count=len(ips)
+        )
+    ports = _port_array(np, ports)
+    mask = (addresses >= 0) & ~bogon_mask(addresses) & (ports > 0) & (ports < 65536)
+
+    # Не-IPv4 адреса редки, их проверяет ipaddress
+    for position in np.flatnonzero(addresses < 0).tolist():
+        if 0 < ports[position] < 65536:
+            mask[position] = _is_public_other(ips[position])
+    return mask.tolist()
+
+
+def _port_array(np, ports: Sequence):
+    """Порты массивом int64; неразборчивые значения становятся 0."""
+    values = np.asarray(ports)
+    if values.dtype.kind not in 'iuU':
+        values = None
+    elif values.dtype.kind == 'U':
+        try:
+            values = values.astype(np.int64)
+        except (ValueError, OverflowError):
+            values = None
+    if values is None or values.shape != (len(ports),):
+        return np.fromiter(map(_port_number, ports), dtype=np.int64, count=len(ports))
+    return values.astype(np.int64)
+
+
+def filter_valid(proxies: Iterable) -> List:
+    """
+    Оставляет прокси с публичным адресом и корректным портом.
+
+    Args:
+        proxies: Прокси с атрибутами ip и port
+
+    Returns:
+        List: Подходящие прокси в исходном порядке
+    """
+    proxies = list(proxies)
+    mask = valid_mask([proxy.ip for proxy in proxies], [proxy.port for proxy in proxies])
+    valid = list(compress(proxies, mask))
+    if len(valid) < len(proxies):
+        logger.debug(f"Dropped {len(proxies) - len(valid)} proxies with bogon addresses or bad ports")
+    return valid
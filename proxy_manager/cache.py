@@ -0,0 +1,281 @@
+"""
+Модуль кеша ответов для запросов через прокси.
+
+Ответы хранятся в два уровня: LRU в памяти, ограниченный числом записей
+и объемом, и необязательный файл SQLite, который читается через mmap и
+переживает перезапуск. Срок хранения берется из Cache-Control/Expires
+ответа. Одновременные одинаковые запросы объединяются: через прокси идет
+один запрос, остальные ждут его результат.
+"""
+
+import asyncio
+import json
+import sqlite3
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Dict, Mapping, Optional
+from urllib.parse import urlencode
+
+# Статусы, которые по RFC 9111 можно кешировать без явного разрешения
+CACHEABLE_STATUSES = frozenset({200, 203, 204, 300, 301, 404, 405, 410, 414, 501})
+
+
+@dataclass
+class CachedResponse:
+    """Сохраненный ответ."""
+    status: int
+    headers: Dict[str, str]
+    body: bytes
+    expires: float
+
+    @property
+    def size(self) -> int:
+        return len(self.body)
+
+
+def cache_key(method: str, url: str, params: Optional[Mapping[str, Any]] = None) -> str:
+    """Ключ запроса: метод и URL с отсортированными параметрами."""
+    if params:
+        query = urlencode(sorted((str(k), str(v)) for k, v in params.items()))
+        url = f"{url}{'&' if '?' in url else '?'}{query}"
+    return f"{method.upper()} {url}"
+
+
+def _parse_cache_control(value: str) -> Dict[str, Optional[str]]:
+    directives = {}
+    for part in value.split(','):
+        name, _, argument = part.strip().partition('=')
+        if name:
+            directives[name.lower()] = argument.strip('"') or None
+    return directives
+
+
+def _http_date(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+def freshness_lifetime(headers: Mapping[str, str], default_ttl: float = 0.0) -> float:
+    """
+    Сколько секунд ответ можно отдавать из кеша.
+
+    Кеш частный (клиентский), поэтому учитывается max-age, а не s-maxage,
+    и ответы с private тоже хранятся. no-store и no-cache запрещают
+    хранение; без Cache-Control и Expires используется default_ttl.
+
+    Args:
+        headers: Заголовки ответа
+        default_ttl: Срок для ответов без указаний о кешировании
+
+    Returns:
+        float: Срок в секундах; 0 - не кешировать
+    """
+    headers = {name.lower(): value for name, value in headers.items()}
+    directives = _parse_cache_control(headers.get('cache-control', ''))
+    if {'no-store', 'no-cache'} & directives.keys():
+        return 0.0
+    try:
+        age = float(headers.get('age', 0))
+    except ValueError:
+        age = 0.0
+
+    max_age = directives.get('max-age')
+    if max_age is not None:
+        try:
+            return max(0.0, float(max_age) - age)
+        except ValueError:
+            return 0.0
+    if 'expires' in headers:
+        expires = _http_date(headers['expires'])
+        if expires is None:
+            return 0.0  # некорректный Expires означает «уже устарел»
+        date = _http_date(headers.get('date')) or time.time()
+        return max(0.0, expires - date - age)
+    return default_ttl
+
+
+class ResponseCache:
+    """
+    Кеш ответов: LRU в памяти и необязательный уровень на диске.
+
+    Кешируются только запросы без тела (GET и HEAD); заголовок Vary
+    не учитывается, поэтому ключ зависит только от метода и URL.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        max_bytes: int = 64 * 1024 * 1024,
+        path: Optional[str] = None,
+        default_ttl: float = 0.0,
+        mmap_size: int = 256 * 1024 * 1024
+    ):
+        """
+        Args:
+            max_entries: Наибольшее число ответов в памяти
+            max_bytes: Наибольший суммарный размер тел ответов в памяти
+            path: Файл SQLite для второго уровня; None - только память
+            default_ttl: Срок хранения ответов без Cache-Control и Expires
+            mmap_size: Сколько байт файла SQLite читать через mmap
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.path = path
+        self._memory: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._bytes = 0
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._db = None
+        if path is not None:
+            self._db = sqlite3.connect(path, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(f"PRAGMA mmap_size={int(mmap_size)}")
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    expires REAL NOT NULL,
+                    status INTEGER NOT NULL,
+                    headers TEXT NOT NULL,
+                    body BLOB NOT NULL
+                )
+            """)
+
+    def __len__(self) -> int:
+        return len(self._memory)
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def _remember(self, key: str, entry: CachedResponse) -> None:
+        """Кладет ответ в память, вытесняя давно не использованные."""
+        if entry.size > self.max_bytes:
+            return
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._bytes -= previous.size
+        self._memory[key] = entry
+        self._bytes += entry.size
+        while len(self._memory) > self.max_entries or self._bytes > self.max_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._bytes -= evicted.size
+
+    def _forget(self, key: str) -> None:
+        entry = self._memory.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry.size
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        """Свежий ответ из памяти или с диска; найденный на диске поднимается в память."""
+        now = time.time()
+        entry = self._memory.get(key)
+        if entry is not None:
+            if entry.expires > now:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return entry
+            self._forget(key)
+
+        if self._db is not None:
+            row = self._db.execute(
+                "SELECT expires, status, headers, body FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                if row[0] > now:
+                    entry = CachedResponse(row[1], json.loads(row[2]), bytes(row[3]), row[0])
+                    self._remember(key, entry)
+                    self.hits += 1
+                    return entry
+                self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+
+        self.misses += 1
+        return None
+
+    def put(self, key: str, status: int, headers: Mapping[str, str], body: bytes) -> bool:
+        """
+        Сохраняет ответ, если его можно кешировать.
+
+        Returns:
+            bool: True если ответ сохранен
+        """
+        if status not in CACHEABLE_STATUSES:
+            return False
+        ttl = freshness_lifetime(headers, self.default_ttl)
+        if ttl <= 0:
+            return False
+        entry = CachedResponse(status, dict(headers), bytes(body), time.time() + ttl)
+        self._remember(key, entry)
+        if self._db is not None:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, expires, status, headers, body) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, entry.expires, entry.status, json.dumps(entry.headers), entry.body)
+            )
+        return True
+
+    def purge_expired(self) -> int:
+        """
+        Удаляет устаревшие ответы из памяти и с диска.
+
+        Returns:
+            int: Количество удаленных с диска записей
+        """
+        now = time.time()
+        for key in [k for k, entry in self._memory.items() if entry.expires <= now]:
+            self._forget(key)
+        if self._db is None:
+            return 0
+        return self._db.execute("DELETE FROM responses WHERE expires <= ?", (now,)).rowcount
+
+    async def coalesce(self, key: str, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Выполняет fetch, объединяя одновременные вызовы с одним ключом.
+
+        Результат (объект с атрибутами status, headers и body) сохраняется
+        в кеш. Пока первый вызов выполняется, остальные ждут его результат
+        или ошибку; если первый вызов отменен, ожидающие повторяют запрос.
+
+        Args:
+            key: Ключ запроса
+            fetch: Корутина-функция, выполняющая запрос
+
+        Returns:
+            Результат fetch
+        """
+        while key in self._inflight:
+            future = self._inflight[key]
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise  # отменен сам ожидающий
+
+        future = asyncio.get_running_loop().create_future()
+        # Ошибку, которую никто не ждал, не нужно показывать как забытую
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._inflight[key] = future
+        try:
+            result = await fetch()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            del self._inflight[key]
+        self.put(key, result.status, result.headers, result.body)
+        future.set_result(result)
+        return result
@@ -1,30 +1,165 @@
 """Модуль для проверки работоспособности прокси."""
 
 import logging
-import aiohttp
 import asyncio
-from datetime import datetime
-from typing import List, Optional
+import time
+from dataclasses import dataclass, field
+from typing import List, Optional, Sequence
 from .proxy import Proxy
+from .latency import CheckTimeouts, LatencyWindow
+from .prober import ProbeError, ProtocolProber
+from .storage import TargetResult
+from .subnets import SubnetHealth, group_by_exit_ip, interleave
+from .targets import Target
+from .tracing import PhaseRecorder, trace_config
+
+# aiohttp ходит только через HTTP-прокси
+_HTTP_PROTOCOLS = ('http', 'https')
+
+
+def parse_exit_ip(body: str) -> Optional[str]:
+    """
+    Внешний адрес из ответа проверочного сервиса.
+    
+    Понимает JSON вида {"ip": ...} (ipify), {"origin": ...} (httpbin; при
+    цепочке прокси последний адрес - тот, что увидел сервис) и адрес
+    простым текстом.
+    
+    Returns:
+        Optional[str]: Адрес или None, если в ответе его нет
+    """
+    import ipaddress
+    import json
+    
+    text = body.strip()
+    try:
+        data = json.loads(text)
+    except ValueError:
+        data = text
+    if isinstance(data, dict):
+        data = data.get("ip") or data.get("origin") or ""
+    if not isinstance(data, str):
+        return None
+    candidate = data.split(",")[-1].strip()
+    try:
+        return str(ipaddress.ip_address(candidate))
+    except ValueError:
+        return None
+
+
+@dataclass
+class CheckReport:
+    """Итог пакетной проверки прокси."""
+    working: List[Proxy] = field(default_factory=list)
+    checked: int = 0
+    skipped: int = 0
+    cancelled: int = 0
+    elapsed: float = 0.0
+    #: Секунд от начала до первого рабочего прокси
+    first_working: Optional[float] = None
+
+    @property
+    def useful_per_second(self) -> float:
+        """Найдено рабочих прокси в секунду - главная мера пропускной способности."""
+        return len(self.working) / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def checks_per_second(self) -> float:
+        return self.checked / self.elapsed if self.elapsed else 0.0
 
 
 class ProxyChecker:
     """Класс для проверки работоспособности прокси."""
     
-    def __init__(self, manager):
+    #: Минимум измерений, с которого таймаут подстраивается под пул
+    MIN_LATENCY_SAMPLES = 10
+    
+    def __init__(
+        self,
+        manager,
+        subnet_failure_threshold: Optional[int] = 3,
+        timeout: float = 10.0,
+        timeout_factor: Optional[float] = 3.0,
+        timeout_percentile: float = 0.9,
+        min_timeout: float = 1.0,
+        connect_share: float = 0.5,
+        bandwidth_url: Optional[str] = None,
+        bandwidth_bytes: int = 1_000_000,
+        bandwidth_rate: float = 0.2,
+        bandwidth_timeout: float = 15.0
+    ):
         """
         Инициализирует чекер прокси.
         
         Args:
             manager: Экземпляр ProxyManager для работы с базой прокси
+            subnet_failure_threshold: После стольких отказов подряд в одной /24
+                остальные ее прокси помечаются нерабочими без проверки;
+                None отключает учет подсетей
+            timeout: Наибольший срок ответа в секундах
+            timeout_factor: Срок ответа равен перцентилю времени ответа
+                рабочих прокси, умноженному на этот множитель; None - всегда timeout
+            timeout_percentile: Перцентиль для адаптивного срока
+            min_timeout: Наименьший срок соединения и ответа
+            connect_share: Доля срока ответа, отводимая на соединение с прокси
+            bandwidth_url: Адрес полезной нагрузки для замера скорости;
+                None отключает замер
+            bandwidth_bytes: Сколько байт нагрузки скачивать при замере
+            bandwidth_rate: Не больше стольких замеров скорости в секунду;
+                0 отключает замер
+            bandwidth_timeout: Наибольший срок одного замера в секундах
         """
+        if bandwidth_rate < 0:
+            raise ValueError("bandwidth_rate must not be negative")
         self.manager = manager
         self.logger = logging.getLogger(__name__)
         self.check_url = "http://api.ipify.org?format=json"
+        self.prober = ProtocolProber.from_url(self.check_url)
+        self.subnet_health = (
+            SubnetHealth(subnet_failure_threshold) if subnet_failure_threshold else None
+        )
+        self.timeout = timeout
+        self.timeout_factor = timeout_factor
+        self.timeout_percentile = timeout_percentile
+        self.min_timeout = min_timeout
+        self.connect_share = connect_share
+        self.latencies = LatencyWindow()
+        self._latencies_seeded = False
+        self.bandwidth_url = bandwidth_url
+        self.bandwidth_bytes = bandwidth_bytes
+        self.bandwidth_rate = bandwidth_rate
+        self.bandwidth_timeout = bandwidth_timeout
+        self._next_bandwidth = 0.0
+        self._trace_config = None
+    
+    def timeouts(self) -> CheckTimeouts:
+        """
+        Сроки следующей проверки.
+        
+        Пока измерений мало, окно дополняется случайной выборкой рабочего
+        пула из базы. Прокси, которые не укладываются в p90 x timeout_factor,
+        все равно были бы медленнее пула, и ждать их полный timeout незачем.
+        
+        Returns:
+            CheckTimeouts: Срок соединения и срок ответа после него
+        """
+        read = self.timeout
+        if self.timeout_factor is not None:
+            if not self._latencies_seeded and len(self.latencies) < self.MIN_LATENCY_SAMPLES:
+                self._latencies_seeded = True
+                self.latencies.extend(self.manager.sample_response_times())
+            if len(self.latencies) >= self.MIN_LATENCY_SAMPLES:
+                adaptive = self.latencies.percentile(self.timeout_percentile) * self.timeout_factor
+                read = min(self.timeout, max(self.min_timeout, adaptive))
+        connect = min(read, max(self.min_timeout, read * self.connect_share))
+        return CheckTimeouts(connect, read)
     
     async def check_proxy(self, proxy: Proxy) -> bool:
         """
-        Проверяет работоспособность прокси.
+        Проверяет работоспособность прокси и сохраняет результат.
+        
+        Если задан bandwidth_url, рабочий прокси дополнительно проходит
+        замер скорости, но не чаще bandwidth_rate замеров в секунду.
         
         Args:
             proxy: Объект Proxy для проверки
@@ -32,28 +167,125 @@ class ProxyChecker:
         Returns:
             bool: True если прокси работает, False если нет
         """
-        start_time = datetime.now()
+        working = await self.probe(proxy)
+        self.manager.update_proxy_status(proxy)
+        if working and self._bandwidth_due() and await self.measure_bandwidth(proxy):
+            self.manager.update_bandwidth([proxy])
+        return working
+    
+    def _bandwidth_due(self) -> bool:
+        """Пора ли следующий замер скорости; занимает его, если пора."""
+        if self.bandwidth_url is None or self.bandwidth_rate <= 0:
+            return False
+        now = time.monotonic()
+        if now < self._next_bandwidth:
+            return False
+        self._next_bandwidth = now + 1.0 / self.bandwidth_rate
+        return True
+    
+    async def measure_bandwidth(self, proxy: Proxy) -> bool:
+        """
+        Замеряет скорость загрузки через прокси, не сохраняя результат.
+        
+        Скачивает до bandwidth_bytes из bandwidth_url и выставляет
+        proxy.ttfb - секунды от отправки запроса до заголовков ответа - и
+        proxy.bandwidth - байты в секунду при чтении тела. Если срок
+        замера истек, скорость считается по тому, что успело прийти.
+        
+        Args:
+            proxy: Рабочий HTTP-прокси
+            
+        Returns:
+            bool: True, если ответ начал приходить и замер выполнен
+        """
+        import aiohttp
+        
+        if self.bandwidth_url is None or proxy.protocol not in _HTTP_PROTOCOLS:
+            return False
+        timeouts = self.timeouts()
+        received = 0
+        first_byte = None
+        start = time.monotonic()
+        try:
+            async with aiohttp.ClientSession() as session:
+                async with session.get(
+                    self.bandwidth_url,
+                    proxy=f"http://{proxy.ip}:{proxy.port}",
+                    timeout=aiohttp.ClientTimeout(
+                        total=self.bandwidth_timeout, sock_connect=timeouts.connect
+                    ),
+                    ssl=False
+                ) as response:
+                    if response.status != 200:
+                        return False
+                    first_byte = time.monotonic()
+                    async for chunk in response.content.iter_any():
+                        received += len(chunk)
+                        if received >= self.bandwidth_bytes:
+                            break
+        except (aiohttp.ClientError, asyncio.TimeoutError, OSError, ValueError) as e:
+            self.logger.debug(f"Bandwidth probe through {proxy.url} stopped: {e!r}")
+        if first_byte is None:
+            return False
+        # Тело, пришедшее вместе с заголовками, дает почти нулевое время чтения
+        elapsed = max(time.monotonic() - first_byte, 1e-3)
+        proxy.ttfb = first_byte - start
+        proxy.bandwidth = received / elapsed
+        return True
+    
+    async def probe(self, proxy: Proxy) -> bool:
+        """
+        Проверяет прокси, не сохраняя результат в базу.
+        
+        Выставляет proxy.status и, для рабочего прокси, proxy.response_time,
+        proxy.phases - длительности фаз запроса - и proxy.exit_ip - адрес,
+        с которым запрос пришел к проверочному сервису (у SOCKS-прокси фазы
+        и адрес не определяются).
+        
+        Args:
+            proxy: Объект Proxy для проверки
+            
+        Returns:
+            bool: True если прокси работает, False если нет
+        """
+        if proxy.protocol in ('socks4', 'socks5'):
+            # aiohttp не умеет SOCKS, такие прокси проверяются рукопожатием
+            return await self._check_with_prober(proxy)
+        
+        import aiohttp  # отложенный импорт: aiohttp тяжелый, а нужен только для проверок
+        
         proxy_url = f"{proxy.protocol}://{proxy.ip}:{proxy.port}"
+        timeouts = self.timeouts()
+        if self._trace_config is None:
+            self._trace_config = trace_config()
+        recorder = PhaseRecorder()
+        start_time = time.monotonic()
         
         try:
-            session = aiohttp.ClientSession()
+            session = aiohttp.ClientSession(trace_configs=[self._trace_config])
             try:
                 async with session:
                     async with await session.get(
                         self.check_url,
                         proxy=proxy_url,
-                        timeout=10,
-                        ssl=False
+                        timeout=aiohttp.ClientTimeout(
+                            total=timeouts.total,
+                            sock_connect=timeouts.connect,
+                            sock_read=timeouts.read
+                        ),
+                        ssl=False,
+                        trace_request_ctx=recorder
                     ) as response:
                         if response.status == 200:
-                            await response.text()  # Читаем ответ
-                            proxy.response_time = (datetime.now() - start_time).total_seconds()
+                            proxy.exit_ip = parse_exit_ip(await response.text())
+                            recorder.finish()
+                            proxy.response_time = time.monotonic() - start_time
+                            proxy.phases = recorder.phases()
                             proxy.status = "working"
-                            self.manager.update_proxy_status(proxy)
+                            self.latencies.add(proxy.response_time)
                             return True
                         
                         proxy.status = "failed"
-                        self.manager.update_proxy_status(proxy)
                         return False
             finally:
                 await session.close()
@@ -61,50 +293,269 @@ class ProxyChecker:
         except Exception as e:
             self.logger.warning(f"Failed to check proxy {proxy_url}: {str(e)}")
             proxy.status = "failed"
-            self.manager.update_proxy_status(proxy)
             return False
     
+    async def _check_with_prober(self, proxy: Proxy) -> bool:
+        timeouts = self.timeouts()
+        try:
+            proxy.response_time = await self.prober.probe(
+                proxy.ip, proxy.port, proxy.protocol,
+                timeout=timeouts.read, connect_timeout=timeouts.connect
+            )
+            proxy.status = "working"
+            self.latencies.add(proxy.response_time)
+        except (ProbeError, OSError, asyncio.TimeoutError) as e:
+            self.logger.warning(f"Failed to check proxy {proxy.url}: {e!r}")
+            proxy.status = "failed"
+        return proxy.status == "working"
+    
+    async def detect_protocols(self, proxy: Proxy, race: bool = False) -> bool:
+        """
+        Определяет рабочие протоколы прокси и сохраняет их.
+        
+        Протокол из источника проверяется первым и остается основным, если
+        работает; иначе основным становится самый быстрый из рабочих.
+        
+        Args:
+            proxy: Объект Proxy для проверки
+            race: Проверять протоколы одновременно, а не по очереди
+            
+        Returns:
+            bool: True если прокси работает хотя бы по одному протоколу
+        """
+        result = await self.prober.detect(proxy.ip, proxy.port, hint=proxy.protocol, race=race)
+        proxy.protocols = list(result.protocols)
+        if result.working:
+            if proxy.protocol not in result.protocols:
+                proxy.protocol = result.fastest
+            proxy.response_time = result.response_times[proxy.protocol]
+            proxy.status = "working"
+        else:
+            proxy.status = "failed"
+        self.manager.update_proxy_status(proxy)
+        return result.working
+    
     def get_unchecked_proxies(self, limit: int = 100) -> List[Proxy]:
         """
         Получает список непроверенных прокси.
         
+        Первыми идут прокси из источников с наибольшей долей рабочих,
+        чтобы бюджет проверок уходил на самых вероятных кандидатов.
+        
         Args:
             limit: Максимальное количество прокси
             
         Returns:
             List[Proxy]: Список непроверенных прокси
         """
-        with self.manager.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT ip, port, protocol
-                FROM proxies
-                WHERE status IS NULL
-                AND is_outdated = 0
-                LIMIT ?
-            """, (limit,))
-            
-            proxies = []
-            for row in cursor.fetchall():
-                proxy = Proxy(ip=row[0], port=row[1], protocol=row[2])
-                proxies.append(proxy)
-            return proxies
+        return self.manager.get_unchecked_proxies(limit, by_source_yield=True)
     
-    async def check_random_proxies(self, limit: int = 10) -> List[Proxy]:
+    async def check_random_proxies(
+        self,
+        limit: int = 10,
+        detect: bool = False,
+        target: Optional[int] = None,
+        concurrency: int = 1
+    ) -> List[Proxy]:
         """
         Проверяет случайные прокси из базы.
         
         Args:
             limit: Максимальное количество прокси для проверки
+            detect: Определять протоколы вместо проверки заявленного
+            target: Остановиться, найдя столько рабочих прокси
+            concurrency: Число одновременных проверок
             
         Returns:
             List[Proxy]: Список рабочих прокси
         """
         proxies = self.get_unchecked_proxies(limit)
-        working_proxies = []
+        report = await self.check_proxies(proxies, detect, target, concurrency)
+        return report.working
+    
+    async def check_proxies(
+        self,
+        proxies: Sequence[Proxy],
+        detect: bool = False,
+        target: Optional[int] = None,
+        concurrency: int = 1
+    ) -> CheckReport:
+        """
+        Проверяет пакет прокси.
         
+        Прокси проверяются вперемешку по подсетям. Когда подсеть набирает
+        subnet_failure_threshold отказов подряд, ее оставшиеся прокси
+        пропускаются, не тратя на каждый таймаут. Они не проверялись,
+        поэтому в базе остаются непроверенными, а не нерабочими: так они не
+        портят статистику источников и не попадают в отрицательный кеш.
+        Прокси, недавно отказывавшие по отрицательному кешу менеджера,
+        проверяются последними. Как только найдено target рабочих прокси,
+        незавершенные проверки отменяются; их прокси остаются непроверенными.
+        
+        Args:
+            proxies: Прокси для проверки
+            detect: Определять протоколы вместо проверки заявленного
+            target: Остановиться, найдя столько рабочих прокси
+            concurrency: Число одновременных проверок
+            
+        Returns:
+            CheckReport: Рабочие прокси и счетчики проверки
+        """
+        check = self.detect_protocols if detect else self.check_proxy
+        health = self.subnet_health
+        # Недавно отказывавшие прокси проверяются последними
+        fresh, dead = [], []
         for proxy in proxies:
-            if await self.check_proxy(proxy):
-                working_proxies.append(proxy)
+            (dead if self.manager.is_known_dead(proxy.ip, proxy.port) else fresh).append(proxy)
+        if health is not None:
+            fresh, dead = interleave(fresh, health.prefix), interleave(dead, health.prefix)
+        proxies = fresh + dead
+        
+        report = CheckReport()
+        pending = iter(proxies)
+        skipped = []
+        workers = []
+        in_flight = 0
+        started = time.monotonic()
+        
+        async def worker():
+            nonlocal in_flight
+            for proxy in pending:
+                if health is not None and health.is_dead(proxy.ip):
+                    skipped.append(proxy)
+                    continue
+                in_flight += 1
+                try:
+                    ok = await check(proxy)
+                finally:
+                    in_flight -= 1
+                report.checked += 1
+                if health is not None:
+                    health.record(proxy.ip, ok)
+                if ok:
+                    if not report.working:
+                        report.first_working = time.monotonic() - started
+                    report.working.append(proxy)
+                    if target is not None and len(report.working) >= target:
+                        report.cancelled = in_flight
+                        for task in workers:
+                            if task is not asyncio.current_task():
+                                task.cancel()
+                        return
+        
+        workers.extend(asyncio.ensure_future(worker()) for _ in range(max(1, concurrency)))
+        results = await asyncio.gather(*workers, return_exceptions=True)
+        report.elapsed = time.monotonic() - started
+        for result in results:
+            if isinstance(result, Exception):
+                raise result
+        
+        if skipped:
+            self.logger.info(f"Skipped {len(skipped)} proxies from dead subnets, left unchecked")
+        report.skipped = len(skipped)
+        self.manager.save_dead_cache()
+        self.logger.info(
+            f"Checked {report.checked} proxies in {report.elapsed:.1f}s: "
+            f"{len(report.working)} working, {report.useful_per_second:.2f} useful proxies/s"
+        )
+        return report
+
+    async def check_target(self, target: str, limit: int = 100, concurrency: int = 10) -> List[Proxy]:
+        """
+        Проверяет рабочие прокси на целевом сайте.
+        
+        Проверяются прокси без действительного (моложе ttl цели) результата,
+        начиная с самых быстрых; результаты записываются в хранилище одной
+        пачкой. aiohttp ходит только через HTTP-прокси, поэтому SOCKS-прокси
+        не проверяются и результата на цели не получают: в кандидаты они не
+        берутся, а в выборку по цели без успешного результата не попадают.
         
+        Args:
+            target: Имя зарегистрированной цели (manager.register_target)
+            limit: Максимальное количество прокси для проверки
+            concurrency: Число одновременных проверок
+            
+        Returns:
+            List[Proxy]: Прокси, которые работают для цели
+        """
+        import aiohttp
+        
+        spec = self.manager.get_target(target)
+        proxies = self.manager.get_target_candidates(target, limit, _HTTP_PROTOCOLS)
+        if not proxies:
+            return []
+        
+        results = {}
+        pending = iter(proxies)
+        
+        async def worker(session):
+            for proxy in pending:
+                results[id(proxy)] = await self._probe_target(session, proxy, spec)
+        
+        try:
+            async with aiohttp.ClientSession() as session:
+                await asyncio.gather(*(worker(session) for _ in range(min(concurrency, len(proxies)))))
+        finally:
+            # Прерванная проверка не оставляет результата, прокси останется кандидатом
+            self.manager.record_target_results(target, [
+                TargetResult(proxy.ip, proxy.port, results[id(proxy)])
+                for proxy in proxies if id(proxy) in results
+            ])
+        working = [proxy for proxy in proxies if results[id(proxy)]]
+        self.logger.info(f"Checked {len(proxies)} proxies on {target}: {len(working)} working")
+        return working
+    
+    async def _probe_target(self, session, proxy: Proxy, target: Target) -> bool:
+        """Пробный запрос к цели через прокси; True, если ответ прошел критерии цели."""
+        import aiohttp
+        
+        if proxy.protocol not in _HTTP_PROTOCOLS:
+            return False
+        timeouts = self.timeouts()
+        total = target.timeout if target.timeout is not None else timeouts.total
+        try:
+            async with session.get(
+                target.url,
+                proxy=f"http://{proxy.ip}:{proxy.port}",
+                timeout=aiohttp.ClientTimeout(total=total, sock_connect=timeouts.connect),
+                ssl=False
+            ) as response:
+                body = await response.text(errors='replace') if target.needs_body else ""
+                return target.accepts(response.status, body)
+        except (aiohttp.ClientError, asyncio.TimeoutError, OSError, ValueError) as e:
+            self.logger.debug(f"Proxy {proxy.url} failed on {target.name}: {e!r}")
+            return False
+    
+    async def revalidate_working_proxies(self, limit: int = 100) -> List[Proxy]:
+        """
+        Перепроверяет прокси из пула рабочих, например после загрузки снимка.
+        
+        Прокси с общим внешним адресом - это входы одного выходного узла,
+        и работают они обычно вместе. Поэтому в каждой такой группе сначала
+        проверяется один прокси - дольше всех не проверявшийся, при равенстве
+        самый быстрый; остальные проверяются, только если он отказал. Если
+        он работает, остальные не проверяются, не попадают в результат и
+        остаются в базе с прежним статусом и датой проверки, а следующая
+        перепроверка возьмет уже другого представителя группы. Прокси без
+        известного внешнего адреса проверяются все.
+        
+        Args:
+            limit: Максимальное количество прокси для проверки
+            
+        Returns:
+            List[Proxy]: Проверенные прокси, которые остались рабочими
+        """
+        working_proxies = []
+        proxies = self.manager.get_working_proxies(limit)
+        for group in group_by_exit_ip(proxies):
+            # Даты - ISO-строки одного формата; min берет первый из равных,
+            # а группа упорядочена по скорости
+            representative = min(group, key=lambda proxy: proxy.last_check or "")
+            if await self.check_proxy(representative):
+                working_proxies.append(representative)
+                continue
+            rest = [proxy for proxy in group if proxy is not representative]
+            if rest:
+                results = await asyncio.gather(*(self.check_proxy(proxy) for proxy in rest))
+                working_proxies.extend(proxy for proxy, ok in zip(rest, results) if ok)
         return working_proxies
@@ -1,23 +1,27 @@
 """Модуль для сбора прокси из различных источников."""
 
 import logging
-import aiohttp
-from typing import List, Dict, Optional
+from typing import AsyncIterator, List, Dict, Optional
+from .bogons import filter_valid
 from .proxy import Proxy
 from .manager import ProxyManager
+from .geoip import GeoIPDatabase
+from .sources.geonode import GeonodeSource
 
 
 class ProxyCollector:
     """Класс для сбора прокси из различных источников."""
     
-    def __init__(self, manager: ProxyManager):
+    def __init__(self, manager: ProxyManager, geoip: Optional[GeoIPDatabase] = None):
         """
         Инициализирует коллектор прокси.
         
         Args:
             manager: Экземпляр ProxyManager для работы с базой прокси
+            geoip: GeoIPDatabase для определения страны и ASN собранных прокси
         """
         self.manager = manager
+        self.geoip = geoip
         self.logger = logging.getLogger(__name__)
         
         # Список источников прокси
@@ -55,8 +59,8 @@ class ProxyCollector:
                 "protocol": "http"
             },
             {
-                "url": "https://proxylist.geonode.com/api/proxy-list?limit=500&page=1&sort_by=lastChecked&sort_type=desc&protocols=http%2Chttps",
-                "protocol": "http"
+                # Постраничный JSON API: все страницы, а не только первая
+                "source": GeonodeSource()
             }
         ]
 
@@ -69,8 +73,10 @@ class ProxyCollector:
             protocol: Протокол прокси (http/https/socks4/socks5)
             
         Returns:
-            List[Proxy]: Список собранных прокси
+            List[Proxy]: Прокси с публичными адресами и корректными портами
         """
+        import aiohttp  # отложенный импорт: aiohttp тяжелый, а нужен только для сбора
+        
         proxies = []
         try:
             session = aiohttp.ClientSession()
@@ -80,35 +86,139 @@ class ProxyCollector:
                         if response.status == 200:
                             text = await response.text()
                             for line in text.split('\n'):
-                                if ':' in line:
-                                    ip, port = line.strip().split(':')
-                                    proxies.append(Proxy(
-                                        ip=ip,
-                                        port=port,
-                                        protocol=protocol
-                                    ))
+                                # Кривая строка (IPv6, ip:port:user:pass, пустая)
+                                # пропускается, а не обрывает весь источник
+                                parts = line.strip().rsplit(':', 1)
+                                if len(parts) != 2:
+                                    continue
+                                ip, port = parts
+                                proxies.append(Proxy(
+                                    ip=ip,
+                                    port=port,
+                                    protocol=protocol
+                                ))
             finally:
                 await session.close()
                         
         except Exception as e:
             self.logger.warning(f"Failed to collect from {url}: {str(e)}")
             
-        return proxies
+        # Частные, зарезервированные и мусорные адреса не доходят до базы
+        return filter_valid(proxies)
+
+    def _enrich(self, proxies: list) -> list:
+        """Дополняет пакет прокси страной и ASN из офлайн-базы, если она задана."""
+        if self.geoip is None or not proxies:
+            return proxies
+        return self.geoip.enrich(proxies)
+
+    @staticmethod
+    def _checkable(proxies: list) -> List[Proxy]:
+        """
+        Переводит прокси постраничного источника (неизменяемые models.Proxy)
+        в изменяемые Proxy, в которые проверщик записывает результат.
+        """
+        return [
+            Proxy(
+                ip=proxy.ip, port=proxy.port, protocol=proxy.protocol,
+                country=proxy.country or None, anonymity=proxy.anonymity or None, asn=proxy.asn
+            )
+            for proxy in proxies
+        ]
+
+    @staticmethod
+    def source_name(source: dict) -> str:
+        """Имя источника, под которым хранится его статистика."""
+        return source["source"].url if "source" in source else source["url"]
+
+    async def iter_source(self, source: dict) -> AsyncIterator[List[Proxy]]:
+        """
+        Пакеты прокси источника по мере загрузки, без записи в базу.
+        
+        Постраничный источник отдает пакет на каждую страницу, список
+        по URL - один пакет целиком.
+        
+        Args:
+            source: Элемент self.sources
+        """
+        if "source" in source:
+            async for page in source["source"].iter_pages():
+                yield self._checkable(self._enrich(page))
+        else:
+            yield self._enrich(await self._collect_from_api(source["url"], source["protocol"]))
+
+    async def _collect_paged(self, source, unique_proxies: set) -> int:
+        """
+        Загружает постраничный источник, сохраняя каждую страницу по мере готовности.
+        
+        Args:
+            source: Экземпляр PagedJSONSource
+            unique_proxies: Уже собранные ключи ip:port, пополняется
+            
+        Returns:
+            int: Количество новых прокси
+        """
+        collected = 0
+        try:
+            async for page in source.iter_pages():
+                new, known = [], []
+                for proxy in page:
+                    proxy_key = f"{proxy.ip}:{proxy.port}"
+                    if self.manager.is_known_dead(proxy.ip, proxy.port):
+                        unique_proxies.add(proxy_key)
+                    elif proxy_key not in unique_proxies:
+                        unique_proxies.add(proxy_key)
+                        new.append(proxy)
+                    else:
+                        known.append(proxy)
+                # Уже собранные прокси тоже связываются с этим источником
+                self.manager.add_proxies(self._enrich(new) + known, source=source.url)
+                collected += len(new)
+        except Exception as e:
+            self.logger.warning(f"Failed to collect from {source.url}: {str(e)}")
+        return collected
 
     async def collect_all(self) -> None:
-        """Собирает прокси из всех источников."""
+        """
+        Собирает прокси из всех источников.
+        
+        Прокси, которые отрицательный кеш менеджера считает мертвыми,
+        не добавляются в базу и не расходуют бюджет проверок. Каждый прокси
+        связывается со всеми источниками, которые его дали: по их доле
+        рабочих ProxyChecker решает, что проверять первым.
+        """
         total_collected = 0
+        skipped_dead = 0
         unique_proxies = set()  # для отслеживания уникальных прокси
         
         for source in self.sources:
-            proxies = await self._collect_from_api(source["url"], source["protocol"])
+            if "source" in source:
+                total_collected += await self._collect_paged(source["source"], unique_proxies)
+                continue
+            
+            proxies = self._enrich(await self._collect_from_api(source["url"], source["protocol"]))
             
             # Добавляем только уникальные прокси
+            known = []
             for proxy in proxies:
                 proxy_key = f"{proxy.ip}:{proxy.port}"
                 if proxy_key not in unique_proxies:
                     unique_proxies.add(proxy_key)
-                    self.manager.add_proxy(proxy)
+                    if self.manager.is_known_dead(proxy.ip, proxy.port):
+                        skipped_dead += 1
+                        continue
+                    try:
+                        self.manager.add_proxy(proxy, source=source["url"])
+                    except ValueError as e:
+                        self.logger.debug(f"Skipping invalid proxy {proxy_key}: {str(e)}")
+                        continue
                     total_collected += 1
+                elif not self.manager.is_known_dead(proxy.ip, proxy.port):
+                    known.append(proxy)
+            # Прокси, уже собранные из других источников, связываем и с этим
+            if known:
+                self.manager.add_proxies(known, source=source["url"])
         
+        if skipped_dead:
+            self.logger.info(f"Skipped {skipped_dead} recently dead proxies")
         self.logger.info(f"Total unique proxies collected: {total_collected}")
@@ -0,0 +1,200 @@
+"""
+Модуль отрицательного кеша: недавно нерабочие прокси.
+
+Одни и те же мертвые прокси день за днем появляются в списках источников,
+а после очистки старых записей снова попадают в базу непроверенными.
+Кеш помнит их отказы в фильтрах Блума: по одному фильтру на период
+(по умолчанию 6 часов), последние generations фильтров составляют окно.
+Старые фильтры выбрасываются целиком, поэтому записи забываются сами.
+Прокси считается мертвым, если он отказывал хотя бы в min_failures
+разных периодах окна.
+
+Ключ - упакованные ip:port (6 байт для IPv4). Память ограничена заранее:
+generations фильтров по capacity элементов с заданной вероятностью
+ложного срабатывания. Заполненный фильтр не переполняется: следующий
+период начинается раньше.
+
+Формат файла (little-endian):
+    заголовок: magic b'PXDC', версия (H), хеш-функций (H), бит в фильтре (Q),
+               емкость (I), фильтров (I), период (d)
+    фильтры:   время начала (d), элементов (I), биты (m / 8 байт)
+"""
+
+import hashlib
+import logging
+import math
+import os
+import socket
+import struct
+import time
+from typing import List, Optional, Union
+
+MAGIC = b'PXDC'
+VERSION = 1
+HEADER = struct.Struct('<4sHHQIId')
+GENERATION = struct.Struct('<dI')
+
+
+def proxy_key(ip: str, port: Union[int, str]) -> bytes:
+    """Упакованный ключ ip:port."""
+    port = int(port)
+    if isinstance(ip, str) and ip.count('.') == 3:
+        try:
+            return socket.inet_aton(ip) + struct.pack('>H', port)
+        except OSError:
+            pass
+    return f"{ip}:{port}".encode()
+
+
+class BloomFilter:
+    """Фильтр Блума с двойным хешированием по blake2b."""
+
+    def __init__(self, size: int, hashes: int, created: float,
+                 bits: Optional[bytearray] = None, count: int = 0):
+        """
+        Args:
+            size: Число бит (кратно 8)
+            hashes: Число хеш-функций
+            created: Время начала периода фильтра
+            bits: Готовые биты, например прочитанные из файла
+            count: Число добавленных элементов
+        """
+        self.size = size
+        self.hashes = hashes
+        self.created = created
+        self.bits = bits if bits is not None else bytearray(size // 8)
+        self.count = count
+
+    @staticmethod
+    def optimal(capacity: int, error_rate: float):
+        """Число бит и хеш-функций для capacity элементов и доли ложных срабатываний."""
+        size = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        size = (size + 7) // 8 * 8
+        hashes = max(1, round(size / capacity * math.log(2)))
+        return size, hashes
+
+    def _positions(self, key: bytes):
+        h1, h2 = struct.unpack('<QQ', hashlib.blake2b(key, digest_size=16).digest())
+        h2 |= 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, key: bytes) -> None:
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key: bytes) -> bool:
+        bits = self.bits
+        return all(bits[p >> 3] & (1 << (p & 7)) for p in self._positions(key))
+
+
+class DeadProxyCache:
+    """Отказы прокси за последние generations периодов в фильтрах Блума."""
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        capacity: int = 1_000_000,
+        error_rate: float = 0.01,
+        period: float = 6 * 3600,
+        generations: int = 8,
+        min_failures: int = 2
+    ):
+        """
+        Открывает кеш; сохраненный файл загружается, если параметры совпадают.
+
+        Args:
+            path: Файл кеша; None - кеш только в памяти
+            capacity: Сколько отказов помещается в один фильтр
+            error_rate: Доля ложных срабатываний одного фильтра
+            period: Длительность периода одного фильтра в секундах
+            generations: Сколько последних фильтров хранить
+            min_failures: В скольких разных периодах прокси должен отказать,
+                чтобы считаться мертвым
+        """
+        self.path = path
+        self.capacity = capacity
+        self.period = period
+        self.generations = generations
+        self.min_failures = min_failures
+        self.size, self.hashes = BloomFilter.optimal(capacity, error_rate)
+        self.filters: List[BloomFilter] = []
+        self.dirty = False
+        self.logger = logging.getLogger(__name__)
+        if path is not None and os.path.exists(path):
+            self._load()
+
+    @property
+    def memory_bytes(self) -> int:
+        """Наибольший объем памяти под биты фильтров."""
+        return self.size // 8 * self.generations
+
+    def _current(self) -> BloomFilter:
+        """Фильтр текущего периода; устаревшие фильтры выбрасываются."""
+        now = time.time()
+        self.filters = [f for f in self.filters if f.created > now - self.period * self.generations]
+        if (not self.filters or self.filters[-1].created <= now - self.period
+                or self.filters[-1].count >= self.capacity):
+            self.filters.append(BloomFilter(self.size, self.hashes, now))
+            del self.filters[:-self.generations]
+        return self.filters[-1]
+
+    def record_failure(self, ip: str, port: Union[int, str]) -> None:
+        """Запоминает отказ; повторный отказ в том же периоде не считается."""
+        key = proxy_key(ip, port)
+        current = self._current()
+        if key not in current:
+            current.add(key)
+            self.dirty = True
+
+    def failures(self, ip: str, port: Union[int, str]) -> int:
+        """В скольких периодах окна прокси отказывал (с учетом ложных срабатываний)."""
+        key = proxy_key(ip, port)
+        cutoff = time.time() - self.period * self.generations
+        return sum(1 for f in self.filters if f.created > cutoff and key in f)
+
+    def is_dead(self, ip: str, port: Union[int, str]) -> bool:
+        return self.failures(ip, port) >= self.min_failures
+
+    def save(self, path: Optional[str] = None) -> None:
+        """Атомарно сохраняет кеш в файл."""
+        path = path or self.path
+        if path is None:
+            return
+        self._current()
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, VERSION, self.hashes, self.size, self.capacity,
+                                len(self.filters), self.period))
+            for bloom in self.filters:
+                f.write(GENERATION.pack(bloom.created, bloom.count))
+                f.write(bloom.bits)
+        os.replace(tmp_path, path)
+        self.dirty = False
+
+    def _load(self) -> None:
+        with open(self.path, 'rb') as f:
+            data = f.read()
+        try:
+            magic, version, hashes, size, capacity, count, period = HEADER.unpack_from(data)
+        except struct.error:
+            magic = None
+        if magic != MAGIC or version != VERSION:
+            self.logger.warning(f"Ignoring dead proxy cache {self.path}: unknown format")
+            return
+        if (hashes, size, capacity, period) != (self.hashes, self.size, self.capacity, self.period):
+            self.logger.info(f"Dead proxy cache {self.path} has other parameters, starting afresh")
+            return
+
+        offset = HEADER.size
+        filters = []
+        for _ in range(count):
+            if len(data) < offset + GENERATION.size + size // 8:
+                self.logger.warning(f"Ignoring truncated dead proxy cache {self.path}")
+                return
+            created, items = GENERATION.unpack_from(data, offset)
+            offset += GENERATION.size
+            bits = bytearray(data[offset:offset + size // 8])
+            offset += size // 8
+            filters.append(BloomFilter(size, hashes, created, bits, items))
+        self.filters = filters[-self.generations:]
@@ -0,0 +1,273 @@
+"""
+Модуль офлайн-определения страны и ASN по IP-адресу.
+
+Исходная база диапазонов (CSV: начало, конец, страна, ASN) один раз
+компилируется в бинарный файл с отсортированными массивами целых чисел.
+Файл открывается через mmap без разбора, поиск идет бинарным поиском
+по массиву начал диапазонов, а при наличии NumPy пакет адресов ищется
+одним вызовом searchsorted. Сеть не нужна, поиск занимает микросекунды.
+
+Формат (little-endian):
+    заголовок: magic b'PXGI', версия (H), резерв (H), количество диапазонов (I),
+               резерв (I)
+    массивы:   начала (I * n), концы (I * n), ASN (I * n, 0 если нет),
+               коды стран (2s * n, b'\\0\\0' если нет)
+"""
+
+import csv
+import dataclasses
+import mmap
+import os
+import socket
+import struct
+from bisect import bisect_right
+from typing import Iterable, List, NamedTuple, Optional, Sequence
+
+MAGIC = b'PXGI'
+VERSION = 1
+HEADER = struct.Struct('<4sHHII')
+
+# Значения «страна неизвестна» в распространенных CSV-базах
+_NO_COUNTRY = {'', '-', 'ZZ', '--'}
+
+
+class GeoIPError(ValueError):
+    """Файл базы поврежден или имеет неизвестный формат."""
+
+
+class GeoInfo(NamedTuple):
+    """Результат поиска: код страны и номер автономной системы."""
+    country: Optional[str]
+    asn: Optional[int]
+
+
+def ip_to_int(ip: str) -> Optional[int]:
+    """IPv4-адрес как целое число или None, если это не IPv4."""
+    # inet_aton принимает и сокращенные формы вроде '127.1'
+    if not isinstance(ip, str) or ip.count('.') != 3:
+        return None
+    try:
+        return int.from_bytes(socket.inet_aton(ip), 'big')
+    except OSError:
+        return None
+
+
+def _pack_ips(ips: Sequence[str]) -> Optional[bytes]:
+    """Упаковывает адреса одним join; None, если среди них есть не-IPv4."""
+    try:
+        if all(isinstance(ip, str) and ip.count('.') == 3 for ip in ips):
+            return b''.join(map(socket.inet_aton, ips))
+    except OSError:
+        pass
+    return None
+
+
+def _parse_address(value: str) -> int:
+    value = value.strip()
+    if value.isdigit():
+        return int(value)
+    number = ip_to_int(value)
+    if number is None:
+        raise ValueError(f"Not an IPv4 address: {value}")
+    return number
+
+
+def _parse_asn(value: str) -> int:
+    value = value.strip().upper()
+    if value.startswith('AS'):
+        value = value[2:]
+    return int(value) if value.isdigit() else 0
+
+
+def compile_database(
+    source: str,
+    path: str,
+    country_column: int = 2,
+    asn_column: Optional[int] = 3
+) -> int:
+    """
+    Компилирует CSV с диапазонами адресов в бинарный файл базы.
+
+    Адреса в CSV могут быть записаны как IPv4 или как целые числа; строки
+    с IPv6, комментариями и заголовком пропускаются.
+
+    Args:
+        source: Путь к CSV
+        path: Путь к бинарному файлу базы
+        country_column: Номер колонки с кодом страны
+        asn_column: Номер колонки с ASN или None, если ее нет
+
+    Returns:
+        int: Количество диапазонов в базе
+    """
+    ranges = []
+    with open(source, newline='', encoding='utf-8') as f:
+        for row in csv.reader(f):
+            if not row or row[0].startswith('#'):
+                continue
+            try:
+                start, end = _parse_address(row[0]), _parse_address(row[1])
+            except (ValueError, IndexError):
+                continue
+            country = row[country_column].strip().upper() if len(row) > country_column else ''
+            if country in _NO_COUNTRY or len(country) != 2:
+                country = ''
+            asn = _parse_asn(row[asn_column]) if asn_column is not None and len(row) > asn_column else 0
+            if start > end or (not country and not asn):
+                continue
+            ranges.append((start, end, asn, country.encode('ascii')))
+    ranges.sort()
+
+    count = len(ranges)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, 0, count, 0))
+        for column, fmt in ((0, 'I'), (1, 'I'), (2, 'I')):
+            f.write(struct.pack(f'<{count}{fmt}', *(r[column] for r in ranges)))
+        f.write(b''.join(r[3].ljust(2, b'\0') for r in ranges))
+    os.replace(tmp_path, path)
+    return count
+
+
+class GeoIPDatabase:
+    """
+    База диапазонов адресов, открытая через mmap.
+
+    Массивы не копируются в память процесса: бинарный поиск читает
+    страницы файла напрямую, поэтому открытие базы практически бесплатно.
+    """
+
+    def __init__(self, path: str):
+        """
+        Открывает скомпилированную базу.
+
+        Raises:
+            GeoIPError: Если файл поврежден или другой версии
+        """
+        self.path = path
+        with open(path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < HEADER.size:
+                raise GeoIPError(f"GeoIP database {path} is truncated")
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, count, _ = HEADER.unpack_from(self._mmap)
+        if magic != MAGIC or version != VERSION:
+            self._mmap.close()
+            raise GeoIPError(f"Unsupported GeoIP database format in {path}")
+        if size < HEADER.size + count * 14:
+            self._mmap.close()
+            raise GeoIPError(f"GeoIP database {path} is truncated")
+
+        self.count = count
+        # cast('I') читает в порядке байтов платформы; формат little-endian,
+        # как на x86 и ARM
+        view = memoryview(self._mmap)
+        offset = HEADER.size
+        self._starts = view[offset:offset + count * 4].cast('I')
+        self._ends = view[offset + count * 4:offset + count * 8].cast('I')
+        self._asns = view[offset + count * 8:offset + count * 12].cast('I')
+        self._countries = view[offset + count * 12:offset + count * 14]
+        self._views = [view, self._starts, self._ends, self._asns, self._countries]
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __enter__(self) -> "GeoIPDatabase":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Освобождает отображение файла."""
+        for view in reversed(self._views):
+            view.release()
+        self._views = []
+        self._mmap.close()
+
+    def _info(self, index: int) -> GeoInfo:
+        country = bytes(self._countries[index * 2:index * 2 + 2])
+        asn = self._asns[index]
+        return GeoInfo(country.decode('ascii') if country != b'\0\0' else None, asn or None)
+
+    def _find(self, number: Optional[int]) -> Optional[GeoInfo]:
+        if number is None:
+            return None
+        index = bisect_right(self._starts, number) - 1
+        if index < 0 or number > self._ends[index]:
+            return None
+        return self._info(index)
+
+    def lookup(self, ip: str) -> Optional[GeoInfo]:
+        """
+        Ищет адрес в базе.
+
+        Returns:
+            Optional[GeoInfo]: Страна и ASN или None, если адреса нет в базе
+        """
+        return self._find(ip_to_int(ip))
+
+    def lookup_many(self, ips: Sequence[str]) -> List[Optional[GeoInfo]]:
+        """
+        Ищет пакет адресов; с NumPy поиск выполняется одним searchsorted.
+
+        Returns:
+            List[Optional[GeoInfo]]: Результаты в порядке адресов
+        """
+        try:
+            import numpy as np
+        except ImportError:
+            return [self._find(ip_to_int(ip)) for ip in ips]
+
+        if not ips or not self.count:
+            return [None] * len(ips)
+        packed = _pack_ips(ips)
+        if packed is not None:
+            values = np.frombuffer(packed, dtype='>u4').astype(np.int64)
+        else:
+            values = np.fromiter(
+                (-1 if n is None else n for n in map(ip_to_int, ips)), dtype=np.int64, count=len(ips)
+            )
+        starts = np.frombuffer(self._starts, dtype='<u4')
+        ends = np.frombuffer(self._ends, dtype='<u4')
+        indexes = np.searchsorted(starts, values, side='right') - 1
+        hits = (values >= 0) & (indexes >= 0)
+        hits[hits] &= values[hits] <= ends[indexes[hits]]
+
+        # Страны и ASN найденных диапазонов тоже выбираются одной операцией
+        found = indexes[hits]
+        countries = np.frombuffer(self._countries, dtype='S2')[found].tolist()
+        asns = np.frombuffer(self._asns, dtype='<u4')[found].tolist()
+        result: List[Optional[GeoInfo]] = [None] * len(ips)
+        for position, country, asn in zip(np.flatnonzero(hits).tolist(), countries, asns):
+            result[position] = GeoInfo(country.decode('ascii') or None, asn or None)
+        return result
+
+    def enrich(self, proxies: Iterable) -> List:
+        """
+        Дополняет прокси страной и ASN из базы.
+
+        Уже известная страна не перезаписывается. Изменяемые объекты
+        обновляются на месте, неизменяемые dataclass заменяются копиями.
+
+        Args:
+            proxies: Прокси с атрибутами ip, country и asn
+
+        Returns:
+            List: Прокси в исходном порядке
+        """
+        proxies = list(proxies)
+        infos = self.lookup_many([getattr(proxy, 'ip', None) for proxy in proxies])
+        result = []
+        for proxy, info in zip(proxies, infos):
+            if info is not None:
+                fields = {'asn': info.asn}
+                if not getattr(proxy, 'country', None) and info.country:
+                    fields['country'] = info.country
+                if dataclasses.is_dataclass(proxy) and proxy.__dataclass_params__.frozen:
+                    proxy = dataclasses.replace(proxy, **fields)
+                else:
+                    for name, value in fields.items():
+                        setattr(proxy, name, value)
+            result.append(proxy)
+        return result
@@ -0,0 +1,298 @@
+"""
+Модуль дублированных (hedged) запросов через прокси.
+
+Запрос уходит через лучший рабочий прокси. Если ответа нет дольше
+перцентиля обычной задержки, тот же запрос отправляется через следующий
+прокси, и побеждает первый ответ; остальные попытки отменяются. Так один
+медленный бесплатный прокси не портит хвост задержек.
+
+Дублирование ограничено бюджетом: доля дополнительных попыток от числа
+запросов не превышает hedge_budget, поэтому при общей деградации клиент
+не удваивает нагрузку. С кешем (proxy_manager.cache) повторные запросы
+к тем же URL не расходуют прокси вовсе.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+from .cache import CachedResponse, ResponseCache, cache_key
+from .latency import LatencyWindow
+from .proxy import Proxy
+
+# Этот статус выдает сам прокси. 502/503/504 может вернуть и целевой сайт,
+# поэтому они отдаются вызывающему коду и прокси нерабочим не делают
+PROXY_ERROR_STATUSES = frozenset({407})
+
+# aiohttp умеет только HTTP-прокси
+_HTTP_PROTOCOLS = ('http', 'https')
+
+
+class HedgeError(Exception):
+    """Ни одна попытка не завершилась ответом."""
+
+
+class ProxyStatusError(HedgeError):
+    """Прокси сам ответил ошибкой (PROXY_ERROR_STATUSES)."""
+
+
+def _proxy_errors() -> tuple:
+    """Ошибки, которые говорят о неисправности прокси, а не запроса или сайта."""
+    import aiohttp
+
+    # ClientProxyConnectionError - подкласс ClientConnectorError
+    return (
+        aiohttp.ClientConnectorError, aiohttp.ServerDisconnectedError,
+        asyncio.TimeoutError, ProxyStatusError
+    )
+
+
+@dataclass
+class HedgedResponse:
+    """Ответ победившей попытки или из кеша (тогда proxy равен None)."""
+    status: int
+    headers: Dict[str, str]
+    body: bytes
+    proxy: Optional[Proxy]
+    elapsed: float
+    attempts: int = 1
+    errors: List[BaseException] = field(default_factory=list)
+    from_cache: bool = False
+
+    @classmethod
+    def cached(cls, entry: CachedResponse) -> "HedgedResponse":
+        return cls(entry.status, entry.headers, entry.body, None, 0.0, 0, from_cache=True)
+
+    def text(self, encoding: str = 'utf-8') -> str:
+        return self.body.decode(encoding, errors='replace')
+
+
+class HedgedClient:
+    """
+    Асинхронный HTTP-клиент с дублированием медленных запросов.
+
+    Пример:
+        async with HedgedClient(manager, country='US') as client:
+            response = await client.get('http://example.com/')
+    """
+
+    def __init__(
+        self,
+        manager,
+        max_hedges: int = 2,
+        hedge_percentile: float = 0.95,
+        hedge_budget: float = 0.1,
+        min_delay: float = 0.05,
+        default_delay: float = 1.0,
+        timeout: float = 10.0,
+        pool_size: int = 20,
+        cache: Optional[ResponseCache] = None,
+        **selection
+    ):
+        """
+        Args:
+            manager: Экземпляр ProxyManager
+            max_hedges: Сколько дополнительных попыток можно запустить на запрос
+            hedge_percentile: Перцентиль задержки, после которого запускается
+                следующая попытка
+            hedge_budget: Наибольшая доля дополнительных попыток от числа запросов
+            min_delay: Наименьшая задержка перед дополнительной попыткой
+            default_delay: Задержка, пока измерений задержки мало
+            timeout: Таймаут одной попытки в секундах
+            pool_size: Сколько лучших прокси держать под рукой
+            cache: Кеш ответов на GET и HEAD; одновременные одинаковые
+                запросы с кешем идут через прокси один раз
+            **selection: Фильтры выборки get_working_proxies (country,
+                anonymity, max_per_subnet, max_per_asn)
+        """
+        self.manager = manager
+        self.max_hedges = max_hedges
+        self.hedge_percentile = hedge_percentile
+        self.hedge_budget = hedge_budget
+        self.min_delay = min_delay
+        self.default_delay = default_delay
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.selection = selection
+        self.cache = cache
+        self.latencies = LatencyWindow()
+        self.logger = logging.getLogger(__name__)
+        self.requests = 0
+        self.hedges = 0
+        self._pool: List[Proxy] = []
+        self._latencies_seeded = False
+        self._session = None
+
+    async def __aenter__(self) -> "HedgedClient":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def _get_session(self):
+        if self._session is None:
+            import aiohttp
+
+            self._session = aiohttp.ClientSession()
+        return self._session
+
+    def hedge_delay(self) -> float:
+        """Сколько ждать ответа, прежде чем запустить следующую попытку."""
+        if not self._latencies_seeded:
+            self._latencies_seeded = True
+            self.latencies.extend(self.manager.sample_response_times())
+        delay = self.latencies.percentile(self.hedge_percentile)
+        if delay is None:
+            return self.default_delay
+        return max(self.min_delay, delay)
+
+    def _candidates(self, count: int) -> List[Proxy]:
+        """Лучшие прокси пула; пул пополняется из базы, когда их не хватает."""
+        if len(self._pool) < count:
+            fetched = self.manager.get_working_proxies(limit=self.pool_size, **self.selection)
+            self._pool = [proxy for proxy in fetched if proxy.protocol in _HTTP_PROTOCOLS]
+        return self._pool[:count]
+
+    def _may_hedge(self) -> bool:
+        return self.hedges < self.hedge_budget * self.requests
+
+    def _record(self, proxy: Proxy, elapsed: Optional[float]) -> None:
+        """
+        Учитывает исход попытки. Нерабочий прокси убирается из пула и
+        помечается в базе. Задержка удачной попытки включает время ответа
+        целевого сайта, поэтому она идет только в окно задержек клиента,
+        а время проверки прокси в базе не меняет.
+        """
+        if elapsed is None:
+            proxy.status = "failed"
+            if proxy in self._pool:
+                self._pool.remove(proxy)
+            self.manager.update_proxy_status(proxy)
+        else:
+            self.latencies.add(elapsed)
+
+    async def _attempt(self, proxy: Proxy, method: str, url: str, **kwargs) -> HedgedResponse:
+        import aiohttp
+
+        start = time.monotonic()
+        async with self._get_session().request(
+            method, url,
+            proxy=f"http://{proxy.ip}:{proxy.port}",
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            **kwargs
+        ) as response:
+            body = await response.read()
+            if response.status in PROXY_ERROR_STATUSES:
+                raise ProxyStatusError(f"Proxy {proxy.ip}:{proxy.port} answered {response.status}")
+            return HedgedResponse(
+                response.status, dict(response.headers), body, proxy, time.monotonic() - start
+            )
+
+    async def request(self, method: str, url: str, **kwargs) -> HedgedResponse:
+        """
+        Выполняет запрос с дублированием.
+
+        При наличии кеша свежий ответ на GET или HEAD без тела отдается
+        из него, не обращаясь к прокси.
+
+        Следующая попытка запускается, если ответа нет дольше hedge_delay()
+        и бюджет позволяет, или сразу, если предыдущая попытка завершилась
+        ошибкой. Ошибки прокси (сбой соединения с ним, обрыв, таймаут, 407)
+        сохраняются в базу; ответ сайта с любым другим статусом, в том числе
+        5xx, отдается как есть. Прочие ошибки попытки запускают следующую,
+        но прокси нерабочим не делают. Ошибка в самом запросе (неверный URL
+        или параметры) пробрасывается сразу. Отмененные попытки не учитываются.
+
+        Args:
+            method: HTTP-метод
+            url: Адрес запроса
+            **kwargs: Параметры aiohttp.ClientSession.request
+
+        Returns:
+            HedgedResponse: Первый полученный ответ
+
+        Raises:
+            HedgeError: Если рабочих прокси нет или все попытки завершились ошибкой
+            ValueError, TypeError: Если запрос задан неверно (например,
+                aiohttp.InvalidURL)
+        """
+        cacheable = (
+            self.cache is not None and method.upper() in ('GET', 'HEAD')
+            and 'data' not in kwargs and 'json' not in kwargs
+        )
+        if not cacheable:
+            return await self._hedged(method, url, **kwargs)
+
+        key = cache_key(method, url, kwargs.get('params'))
+        entry = self.cache.get(key)
+        if entry is not None:
+            return HedgedResponse.cached(entry)
+        return await self.cache.coalesce(key, lambda: self._hedged(method, url, **kwargs))
+
+    async def _hedged(self, method: str, url: str, **kwargs) -> HedgedResponse:
+        proxies = self._candidates(self.max_hedges + 1)
+        if not proxies:
+            raise HedgeError("No working proxies available")
+        self.requests += 1
+        proxy_errors = _proxy_errors()
+        delay = self.hedge_delay()
+        errors: List[BaseException] = []
+        attempts: Dict[asyncio.Future, Proxy] = {}
+        remaining = iter(proxies)
+
+        def launch() -> bool:
+            proxy = next(remaining, None)
+            if proxy is None:
+                return False
+            attempts[asyncio.ensure_future(self._attempt(proxy, method, url, **kwargs))] = proxy
+            return True
+
+        launch()
+        pending = set(attempts)
+        try:
+            while pending:
+                can_hedge = len(attempts) < len(proxies) and self._may_hedge()
+                done, pending = await asyncio.wait(
+                    pending, timeout=delay if can_hedge else None,
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    self.hedges += 1
+                    launch()
+                    pending = {task for task in attempts if not task.done()}
+                    continue
+
+                for task in done:
+                    proxy = attempts[task]
+                    error = task.exception()
+                    if error is None:
+                        response = task.result()
+                        response.attempts = len(attempts)
+                        response.errors = errors
+                        self._record(proxy, response.elapsed)
+                        return response
+                    if isinstance(error, (TypeError, ValueError)):
+                        # Ошибка в самом запросе: другой прокси ее не исправит
+                        raise error
+                    self.logger.debug(f"Attempt through {proxy.ip}:{proxy.port} failed: {error!r}")
+                    errors.append(error)
+                    if isinstance(error, proxy_errors):
+                        self._record(proxy, None)
+
+                # Упавшую попытку сразу заменяет следующая, бюджет на это не тратится
+                if launch():
+                    pending = {task for task in attempts if not task.done()}
+        finally:
+            for task in attempts:
+                task.cancel()
+
+        raise HedgeError(f"All {len(attempts)} attempts to {url} failed: {errors[-1]!r}")
+
+    async def get(self, url: str, **kwargs) -> HedgedResponse:
+        return await self.request('GET', url, **kwargs)
@@ -0,0 +1,55 @@
+"""
+Модуль учета распределения задержек прокси.
+
+Скользящее окно последних измерений дает перцентили, по которым чекер
+выбирает таймауты проверок, а клиент решает, когда дублировать запрос.
+"""
+
+import math
+from collections import deque
+from typing import Iterable, NamedTuple, Optional
+
+
+class LatencyWindow:
+    """Последние size измерений времени ответа в секундах."""
+
+    def __init__(self, size: int = 500):
+        self._values = deque(maxlen=size)
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def add(self, value: Optional[float]) -> None:
+        """Добавляет измерение; None и отрицательные значения пропускаются."""
+        if value is not None and value >= 0:
+            self._values.append(value)
+
+    def extend(self, values: Iterable[Optional[float]]) -> None:
+        for value in values:
+            self.add(value)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """
+        Перцентиль окна методом ближайшего ранга.
+
+        Args:
+            q: Доля от 0 до 1, например 0.9 для p90
+
+        Returns:
+            Optional[float]: Значение перцентиля или None, если окно пустое
+        """
+        if not self._values:
+            return None
+        ordered = sorted(self._values)
+        rank = min(len(ordered), max(1, math.ceil(q * len(ordered))))
+        return ordered[rank - 1]
+
+
+class CheckTimeouts(NamedTuple):
+    """Сроки проверки: на установку соединения и на ответ после него."""
+    connect: float
+    read: float
+
+    @property
+    def total(self) -> float:
+        return self.connect + self.read
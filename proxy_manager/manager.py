@@ -1,10 +1,15 @@
 import os
-import sqlite3
 import logging
+import time
 from datetime import datetime, timedelta
-from typing import List, Optional, ContextManager
-from contextlib import contextmanager
+from typing import AsyncIterator, Dict, Iterable, Iterator, List, Optional, Sequence, Union, ContextManager
 from .proxy import Proxy
+from .storage import BaseStorage, SQLiteStorage, TargetResult, create_storage
+from .retention import RetentionJob, RetentionProgress
+from .snapshot import SnapshotError, read_snapshot, write_snapshot
+from .subnets import diversify
+from .deadcache import DeadProxyCache
+from .targets import Target
 
 class ProxyManager:
     """
@@ -12,12 +17,52 @@ class ProxyManager:
     Скрывает детали хранения и обновления прокси.
     """
     
-    def __init__(self):
+    def __init__(
+        self,
+        db_path: str = "proxies.db",
+        storage: Union[str, BaseStorage, None] = None,
+        dead_cache: Union[bool, DeadProxyCache] = False
+    ):
+        """
+        Инициализирует менеджер прокси.
+        
+        Args:
+            db_path: Путь к базе данных SQLite (по умолчанию в текущей директории)
+            storage: Хранилище или имя движка ('sqlite', 'memory');
+                по умолчанию SQLite по пути db_path
+            dead_cache: Отрицательный кеш недавно нерабочих прокси; True -
+                кеш с параметрами по умолчанию в файле рядом с базой
+        """
         self.setup_logging()
         
-        # Путь к базе данных в текущей директории
-        self.db_path = "proxies.db"
-        self._setup_database()
+        if storage is None:
+            storage = SQLiteStorage(db_path)
+        elif isinstance(storage, str):
+            kwargs = {'db_path': db_path} if storage == SQLiteStorage.name else {}
+            storage = create_storage(storage, **kwargs)
+        # Схема создается хранилищем при первом обращении к данным
+        self.storage = storage
+        
+        # Снимок пула рабочих прокси лежит рядом с базой
+        base = os.path.splitext(self.db_path)[0] if self.db_path else "proxies"
+        self.snapshot_path = f"{base}.snap"
+        
+        if dead_cache is True:
+            dead_cache = DeadProxyCache(f"{base}.dead")
+        self.dead_cache: Optional[DeadProxyCache] = dead_cache or None
+        
+        # Целевые сайты по имени, см. register_target; сохраненные в
+        # хранилище подгружаются при первом обращении к незнакомой цели
+        self.targets: Dict[str, Target] = {}
+
+    @property
+    def db_path(self) -> Optional[str]:
+        """Путь к базе данных, если хранилище файловое."""
+        return getattr(self.storage, 'db_path', None)
+
+    @db_path.setter
+    def db_path(self, value: str):
+        self.storage.db_path = value
 
     def setup_logging(self):
         """Настройка логирования"""
@@ -31,49 +76,21 @@ class ProxyManager:
             self.logger.addHandler(handler)
             self.logger.setLevel(logging.INFO)
 
-    @contextmanager
-    def get_connection(self) -> ContextManager[sqlite3.Connection]:
+    def get_connection(self) -> ContextManager:
         """
         Контекстный менеджер для работы с базой данных.
+        Доступен только для хранилищ на основе SQLite.
         
         Yields:
             sqlite3.Connection: Соединение с базой данных
         """
-        conn = sqlite3.connect(self.db_path)
-        try:
-            yield conn
-            conn.commit()
-        finally:
-            conn.close()
+        if not hasattr(self.storage, 'get_connection'):
+            raise TypeError(f"Storage '{self.storage.name}' has no SQL connection")
+        return self.storage.get_connection()
 
     def _setup_database(self):
-        """Создает базу данных и необходимые таблицы."""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS proxies (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    ip TEXT NOT NULL,
-                    port TEXT NOT NULL,
-                    protocol TEXT NOT NULL,
-                    status TEXT,
-                    response_time REAL,
-                    last_check TEXT,
-                    collection_date TEXT,
-                    is_outdated INTEGER DEFAULT 0,
-                    UNIQUE(ip, port)
-                )
-            """)
-            
-            # Создаем индексы для ускорения запросов
-            cursor.execute("""
-                CREATE INDEX IF NOT EXISTS idx_proxies_status 
-                ON proxies(status)
-            """)
-            cursor.execute("""
-                CREATE INDEX IF NOT EXISTS idx_proxies_is_outdated 
-                ON proxies(is_outdated)
-            """)
+        """Создает базу данных и необходимые таблицы, не дожидаясь первого запроса."""
+        self.storage.setup()
 
     def get_proxy_by_id(self, proxy_id: int):
         """
@@ -85,28 +102,12 @@ class ProxyManager:
         Returns:
             Proxy: Объект прокси или None, если не найден
         """
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT ip, port, protocol, status, response_time 
-                FROM proxies 
-                WHERE id = ?
-            """, (proxy_id,))
-            
-            row = cursor.fetchone()
-            if row:
-                proxy = Proxy(ip=row[0], port=row[1], protocol=row[2])
-                proxy.status = row[3]
-                proxy.response_time = row[4]
-                return proxy
-            return None
+        return self.storage.get_proxy_by_id(proxy_id)
 
     def mark_all_outdated(self):
         """Помечает все прокси как устаревшие."""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("UPDATE proxies SET is_outdated = 1")
-            self.logger.info("All proxies marked as outdated")
+        self.storage.mark_all_outdated()
+        self.logger.info("All proxies marked as outdated")
 
     def needs_update(self, max_age_hours: int = 24) -> bool:
         """
@@ -118,130 +119,171 @@ class ProxyManager:
         Returns:
             bool: True если данные устарели или отсутствуют
         """
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            min_date = (datetime.now() - timedelta(hours=max_age_hours)).isoformat()
-            
-            # Проверяем наличие свежих рабочих прокси
-            cursor.execute("""
-                SELECT COUNT(*) 
-                FROM proxies 
-                WHERE status = 'working'
-                AND is_outdated = 0
-                AND collection_date > ?
-            """, (min_date,))
-            
-            count = cursor.fetchone()[0]
-            return count < 10  # Обновляем если меньше 10 свежих рабочих прокси
+        min_date = datetime.now() - timedelta(hours=max_age_hours)
+        
+        # Проверяем наличие свежих рабочих прокси
+        count = self.storage.count_working(min_date)
+        return count < 10  # Обновляем если меньше 10 свежих рабочих прокси
 
-    def get_working_proxy(self, max_age_hours: int = 24) -> Optional[dict]:
+    def get_working_proxy(
+        self,
+        max_age_hours: int = 24,
+        country: Optional[str] = None,
+        anonymity: Optional[str] = None,
+        protocol: Optional[str] = None,
+        target: Optional[str] = None
+    ) -> Optional[dict]:
         """
         Получить один рабочий прокси не старше указанного возраста.
         
         Args:
             max_age_hours: Максимальный возраст прокси в часах
+            country: Код страны, например 'US'
+            anonymity: Уровень анонимности (elite/anonymous/transparent)
+            protocol: Протокол прокси
+            target: Имя цели; только прокси со свежей успешной проверкой на ней
             
         Returns:
             dict: Информация о прокси или None если нет рабочих прокси
         """
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            min_date = (datetime.now() - timedelta(hours=max_age_hours)).isoformat()
-            
-            cursor.execute("""
-                SELECT ip, port, protocol, country, response_time, last_check
-                FROM proxies
-                WHERE status = 'working'
-                AND is_outdated = 0
-                AND last_check > ?
-                ORDER BY response_time ASC
-                LIMIT 1
-            """, (min_date,))
-            
-            row = cursor.fetchone()
-            if row:
-                return {
-                    'ip': row[0],
-                    'port': row[1],
-                    'protocol': row[2],
-                    'country': row[3],
-                    'response_time': row[4],
-                    'last_check': row[5],
-                    'url': f"{row[2]}://{row[0]}:{row[1]}"
-                }
-            return None
+        min_date = datetime.now() - timedelta(hours=max_age_hours)
+        proxies = self.storage.get_working(
+            1, min_last_check=min_date, country=country, anonymity=anonymity, protocol=protocol,
+            **self._target_query(target)
+        )
+        if proxies:
+            proxy = proxies[0]
+            return {
+                'ip': proxy.ip,
+                'port': proxy.port,
+                'protocol': proxy.protocol,
+                'country': proxy.country,
+                'anonymity': proxy.anonymity,
+                'response_time': proxy.response_time,
+                'last_check': proxy.last_check,
+                'url': proxy.url
+            }
+        return None
 
-    def get_working_proxies(self, limit: int = 10, max_age_hours: int = 24) -> List[Proxy]:
+    def get_working_proxies(
+        self,
+        limit: int = 10,
+        max_age_hours: int = 24,
+        country: Optional[str] = None,
+        anonymity: Optional[str] = None,
+        protocol: Optional[str] = None,
+        max_per_subnet: Optional[int] = None,
+        max_per_asn: Optional[int] = None,
+        max_per_exit_ip: Optional[int] = None,
+        target: Optional[str] = None,
+        by_bandwidth: bool = False,
+        min_bandwidth: Optional[float] = None,
+        by_connect_time: bool = False
+    ) -> List[Proxy]:
         """
         Получить список рабочих прокси не старше указанного возраста.
         
         Args:
             limit: Максимальное количество прокси
             max_age_hours: Максимальный возраст прокси в часах
+            country: Код страны, например 'US'
+            anonymity: Уровень анонимности (elite/anonymous/transparent)
+            protocol: Протокол прокси
+            max_per_subnet: Максимум прокси из одной /24 в результате
+            max_per_asn: Максимум прокси из одной автономной системы
+            max_per_exit_ip: Максимум прокси с одним внешним адресом, например
+                1 - самый быстрый прокси каждого выхода; None - без ограничения
+            target: Имя цели; только прокси со свежей успешной проверкой на ней
+            by_bandwidth: Только прокси с замеренной скоростью, от большей
+                пропускной способности к меньшей
+            min_bandwidth: Только прокси со скоростью не ниже этой (байт в секунду)
+            by_connect_time: От меньшего времени соединения с прокси к большему,
+                без задержек проверочного сайта; только прокси с замеренными фазами
             
         Returns:
             List[Proxy]: Список прокси
         """
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            min_date = (datetime.now() - timedelta(hours=max_age_hours)).isoformat()
-            
-            cursor.execute("""
-                SELECT ip, port, protocol, status, response_time
-                FROM proxies
-                WHERE status = 'working'
-                AND is_outdated = 0
-                ORDER BY response_time ASC
-                LIMIT ?
-            """, (limit,))
-            
-            proxies = []
-            for row in cursor.fetchall():
-                proxy = Proxy(ip=row[0], port=row[1], protocol=row[2])
-                proxy.status = row[3]
-                proxy.response_time = row[4]
-                proxies.append(proxy)
-            return proxies
+        return self._select_working(
+            limit, max_per_subnet, max_per_asn, max_per_exit_ip,
+            country=country, anonymity=anonymity, protocol=protocol,
+            by_bandwidth=by_bandwidth, min_bandwidth=min_bandwidth, by_connect_time=by_connect_time,
+            **self._target_query(target)
+        )
 
-    def get_random_working_proxy(self, max_age_hours: int = 24) -> Optional[dict]:
+    def _select_working(
+        self,
+        limit: int,
+        max_per_subnet: Optional[int] = None,
+        max_per_asn: Optional[int] = None,
+        max_per_exit_ip: Optional[int] = None,
+        **query
+    ) -> List[Proxy]:
+        """
+        Выборка рабочих прокси с ограничением числа прокси на подсеть, ASN
+        и внешний адрес.
+        
+        Без ограничений это обычный запрос к хранилищу. С ограничениями
+        выбирается запас кандидатов; если после отбора прокси не хватает,
+        а хранилище вернуло полную страницу, запас увеличивается.
+        """
+        if max_per_subnet is None and max_per_asn is None and max_per_exit_ip is None:
+            return self.storage.get_working(limit, **query)
+        
+        fetch = limit * 4
+        while True:
+            candidates = self.storage.get_working(fetch, **query)
+            proxies = diversify(
+                candidates, limit, max_per_subnet, max_per_asn, max_per_exit_ip=max_per_exit_ip
+            )
+            if len(proxies) >= limit or len(candidates) < fetch:
+                return proxies
+            fetch *= 4
+
+    def get_random_working_proxy(
+        self,
+        max_age_hours: int = 24,
+        country: Optional[str] = None,
+        anonymity: Optional[str] = None,
+        protocol: Optional[str] = None
+    ) -> Optional[dict]:
         """
         Получает случайный рабочий прокси из базы.
         
         Args:
             max_age_hours: Максимальный возраст прокси в часах
+            country: Код страны, например 'US'
+            anonymity: Уровень анонимности (elite/anonymous/transparent)
+            protocol: Протокол прокси
             
         Returns:
             Optional[dict]: Словарь с данными прокси или None если нет рабочих прокси
         """
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            min_date = (datetime.now() - timedelta(hours=max_age_hours)).isoformat()
-            
-            cursor.execute("""
-                SELECT ip, port, protocol, response_time, collection_date
-                FROM proxies 
-                WHERE status = 'working'
-                AND is_outdated = 0
-                AND collection_date > ?
-                ORDER BY RANDOM()
-                LIMIT 1
-            """, (min_date,))
-            
-            row = cursor.fetchone()
-            if not row:
-                return None
-                
-            ip, port, protocol, response_time, collection_date = row
-            proxy_url = f"{protocol}://{ip}:{port}"
-                
-            return {
-                "url": proxy_url,
-                "ip": ip,
-                "port": port,
-                "protocol": protocol,
-                "response_time": response_time,
-                "collection_date": collection_date
-            }
+        min_date = datetime.now() - timedelta(hours=max_age_hours)
+        proxies = self.storage.get_working(
+            1, min_collection_date=min_date, random_order=True,
+            country=country, anonymity=anonymity, protocol=protocol
+        )
+        if not proxies:
+            return None
+        return self._proxy_to_dict(proxies[0])
+
+    @staticmethod
+    def _proxy_to_dict(proxy: Proxy) -> dict:
+        """Преобразует прокси в словарь, который возвращают методы выборки."""
+        return {
+            "url": proxy.url,
+            "ip": proxy.ip,
+            "port": proxy.port,
+            "protocol": proxy.protocol,
+            "country": proxy.country,
+            "anonymity": proxy.anonymity,
+            "response_time": proxy.response_time,
+            "collection_date": proxy.collection_date,
+            "exit_ip": proxy.exit_ip,
+            "bandwidth": proxy.bandwidth,
+            "ttfb": proxy.ttfb,
+            "phases": proxy.phases._asdict() if proxy.phases is not None else None
+        }
 
     def mark_proxy_as_failed(self, proxy_id: int):
         """
@@ -250,150 +292,334 @@ class ProxyManager:
         Args:
             proxy_id: ID прокси для маркировки
         """
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                UPDATE proxies 
-                SET status = 'failed', 
-                    last_check = ?
-                WHERE id = ?
-            """, (datetime.now().isoformat(), proxy_id))
+        self.storage.mark_failed(proxy_id)
 
-    def get_multiple_working_proxies(self, limit: int = 100, max_age_hours: int = 24) -> List[dict]:
+    def get_multiple_working_proxies(
+        self,
+        limit: int = 100,
+        max_age_hours: int = 24,
+        country: Optional[str] = None,
+        anonymity: Optional[str] = None,
+        protocol: Optional[str] = None,
+        max_per_subnet: Optional[int] = None,
+        max_per_asn: Optional[int] = None,
+        max_per_exit_ip: Optional[int] = None,
+        target: Optional[str] = None,
+        by_bandwidth: bool = False,
+        min_bandwidth: Optional[float] = None,
+        by_connect_time: bool = False
+    ) -> List[dict]:
         """
         Получает несколько рабочих прокси из базы.
         
+        Прокси из одной подсети или у одного хостера обычно отказывают
+        вместе; max_per_subnet и max_per_asn распределяют пакет между ними.
+        Прокси с общим внешним адресом не дают разнообразия при ротации;
+        с max_per_exit_ip=1 от каждого адреса берется один, самый быстрый.
+        По умолчанию ограничения нет.
+        
         Args:
             limit: Максимальное количество прокси для получения
             max_age_hours: Максимальный возраст прокси в часах
+            country: Код страны, например 'US'
+            anonymity: Уровень анонимности (elite/anonymous/transparent)
+            protocol: Протокол прокси
+            max_per_subnet: Максимум прокси из одной /24 в результате
+            max_per_asn: Максимум прокси из одной автономной системы
+            max_per_exit_ip: Максимум прокси с одним внешним адресом, например
+                1 - самый быстрый прокси каждого выхода; None - без ограничения
+            target: Имя цели; только прокси со свежей успешной проверкой на ней
+            by_bandwidth: Только прокси с замеренной скоростью, от большей
+                пропускной способности к меньшей
+            min_bandwidth: Только прокси со скоростью не ниже этой (байт в секунду)
+            by_connect_time: От меньшего времени соединения с прокси к большему,
+                без задержек проверочного сайта; только прокси с замеренными фазами
             
         Returns:
             List[dict]: Список словарей с данными прокси
         """
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            min_date = (datetime.now() - timedelta(hours=max_age_hours)).isoformat()
+        min_date = datetime.now() - timedelta(hours=max_age_hours)
+        proxies = self._select_working(
+            limit, max_per_subnet, max_per_asn, max_per_exit_ip, min_collection_date=min_date,
+            country=country, anonymity=anonymity, protocol=protocol,
+            by_bandwidth=by_bandwidth, min_bandwidth=min_bandwidth, by_connect_time=by_connect_time,
+            **self._target_query(target)
+        )
+        return [self._proxy_to_dict(proxy) for proxy in proxies]
+
+    def register_target(
+        self,
+        target: Union[str, Target],
+        url: Optional[str] = None,
+        **criteria
+    ) -> Target:
+        """
+        Регистрирует целевой сайт и сохраняет его описание в хранилище.
+        
+        Args:
+            target: Готовая цель или ее имя (обычно домен)
+            url: Легкая страница сайта для пробного запроса, если передано имя
+            **criteria: Остальные поля Target (statuses, must_contain,
+                must_not_contain, ttl, timeout)
             
-            cursor.execute("""
-                SELECT ip, port, protocol, response_time, collection_date
-                FROM proxies 
-                WHERE status = 'working'
-                AND is_outdated = 0
-                AND collection_date > ?
-                ORDER BY response_time ASC
-                LIMIT ?
-            """, (min_date, limit))
+        Returns:
+            Target: Зарегистрированная цель
+        """
+        if not isinstance(target, Target):
+            if url is None:
+                raise ValueError(f"Target '{target}' needs a probe URL")
+            target = Target(target, url, **criteria)
+        self.storage.save_target(target)
+        self.targets[target.name] = target
+        return target
+
+    def get_target(self, name: str) -> Target:
+        """
+        Возвращает зарегистрированную цель, в том числе сохраненную в
+        хранилище до перезапуска.
+        
+        Raises:
+            ValueError: Если цель не зарегистрирована
+        """
+        if name not in self.targets:
+            self.targets.update((target.name, target) for target in self.storage.get_targets())
+        try:
+            return self.targets[name]
+        except KeyError:
+            raise ValueError(f"Unknown target: {name}") from None
+
+    def _target_query(self, target: Optional[str]) -> dict:
+        """Параметры выборки хранилища для прокси, проверенных на цели не позже ее ttl."""
+        if target is None:
+            return {}
+        ttl = self.get_target(target).ttl
+        return {'target': target, 'min_target_check': datetime.now() - timedelta(seconds=ttl)}
+
+    def get_target_candidates(
+        self,
+        target: str,
+        limit: int = 100,
+        protocols: Optional[Sequence[str]] = None
+    ) -> List[Proxy]:
+        """
+        Рабочие прокси, у которых нет действительного результата на цели.
+        
+        Args:
+            target: Имя цели
+            limit: Максимальное количество прокси
+            protocols: Только прокси этих протоколов; None - любых
             
-            proxies = []
-            for row in cursor.fetchall():
-                ip, port, protocol, response_time, collection_date = row
-                proxy_url = f"{protocol}://{ip}:{port}"
-                
-                proxies.append({
-                    "url": proxy_url,
-                    "ip": ip,
-                    "port": port,
-                    "protocol": protocol,
-                    "response_time": response_time,
-                    "collection_date": collection_date
-                })
+        Returns:
+            List[Proxy]: Прокси от быстрого к медленному
+        """
+        min_checked = datetime.now() - timedelta(seconds=self.get_target(target).ttl)
+        return self.storage.get_target_candidates(target, limit, min_checked, protocols)
+
+    def record_target_results(self, target: str, results: Iterable[TargetResult]) -> None:
+        """Сохраняет результаты проверки прокси на цели."""
+        self.storage.record_target_results(target, results)
+
+    def get_proxies_by_exit_ip(self, exit_ip: str) -> List[Proxy]:
+        """
+        Прокси, которые выходят в сеть с этого адреса.
+        
+        Args:
+            exit_ip: Внешний адрес по ответу проверочного запроса
             
-            return proxies
+        Returns:
+            List[Proxy]: Актуальные прокси, от быстрого к медленному
+        """
+        return self.storage.get_by_exit_ip(exit_ip)
 
-    def cleanup_old_data(self, max_age_days: int = 7):
+    def sample_response_times(self, limit: int = 500) -> List[float]:
+        """
+        Время ответа случайной выборки рабочих прокси.
+        
+        Выборка случайная, а не по возрастанию времени, поэтому по ней
+        можно оценивать перцентили всего пула.
+        
+        Args:
+            limit: Размер выборки
+            
+        Returns:
+            List[float]: Время ответа в секундах
+        """
+        proxies = self.storage.get_working(limit, random_order=True)
+        return [proxy.response_time for proxy in proxies if proxy.response_time is not None]
+
+    def get_unchecked_proxies(self, limit: int = 100, by_source_yield: bool = False) -> List[Proxy]:
+        """
+        Получает список непроверенных прокси.
+        
+        Args:
+            limit: Максимальное количество прокси
+            by_source_yield: Начинать с прокси из источников, у которых
+                больше доля рабочих (см. get_source_stats)
+            
+        Returns:
+            List[Proxy]: Список непроверенных прокси
+        """
+        if by_source_yield:
+            return self.storage.get_unchecked_by_yield(limit)
+        return self.storage.get_unchecked(limit)
+
+    def iter_working_proxies(self, chunk_size: int = 1000, records: bool = False) -> Iterator:
+        """
+        Обходит все актуальные рабочие прокси порциями, не загружая их в память разом.
+
+        Прокси идут в порядке добавления; каждая порция читается отдельным
+        запросом по ключу ID, поэтому запись в базу во время обхода не
+        блокируется и не сбивает его (см. BaseStorage.iter_working).
+
+        Args:
+            chunk_size: Размер порции
+            records: Выдавать компактные ProxyRecord (даты в секундах
+                Unix-времени) вместо Proxy, например для выгрузки
+
+        Returns:
+            Iterator: Proxy или ProxyRecord
+        """
+        return self.storage.iter_working(chunk_size, records)
+
+    def iter_unchecked(self, chunk_size: int = 1000, records: bool = False) -> Iterator:
+        """
+        Обходит все непроверенные прокси порциями в порядке добавления.
+
+        Args:
+            chunk_size: Размер порции
+            records: Выдавать кортежи (ip, port, protocol) вместо Proxy
+
+        Returns:
+            Iterator: Proxy или кортежи (ip, port, protocol)
+        """
+        return self.storage.iter_unchecked(chunk_size, records)
+
+    def aiter_working_proxies(self, chunk_size: int = 1000, records: bool = False) -> AsyncIterator:
+        """
+        Асинхронный вариант iter_working_proxies: порции читаются в пуле
+        потоков и не блокируют цикл событий.
+
+        Пример:
+            async for proxy in manager.aiter_working_proxies(chunk_size=500):
+                ...
+        """
+        return self.storage.aiter_working(chunk_size, records)
+
+    def aiter_unchecked(self, chunk_size: int = 1000, records: bool = False) -> AsyncIterator:
+        """Асинхронный вариант iter_unchecked."""
+        return self.storage.aiter_unchecked(chunk_size, records)
+
+    def get_source_stats(self) -> List[dict]:
+        """
+        Статистика источников прокси, от лучшего к худшему.
+        
+        Доля рабочих и время ответа считаются по первой проверке прокси
+        источника. Источники упорядочены по оценке доли рабочих, которая
+        для непроверенного источника равна 1/2.
+        
+        Returns:
+            List[dict]: Ключи name, collected, checked, working,
+                working_ratio, avg_response_time
+        """
+        result = []
+        for source in sorted(self.storage.get_source_stats(), key=lambda s: s.score, reverse=True):
+            ratio = source.working / source.checked if source.checked else None
+            avg = source.avg_response_time
+            result.append({
+                'name': source.name,
+                'collected': source.collected,
+                'checked': source.checked,
+                'working': source.working,
+                'working_ratio': round(ratio, 3) if ratio is not None else None,
+                'avg_response_time': round(avg, 3) if avg is not None else None
+            })
+        return result
+
+    def cleanup_old_data(self, max_age_days: int = 7, **job_options) -> RetentionProgress:
         """
         Очистить старые данные из базы.
         
+        Записи удаляются короткими пачками по диапазонам ID, поэтому очистка
+        не держит блокировку записи надолго.
+        
         Args:
             max_age_days: Максимальный возраст данных в днях
-        """
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            min_date = (datetime.now() - timedelta(days=max_age_days)).isoformat()
+            **job_options: Параметры RetentionJob (batch_size, pause,
+                time_budget, vacuum_pages, on_progress)
             
-            # Удаляем старые прокси
-            cursor.execute("""
-                DELETE FROM proxies 
-                WHERE collection_date < ? 
-                OR (status = 'failed' AND last_check < ?)
-            """, (min_date, min_date))
+        Returns:
+            RetentionProgress: Итог прохода очистки
+        """
+        return RetentionJob(self.storage, max_age_days, **job_options).run()
+
+    def start_cleanup(self, max_age_days: int = 7, **job_options) -> RetentionJob:
+        """
+        Запустить очистку старых данных в фоновом потоке.
+        
+        Args:
+            max_age_days: Максимальный возраст данных в днях
+            **job_options: Параметры RetentionJob
             
-            deleted = cursor.rowcount
-            self.logger.info(f"Cleaned up {deleted} old proxy records")
+        Returns:
+            RetentionJob: Задача очистки; progress показывает ход, stop() прерывает
+        """
+        job = RetentionJob(self.storage, max_age_days, **job_options)
+        job.start()
+        return job
 
     def get_statistics(self) -> dict:
         """
         Получить статистику по прокси.
         
+        Статистика берется из счетчиков, которые хранилище обновляет при
+        записи, поэтому вызов не зависит от размера базы.
+        
         Returns:
             dict: Статистика по прокси
         """
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT 
-                    COUNT(*) as total,
-                    SUM(CASE WHEN status = 'working' THEN 1 ELSE 0 END) as working,
-                    SUM(CASE WHEN status = 'failed' THEN 1 ELSE 0 END) as failed,
-                    SUM(CASE WHEN status IS NULL THEN 1 ELSE 0 END) as unchecked,
-                    SUM(CASE WHEN is_outdated = 1 THEN 1 ELSE 0 END) as outdated,
-                    AVG(CASE WHEN status = 'working' THEN response_time ELSE NULL END) as avg_response,
-                    MIN(collection_date) as oldest_proxy,
-                    MAX(last_check) as latest_check
-                FROM proxies
-            """)
-            row = cursor.fetchone()
-            
-            stats = {
-                'total': row[0] or 0,
-                'working': row[1] or 0,
-                'failed': row[2] or 0,
-                'unchecked': row[3] or 0,
-                'outdated': row[4] or 0,
-                'avg_response_time': round(row[5], 3) if row[5] else None,
-                'oldest_proxy': row[6],
-                'latest_check': row[7]
-            }
-            
-            self.logger.info(
-                f"Statistics:\n"
-                f"Total proxies: {stats['total']}\n"
-                f"Working: {stats['working']}\n"
-                f"Failed: {stats['failed']}\n"
-                f"Unchecked: {stats['unchecked']}\n"
-                f"Outdated: {stats['outdated']}\n"
-                f"Avg response time: {stats['avg_response_time']}s\n"
-                f"Oldest proxy: {stats['oldest_proxy']}\n"
-                f"Latest check: {stats['latest_check']}"
-            )
-            
-            return stats
+        stats = self.storage.get_statistics()
+        self.logger.debug(f"Statistics: {stats}")
+        return stats
+
+    def verify_statistics(self) -> bool:
+        """
+        Сверяет счетчики статистики с полным пересчетом по базе.
+        
+        Returns:
+            bool: True если счетчики совпадают с пересчетом
+        """
+        stats = self.storage.get_statistics()
+        expected = self.storage.recompute_statistics()
+        if stats != expected:
+            self.logger.warning(f"Statistics counters out of sync: {stats} != {expected}")
+            return False
+        return True
 
-    def add_proxy(self, proxy):
+    def add_proxy(self, proxy, source: Optional[str] = None):
         """
         Добавляет новый прокси в базу данных.
         
         Args:
             proxy: Объект Proxy для добавления
+            source: Имя источника, из которого получен прокси
             
         Returns:
             int: ID добавленного прокси
         """
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                INSERT OR IGNORE INTO proxies (ip, port, protocol, collection_date)
-                VALUES (?, ?, ?, ?)
-            """, (proxy.ip, proxy.port, proxy.protocol, datetime.now().isoformat()))
-            
-            # Если прокси уже существует, получаем его ID
-            if cursor.rowcount == 0:
-                cursor.execute("""
-                    SELECT id FROM proxies WHERE ip = ? AND port = ?
-                """, (proxy.ip, proxy.port))
-                return cursor.fetchone()[0]
+        return self.storage.add_proxy(proxy, source)
+
+    def add_proxies(self, proxies, source: Optional[str] = None) -> int:
+        """
+        Добавляет пачку прокси в базу данных одной операцией.
+        
+        Args:
+            proxies: Итерируемый набор объектов Proxy
+            source: Имя источника; связь запоминается и для уже известных прокси
             
-            return cursor.lastrowid
+        Returns:
+            int: Количество новых прокси
+        """
+        return self.storage.add_proxies(proxies, source)
 
     def update_proxy_status(self, proxy):
         """
@@ -402,16 +628,109 @@ class ProxyManager:
         Args:
             proxy: Объект Proxy для обновления
         """
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                UPDATE proxies 
-                SET status = ?, response_time = ?, last_check = ?
-                WHERE ip = ? AND port = ?
-            """, (
-                proxy.status,
-                proxy.response_time,
-                datetime.now().isoformat(),
-                proxy.ip,
-                proxy.port
-            ))
+        self.storage.update_proxy_status(proxy)
+        self._remember_failures([proxy])
+
+    def update_proxy_statuses(self, proxies):
+        """
+        Обновляет статусы нескольких прокси одной операцией.
+        
+        Args:
+            proxies: Итерируемый набор объектов Proxy
+        """
+        proxies = list(proxies)
+        self.storage.update_proxy_statuses(proxies)
+        self._remember_failures(proxies)
+
+    def update_bandwidth(self, proxies):
+        """
+        Сохраняет результаты замера скорости (bandwidth, ttfb) прокси.
+        
+        Args:
+            proxies: Итерируемый набор объектов Proxy
+        """
+        self.storage.update_bandwidth(proxies)
+
+    def _remember_failures(self, proxies) -> None:
+        if self.dead_cache is not None:
+            for proxy in proxies:
+                if proxy.status == "failed":
+                    self.dead_cache.record_failure(proxy.ip, proxy.port)
+
+    def is_known_dead(self, ip: str, port: Union[int, str]) -> bool:
+        """
+        Отказывал ли прокси в нескольких недавних проверках.
+        
+        Без отрицательного кеша всегда False.
+        """
+        return self.dead_cache is not None and self.dead_cache.is_dead(ip, port)
+
+    def save_dead_cache(self) -> None:
+        """Сохраняет отрицательный кеш, если в нем есть новые отказы."""
+        if self.dead_cache is not None and self.dead_cache.dirty:
+            self.dead_cache.save()
+
+    def dump_snapshot(self, path: Optional[str] = None) -> int:
+        """
+        Сохраняет пул рабочих прокси в бинарный снимок.
+        
+        Args:
+            path: Путь к файлу снимка (по умолчанию snapshot_path)
+            
+        Returns:
+            int: Количество сохраненных прокси
+        """
+        path = path or self.snapshot_path
+        count = write_snapshot(path, self.storage.working_records())
+        self.logger.debug(f"Saved {count} working proxies to snapshot {path}")
+        return count
+
+    def load_snapshot(self, path: Optional[str] = None, max_age_hours: Optional[int] = None) -> int:
+        """
+        Загружает пул рабочих прокси из снимка для быстрого старта.
+        
+        Загруженные прокси сохраняют время последней проверки, поэтому
+        методы выборки по возрасту продолжают работать как обычно.
+        
+        Args:
+            path: Путь к файлу снимка (по умолчанию snapshot_path)
+            max_age_hours: Пропускать прокси, проверенные раньше этого срока
+            
+        Returns:
+            int: Количество загруженных прокси (0 если снимка нет или он поврежден)
+        """
+        path = path or self.snapshot_path
+        if not os.path.exists(path):
+            return 0
+        try:
+            _, records = read_snapshot(path)
+        except SnapshotError as e:
+            self.logger.warning(f"Ignoring snapshot {path}: {str(e)}")
+            return 0
+        
+        if max_age_hours is not None:
+            min_check = time.time() - max_age_hours * 3600
+            records = [r for r in records if r.last_check and r.last_check > min_check]
+        
+        count = self.storage.restore_working(records)
+        self.logger.info(f"Loaded {count} working proxies from snapshot {path}")
+        return count
+
+    async def snapshot_periodically(self, interval: float = 300, path: Optional[str] = None):
+        """
+        Периодически сохраняет снимок пула, не блокируя цикл событий.
+        Работает до отмены задачи.
+        
+        Args:
+            interval: Интервал между снимками в секундах
+            path: Путь к файлу снимка (по умолчанию snapshot_path)
+        """
+        import asyncio  # отложенный импорт ускоряет старт коротких задач
+        
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                await loop.run_in_executor(None, self.dump_snapshot, path)
+            except OSError as e:
+                self.logger.warning(f"Failed to save snapshot: {str(e)}")
+            await asyncio.sleep(interval)
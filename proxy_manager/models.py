@@ -1,6 +1,6 @@
 from dataclasses import dataclass
 from typing import Optional
-import ipaddress
+from .bogons import is_public
 
 @dataclass(frozen=True)
 class Proxy:
@@ -11,6 +11,7 @@ class Proxy:
     country: str = ''
     anonymity: str = ''
     response_time: float = 0.0
+    asn: Optional[int] = None
 
     def __str__(self) -> str:
         return f"{self.ip}:{self.port}"
@@ -23,20 +24,9 @@ class Proxy:
     @property
     def is_valid_protocol(self) -> bool:
         """Проверяет, является ли протокол поддерживаемым."""
-        return self.protocol.lower() in ('http', 'https')
+        return self.protocol.lower() in ('http', 'https', 'socks4', 'socks5')
 
     @property
     def is_valid_public_ip(self) -> bool:
-        """Проверяет, является ли IP адрес публичным."""
-        try:
-            ip = ipaddress.ip_address(self.ip)
-            return (
-                not ip.is_private and
-                not ip.is_loopback and
-                not ip.is_link_local and
-                not ip.is_multicast and
-                not ip.is_reserved and
-                not ip.is_unspecified
-            )
-        except ValueError:
-            return False
+        """Проверяет, является ли IP адрес публичным (см. bogons)."""
+        return is_public(self.ip)
@@ -0,0 +1,277 @@
+"""
+Модуль потоковой обработки: сбор и проверка прокси одновременно.
+
+Обычный порядок поэтапный: collect_all загружает все источники и пишет
+их в базу, затем проверщик читает непроверенные записи обратно. Здесь
+этапы работают одновременно и связаны ограниченными очередями:
+
+    источники -> отсев (дубликаты, мертвые) -> проверка -> рабочие прокси
+                                                        -> запись в базу пачками
+
+Первые рабочие прокси появляются, пока медленные источники еще грузятся,
+а кандидаты попадают на проверку, минуя базу. Если следующий этап не
+успевает, очередь заполняется и предыдущий ждет, поэтому в очередях не
+больше queue_size прокси каждая. Дубликаты отсеиваются фильтром Блума
+фиксированного размера.
+"""
+
+import asyncio
+import logging
+import time
+from collections import defaultdict
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from .checker import CheckReport, ProxyChecker
+from .collector import ProxyCollector
+from .deadcache import BloomFilter, proxy_key
+from .proxy import Proxy
+from .storage.base import parse_port
+
+# Прокси и имя источника, из которого он получен
+_Item = Tuple[Proxy, str]
+
+
+class ProxyPipeline:
+    """
+    Потоковый сбор и проверка прокси.
+
+    Пример:
+        async for proxy in ProxyPipeline(manager).stream():
+            use(proxy)  # рабочий прокси; в базу он попадет с ближайшей пачкой
+    """
+
+    def __init__(
+        self,
+        manager,
+        collector: Optional[ProxyCollector] = None,
+        checker: Optional[ProxyChecker] = None,
+        concurrency: int = 50,
+        queue_size: int = 1000,
+        write_batch: int = 500,
+        flush_interval: float = 1.0,
+        dedup_capacity: int = 1_000_000,
+        dedup_error_rate: float = 0.001
+    ):
+        """
+        Args:
+            manager: Экземпляр ProxyManager
+            collector: Сборщик с источниками; по умолчанию ProxyCollector(manager)
+            checker: Проверщик; по умолчанию ProxyChecker(manager)
+            concurrency: Число одновременных проверок
+            queue_size: Емкость каждой очереди между этапами
+            write_batch: Сколько результатов записывается в базу одной операцией
+            flush_interval: Наибольшая задержка записи результатов в секундах
+            dedup_capacity: На сколько уникальных прокси рассчитан фильтр дубликатов
+            dedup_error_rate: Доля уникальных прокси, ошибочно принятых за дубликат
+        """
+        self.manager = manager
+        self.collector = collector or ProxyCollector(manager)
+        self.checker = checker or ProxyChecker(manager)
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+        self.write_batch = write_batch
+        self.flush_interval = flush_interval
+        self.dedup_capacity = dedup_capacity
+        self.dedup_error_rate = dedup_error_rate
+        self.report = CheckReport()
+        self.duplicates = 0
+        self.skipped_dead = 0
+        self.logger = logging.getLogger(__name__)
+        self._pending: List[_Item] = []
+        # Пропущенные без проверки (мертвая подсеть): сохраняются непроверенными
+        self._skipped: List[_Item] = []
+        self._in_flight: Dict[int, _Item] = {}
+        self._started = 0.0
+
+    async def run(self, target: Optional[int] = None) -> CheckReport:
+        """
+        Проходит все источники и возвращает итог.
+
+        Args:
+            target: Остановиться, найдя столько рабочих прокси; оставшиеся
+                в очередях кандидаты сохраняются непроверенными
+
+        Returns:
+            CheckReport: Рабочие прокси и счетчики проверки
+        """
+        stream = self.stream()
+        try:
+            async for _ in stream:
+                if target is not None and len(self.report.working) >= target:
+                    break
+        finally:
+            await stream.aclose()
+        return self.report
+
+    async def stream(self) -> AsyncIterator[Proxy]:
+        """
+        Рабочие прокси по мере нахождения.
+
+        Медленный потребитель притормаживает проверки, а через них и
+        загрузку источников. После завершения или досрочного выхода из
+        цикла итог лежит в self.report.
+        """
+        self.report = CheckReport()
+        self.duplicates = self.skipped_dead = 0
+        self._started = time.monotonic()
+        candidates: asyncio.Queue = asyncio.Queue(self.queue_size)
+        checks: asyncio.Queue = asyncio.Queue(self.queue_size)
+        found: asyncio.Queue = asyncio.Queue(self.queue_size)
+        runner = asyncio.ensure_future(self._run(candidates, checks, found))
+        getter = None
+        try:
+            while not (runner.done() and found.empty()):
+                getter = asyncio.ensure_future(found.get())
+                await asyncio.wait({getter, runner}, return_when=asyncio.FIRST_COMPLETED)
+                if getter.done():
+                    yield getter.result()
+                else:
+                    getter.cancel()
+            runner.result()  # ошибка этапа не должна пропасть молча
+        finally:
+            if getter is not None:
+                getter.cancel()
+            if not runner.done():
+                runner.cancel()
+                try:
+                    await runner
+                except asyncio.CancelledError:
+                    pass
+            self._save_unchecked(candidates, checks)
+            self.report.elapsed = time.monotonic() - self._started
+            self.manager.save_dead_cache()
+            self.logger.info(
+                f"Pipeline checked {self.report.checked} proxies in {self.report.elapsed:.1f}s: "
+                f"{len(self.report.working)} working, first after "
+                f"{self.report.first_working or 0.0:.1f}s; skipped {self.duplicates} duplicates "
+                f"and {self.skipped_dead} recently dead"
+            )
+
+    async def _run(self, candidates: asyncio.Queue, checks: asyncio.Queue,
+                   found: asyncio.Queue) -> None:
+        """Запускает этапы и по очереди закрывает их, когда иссякает предыдущий."""
+        size, hashes = BloomFilter.optimal(self.dedup_capacity, self.dedup_error_rate)
+        seen = BloomFilter(size, hashes, 0.0)
+        producers = [
+            asyncio.ensure_future(self._produce(source, candidates))
+            for source in self.collector.sources
+        ]
+        sifter = asyncio.ensure_future(self._sift(candidates, checks, seen))
+        workers = [
+            asyncio.ensure_future(self._work(checks, found))
+            for _ in range(max(1, self.concurrency))
+        ]
+        flusher = asyncio.ensure_future(self._flush_periodically())
+        tasks = producers + [sifter] + workers + [flusher]
+        try:
+            await asyncio.gather(*producers)
+            await candidates.put(None)
+            await sifter
+            for _ in workers:
+                await checks.put(None)
+            await asyncio.gather(*workers)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            self.report.cancelled = len(self._in_flight)
+            self._flush()
+
+    async def _produce(self, source: dict, candidates: asyncio.Queue) -> None:
+        name = self.collector.source_name(source)
+        try:
+            async for batch in self.collector.iter_source(source):
+                for proxy in batch:
+                    await candidates.put((proxy, name))
+        except Exception as e:
+            self.logger.warning(f"Failed to collect from {name}: {str(e)}")
+
+    async def _sift(self, candidates: asyncio.Queue, checks: asyncio.Queue,
+                    seen: BloomFilter) -> None:
+        """Отсеивает некорректные, повторные и недавно мертвые прокси."""
+        while True:
+            item = await candidates.get()
+            if item is None:
+                return
+            proxy = item[0]
+            try:
+                key = proxy_key(proxy.ip, parse_port(proxy.port))
+            except (TypeError, ValueError):
+                self.logger.debug(f"Skipping proxy with invalid port: {proxy.ip}:{proxy.port}")
+                continue
+            if key in seen:
+                self.duplicates += 1
+                continue
+            seen.add(key)
+            if self.manager.is_known_dead(proxy.ip, proxy.port):
+                self.skipped_dead += 1
+                continue
+            await checks.put(item)
+
+    async def _work(self, checks: asyncio.Queue, found: asyncio.Queue) -> None:
+        health = self.checker.subnet_health
+        report = self.report
+        while True:
+            item = await checks.get()
+            if item is None:
+                return
+            proxy = item[0]
+            if health is not None and health.is_dead(proxy.ip):
+                # Прокси не проверялся: в базу он попадает непроверенным,
+                # а не нерабочим, и в отрицательный кеш не идет
+                report.skipped += 1
+                self._skipped.append(item)
+                if len(self._skipped) >= self.write_batch:
+                    self._flush()
+                continue
+            # Прерванная проверка оставляет прокси здесь, и он сохраняется непроверенным
+            self._in_flight[id(item)] = item
+            ok = await self.checker.probe(proxy)
+            del self._in_flight[id(item)]
+            report.checked += 1
+            if health is not None:
+                health.record(proxy.ip, ok)
+            self._record(item)
+            if ok:
+                if not report.working:
+                    report.first_working = time.monotonic() - self._started
+                report.working.append(proxy)
+                await found.put(proxy)
+
+    def _record(self, item: _Item) -> None:
+        self._pending.append(item)
+        if len(self._pending) >= self.write_batch:
+            self._flush()
+
+    async def _flush_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            self._flush()
+
+    def _flush(self) -> None:
+        """Записывает проверенные и пропущенные прокси вместе с их источниками."""
+        if self._skipped:
+            skipped, self._skipped = self._skipped, []
+            self._add_by_source(skipped)
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, []
+        self._add_by_source(pending)
+        self.manager.update_proxy_statuses(proxy for proxy, _ in pending)
+
+    def _save_unchecked(self, *queues: asyncio.Queue) -> None:
+        """Сохраняет непроверенными прокси, оставшиеся после досрочной остановки."""
+        items = list(self._in_flight.values())
+        self._in_flight.clear()
+        for queue in queues:
+            while not queue.empty():
+                item = queue.get_nowait()
+                if item is not None:
+                    items.append(item)
+        self._add_by_source(items)
+
+    def _add_by_source(self, items: List[_Item]) -> None:
+        by_source = defaultdict(list)
+        for proxy, source in items:
+            by_source[source].append(proxy)
+        for source, proxies in by_source.items():
+            self.manager.add_proxies(proxies, source=source)
@@ -0,0 +1,279 @@
+"""
+Модуль определения протокола прокси по рукопожатию.
+
+Прокси проверяется через asyncio-сокеты без aiohttp. Для каждого протокола
+выполняется его рукопожатие (HTTP, CONNECT, SOCKS4a или SOCKS5), и по тому
+же соединению отправляется один короткий HTTP-запрос к целевому хосту.
+Ответ 200 означает, что протокол рабочий; отдельный полный запрос через
+aiohttp для этого не нужен.
+
+Протокол 'https' означает поддержку метода CONNECT: именно так клиенты
+ходят через HTTP-прокси на HTTPS-сайты.
+"""
+
+import asyncio
+import logging
+import struct
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Optional, Tuple
+from urllib.parse import urlsplit
+
+#: Поддерживаемые протоколы
+PROTOCOLS = ('http', 'https', 'socks4', 'socks5')
+
+# Порядок последовательной проверки: SOCKS-прокси чаще всего подписаны как http
+DETECTION_ORDER = ('socks5', 'socks4', 'http', 'https')
+
+
+class ProbeError(Exception):
+    """Прокси не поддерживает протокол или ответил некорректно."""
+
+
+@dataclass
+class ProbeResult:
+    """Результат определения протоколов прокси."""
+    protocols: Tuple[str, ...] = ()
+    response_times: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def working(self) -> bool:
+        return bool(self.protocols)
+
+    @property
+    def fastest(self) -> Optional[str]:
+        """Протокол с наименьшим временем ответа."""
+        if not self.response_times:
+            return None
+        return min(self.response_times, key=self.response_times.get)
+
+
+class ProtocolProber:
+    """Проверяет прокси рукопожатиями HTTP, CONNECT, SOCKS4a и SOCKS5."""
+
+    def __init__(
+        self,
+        target_host: str = "api.ipify.org",
+        target_port: int = 80,
+        path: str = "/?format=json",
+        timeout: float = 10.0,
+        connect_timeout: Optional[float] = None
+    ):
+        """
+        Инициализирует проверку протоколов.
+
+        Args:
+            target_host: Хост, к которому устанавливается канал через прокси
+            target_port: Порт целевого хоста
+            path: Путь проверочного запроса
+            timeout: Таймаут рукопожатия и ответа в секундах
+            connect_timeout: Таймаут установки соединения с прокси;
+                по умолчанию соединение входит в общий timeout
+        """
+        self.target_host = target_host
+        self.target_port = target_port
+        self.path = path
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.logger = logging.getLogger(__name__)
+
+    @classmethod
+    def from_url(cls, url: str, timeout: float = 10.0) -> "ProtocolProber":
+        """Создает проверку для URL вида http://host[:port]/path?query."""
+        parts = urlsplit(url)
+        path = parts.path or "/"
+        if parts.query:
+            path = f"{path}?{parts.query}"
+        return cls(parts.hostname, parts.port or 80, path, timeout)
+
+    @property
+    def _host_header(self) -> str:
+        if self.target_port == 80:
+            return self.target_host
+        return f"{self.target_host}:{self.target_port}"
+
+    async def _request(self, reader, writer, absolute: bool = False) -> None:
+        """Отправляет проверочный GET и проверяет строку статуса ответа."""
+        target = f"http://{self._host_header}{self.path}" if absolute else self.path
+        writer.write(
+            f"GET {target} HTTP/1.1\r\n"
+            f"Host: {self._host_header}\r\n"
+            f"Connection: close\r\n\r\n".encode()
+        )
+        await writer.drain()
+        await self._expect_status(reader)
+
+    @staticmethod
+    async def _expect_status(reader) -> None:
+        line = await reader.readline()
+        parts = line.split(None, 2)
+        if len(parts) < 2 or not parts[0].startswith(b"HTTP/") or parts[1] != b"200":
+            raise ProbeError(f"Unexpected HTTP status line: {line[:64]!r}")
+
+    async def _http(self, reader, writer) -> None:
+        await self._request(reader, writer, absolute=True)
+
+    async def _https(self, reader, writer) -> None:
+        authority = f"{self.target_host}:{self.target_port}"
+        writer.write(f"CONNECT {authority} HTTP/1.1\r\nHost: {authority}\r\n\r\n".encode())
+        await writer.drain()
+        await self._expect_status(reader)
+        # Пропускаем заголовки ответа на CONNECT
+        for _ in range(100):
+            if await reader.readline() in (b"\r\n", b"\n", b""):
+                break
+        await self._request(reader, writer)
+
+    async def _socks4(self, reader, writer) -> None:
+        # SOCKS4a: адрес 0.0.0.1 и имя хоста после user id, резолвит прокси
+        writer.write(
+            struct.pack(">BBH", 4, 1, self.target_port) + b"\x00\x00\x00\x01\x00"
+            + self.target_host.encode("idna") + b"\x00"
+        )
+        await writer.drain()
+        reply = await reader.readexactly(8)
+        if reply[0] != 0 or reply[1] != 0x5A:
+            raise ProbeError(f"SOCKS4 request rejected: {reply[:2]!r}")
+        await self._request(reader, writer)
+
+    async def _socks5(self, reader, writer) -> None:
+        writer.write(b"\x05\x01\x00")  # одна схема аутентификации: без пароля
+        await writer.drain()
+        if await reader.readexactly(2) != b"\x05\x00":
+            raise ProbeError("SOCKS5 greeting rejected")
+
+        host = self.target_host.encode("idna")
+        writer.write(
+            b"\x05\x01\x00\x03" + bytes([len(host)]) + host
+            + struct.pack(">H", self.target_port)
+        )
+        await writer.drain()
+        version, reply, _, address_type = await reader.readexactly(4)
+        if version != 5 or reply != 0:
+            raise ProbeError(f"SOCKS5 connect failed with code {reply}")
+        # Пропускаем BND.ADDR и BND.PORT
+        if address_type == 1:
+            length = 4
+        elif address_type == 4:
+            length = 16
+        elif address_type == 3:
+            length = (await reader.readexactly(1))[0]
+        else:
+            raise ProbeError(f"Unknown SOCKS5 address type {address_type}")
+        await reader.readexactly(length + 2)
+        await self._request(reader, writer)
+
+    async def probe(
+        self,
+        ip: str,
+        port: int,
+        protocol: str,
+        timeout: Optional[float] = None,
+        connect_timeout: Optional[float] = None
+    ) -> float:
+        """
+        Проверяет один протокол на отдельном соединении.
+
+        На всю проверку отводится timeout. Если задан срок на соединение,
+        открытие соединения ограничено connect_timeout, а общий срок
+        увеличивается на connect_timeout, чтобы медленное, но уложившееся
+        в свой срок соединение не отнимало время у обмена с прокси.
+
+        Args:
+            ip: IP адрес прокси
+            port: Порт прокси
+            protocol: Протокол из PROTOCOLS
+            timeout: Таймаут вместо заданного в конструкторе
+            connect_timeout: Таймаут соединения вместо заданного в конструкторе
+
+        Returns:
+            float: Время от открытия соединения до ответа в секундах
+
+        Raises:
+            ProbeError, OSError, asyncio.TimeoutError: Если протокол не работает
+        """
+        handshake = getattr(self, f"_{protocol}", None)
+        if protocol not in PROTOCOLS or handshake is None:
+            raise ValueError(f"Unsupported protocol: {protocol}")
+
+        timeout = self.timeout if timeout is None else timeout
+        connect_timeout = self.connect_timeout if connect_timeout is None else connect_timeout
+
+        async def run() -> float:
+            start = time.monotonic()
+            connection = asyncio.open_connection(ip, int(port))
+            if connect_timeout is not None:
+                connection = asyncio.wait_for(connection, connect_timeout)
+            reader, writer = await connection
+            try:
+                await handshake(reader, writer)
+            except asyncio.IncompleteReadError:
+                raise ProbeError(f"Connection closed during {protocol} handshake") from None
+            finally:
+                writer.close()
+            return time.monotonic() - start
+
+        if connect_timeout is not None:
+            timeout += connect_timeout
+        return await asyncio.wait_for(run(), timeout)
+
+    async def _try(self, ip: str, port: int, protocol: str) -> Tuple[str, Optional[float]]:
+        try:
+            return protocol, await self.probe(ip, port, protocol)
+        except (ProbeError, OSError, asyncio.TimeoutError) as e:
+            self.logger.debug(f"{protocol}://{ip}:{port} failed: {e!r}")
+            return protocol, None
+
+    async def detect(
+        self,
+        ip: str,
+        port: int,
+        protocols: Iterable[str] = DETECTION_ORDER,
+        hint: Optional[str] = None,
+        race: bool = False,
+        find_all: bool = True
+    ) -> ProbeResult:
+        """
+        Определяет рабочие протоколы прокси.
+
+        Args:
+            ip: IP адрес прокси
+            port: Порт прокси
+            protocols: Проверяемые протоколы в порядке проверки
+            hint: Протокол, который проверяется первым (например, из источника)
+            race: Проверять все протоколы одновременно
+            find_all: Найти все рабочие протоколы, а не только первый
+
+        Returns:
+            ProbeResult: Рабочие протоколы и время ответа по каждому
+        """
+        order = list(protocols)
+        if hint in order:
+            order.remove(hint)
+            order.insert(0, hint)
+
+        result = ProbeResult()
+        if race:
+            tasks = [asyncio.ensure_future(self._try(ip, port, p)) for p in order]
+            try:
+                for task in asyncio.as_completed(tasks):
+                    protocol, elapsed = await task
+                    if elapsed is None:
+                        continue
+                    result.response_times[protocol] = elapsed
+                    if not find_all:
+                        break
+            finally:
+                for task in tasks:
+                    task.cancel()
+        else:
+            for protocol in order:
+                _, elapsed = await self._try(ip, port, protocol)
+                if elapsed is None:
+                    continue
+                result.response_times[protocol] = elapsed
+                if not find_all:
+                    break
+
+        result.protocols = tuple(p for p in order if p in result.response_times)
+        return result
@@ -1,24 +1,52 @@
 """Модуль для работы с прокси."""
 
+from typing import Optional
+
+
 class Proxy:
     """Класс для представления прокси."""
     
-    def __init__(self, ip: str, port: int, protocol: str = 'http'):
+    def __init__(
+        self,
+        ip: str,
+        port: int,
+        protocol: str = 'http',
+        country: Optional[str] = None,
+        anonymity: Optional[str] = None,
+        asn: Optional[int] = None
+    ):
         """
         Инициализирует объект прокси.
         
         Args:
             ip: IP адрес прокси
             port: Порт прокси
-            protocol: Протокол прокси (http/https)
+            protocol: Протокол прокси (http/https/socks4/socks5)
+            country: Код страны прокси
+            anonymity: Уровень анонимности (elite/anonymous/transparent)
+            asn: Номер автономной системы
         """
         self.ip = ip
         self.port = port
         self.protocol = protocol
+        self.country = country
+        self.anonymity = anonymity
+        self.asn = asn
         self.status = None
         self.response_time = None
         self.collection_date = None
         self.last_check = None
+        # Рабочие протоколы по результатам определения; None - не определялись
+        self.protocols = None
+        # Внешний адрес, с которого прокси ходит в сеть; None - неизвестен
+        self.exit_ip = None
+        # Пропускная способность в байтах в секунду и время до первого
+        # байта ответа по замеру скорости; None - не замерялись
+        self.bandwidth = None
+        self.ttfb = None
+        # Длительности фаз проверки (tracing.CheckPhases); у прокси из
+        # хранилища - сглаженные по нескольким проверкам
+        self.phases = None
         
     @property
     def url(self) -> str:
@@ -0,0 +1,188 @@
+"""Модуль фоновой очистки старых прокси небольшими пачками."""
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+from .storage import BaseStorage
+
+
+@dataclass
+class RetentionProgress:
+    """Состояние прохода очистки."""
+    first_id: Optional[int] = None
+    last_id: Optional[int] = None
+    next_id: Optional[int] = None
+    deleted: int = 0
+    batches: int = 0
+    vacuumed_pages: int = 0
+    elapsed: float = 0.0
+    done: bool = False
+
+    @property
+    def fraction(self) -> float:
+        """Доля пройденного диапазона ID от 0 до 1."""
+        if self.done:
+            return 1.0
+        if self.first_id is None:
+            return 0.0
+        return (self.next_id - self.first_id) / (self.last_id - self.first_id + 1)
+
+
+class RetentionJob:
+    """
+    Удаляет старые прокси пачками по диапазонам ID.
+
+    Каждая пачка - отдельная короткая транзакция, между пачками делается
+    пауза, чтобы проверки и выборки не ждали блокировку записи. Размер
+    пачки подстраивается так, чтобы одна пачка занимала не дольше
+    batch_target секунд. Проход можно ограничить по времени: незавершенный
+    проход продолжается со следующего вызова run().
+    """
+
+    def __init__(
+        self,
+        storage: BaseStorage,
+        max_age_days: int = 7,
+        batch_size: int = 1000,
+        max_batch_size: int = 20000,
+        batch_target: float = 0.05,
+        pause: float = 0.01,
+        time_budget: Optional[float] = None,
+        vacuum_pages: int = 0,
+        on_progress: Optional[Callable[[RetentionProgress], None]] = None
+    ):
+        """
+        Инициализирует задачу очистки.
+
+        Args:
+            storage: Хранилище прокси
+            max_age_days: Максимальный возраст данных в днях
+            batch_size: Начальная ширина диапазона ID в одной пачке
+            max_batch_size: Максимальная ширина диапазона ID
+            batch_target: Желаемая длительность одной пачки в секундах
+            pause: Пауза между пачками в секундах
+            time_budget: Максимальная длительность одного прохода в секундах
+            vacuum_pages: Сколько страниц возвращать системе после каждой пачки
+            on_progress: Функция, вызываемая после каждой пачки
+        """
+        self.storage = storage
+        self.max_age_days = max_age_days
+        self.batch_size = batch_size
+        self.max_batch_size = max_batch_size
+        self.batch_target = batch_target
+        self.pause = pause
+        self.time_budget = time_budget
+        self.vacuum_pages = vacuum_pages
+        self.on_progress = on_progress
+        self.progress = RetentionProgress(done=True)
+        self.logger = logging.getLogger(__name__)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._min_date: Optional[datetime] = None
+
+    def _begin(self) -> None:
+        """Начинает новый проход, если предыдущий завершен."""
+        if not self.progress.done:
+            return
+        first_id, last_id = self.storage.get_id_range()
+        self._min_date = datetime.now() - timedelta(days=self.max_age_days)
+        self.progress = RetentionProgress(
+            first_id=first_id,
+            last_id=last_id,
+            next_id=first_id,
+            done=first_id is None
+        )
+
+    def _step(self) -> None:
+        """Обрабатывает одну пачку и обновляет прогресс."""
+        progress = self.progress
+        first = progress.next_id
+        last = min(first + self.batch_size - 1, progress.last_id)
+
+        start = time.monotonic()
+        progress.deleted += self.storage.cleanup_range(self._min_date, first, last)
+        if self.vacuum_pages:
+            progress.vacuumed_pages += self.storage.incremental_vacuum(self.vacuum_pages)
+        duration = time.monotonic() - start
+
+        progress.batches += 1
+        progress.elapsed += duration
+        progress.next_id = last + 1
+        progress.done = progress.next_id > progress.last_id
+
+        # Подстраиваем размер пачки под желаемую длительность
+        if duration > self.batch_target:
+            self.batch_size = max(1, self.batch_size // 2)
+        elif duration < self.batch_target / 2:
+            self.batch_size = min(self.max_batch_size, self.batch_size * 2)
+
+        if self.on_progress:
+            self.on_progress(progress)
+
+    def _out_of_budget(self, started: float) -> bool:
+        return self.time_budget is not None and time.monotonic() - started >= self.time_budget
+
+    def _finish(self) -> RetentionProgress:
+        if self.progress.done:
+            self.logger.info(
+                f"Cleaned up {self.progress.deleted} old proxy records "
+                f"in {self.progress.batches} batches"
+            )
+        return self.progress
+
+    def run(self) -> RetentionProgress:
+        """
+        Выполняет проход очистки в текущем потоке.
+
+        Returns:
+            RetentionProgress: Прогресс; done=False если проход прерван
+                по time_budget или stop() и будет продолжен следующим вызовом
+        """
+        self._stop.clear()
+        return self._run()
+
+    def _run(self) -> RetentionProgress:
+        self._begin()
+        started = time.monotonic()
+        while not self.progress.done and not self._stop.is_set():
+            self._step()
+            if self.progress.done or self._out_of_budget(started):
+                break
+            self._stop.wait(self.pause)
+        return self._finish()
+
+    async def run_async(self) -> RetentionProgress:
+        """
+        Выполняет проход очистки, не блокируя цикл событий:
+        пачки выполняются в пуле потоков, пауза - через asyncio.sleep.
+        """
+        import asyncio  # отложенный импорт ускоряет старт коротких задач
+
+        loop = asyncio.get_running_loop()
+        self._stop.clear()
+        await loop.run_in_executor(None, self._begin)
+        started = time.monotonic()
+        while not self.progress.done and not self._stop.is_set():
+            await loop.run_in_executor(None, self._step)
+            if self.progress.done or self._out_of_budget(started):
+                break
+            await asyncio.sleep(self.pause)
+        return self._finish()
+
+    def start(self) -> threading.Thread:
+        """Запускает проход очистки в фоновом потоке."""
+        if self._thread and self._thread.is_alive():
+            return self._thread
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="proxy-retention", daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self, wait: bool = True) -> None:
+        """Останавливает проход после текущей пачки."""
+        self._stop.set()
+        if wait and self._thread:
+            self._thread.join()
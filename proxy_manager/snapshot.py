@@ -0,0 +1,123 @@
+"""
+Модуль снимков пула рабочих прокси в компактном бинарном формате.
+
+Снимок - заголовок и массив записей фиксированного размера. Файл читается
+через mmap и разбирается struct.iter_unpack без построчного парсинга,
+поэтому пул из десятков тысяч прокси загружается за миллисекунды.
+
+Формат (little-endian):
+    заголовок: magic b'PXSN', версия (H), размер записи (H),
+               количество записей (I), время создания (Q)
+    запись:    IPv4 (4s), порт (H), протокол (B), резерв (B),
+               response_time (f, NaN если нет), last_check (I),
+               collection_date (I)
+"""
+
+import math
+import mmap
+import os
+import socket
+import struct
+import time
+from typing import Iterable, List, Tuple
+from .storage import ProxyRecord
+
+MAGIC = b'PXSN'
+VERSION = 1
+HEADER = struct.Struct('<4sHHIQ')
+RECORD = struct.Struct('<4sHBBfII')
+
+#: Коды протоколов в записи снимка
+PROTOCOLS = ('http', 'https', 'socks4', 'socks5')
+_PROTOCOL_CODES = {name: code for code, name in enumerate(PROTOCOLS)}
+
+
+class SnapshotError(ValueError):
+    """Файл снимка поврежден или имеет неизвестный формат."""
+
+
+def _pack(record: ProxyRecord) -> bytes:
+    """Упаковывает запись; ValueError если ее нельзя представить в снимке."""
+    try:
+        ip = socket.inet_aton(record.ip)
+    except OSError:
+        raise ValueError(f"Not an IPv4 address: {record.ip}") from None
+    protocol = _PROTOCOL_CODES.get(record.protocol)
+    if protocol is None:
+        raise ValueError(f"Unknown protocol: {record.protocol}")
+    response_time = math.nan if record.response_time is None else record.response_time
+    return RECORD.pack(
+        ip, record.port, protocol, 0, response_time,
+        record.last_check or 0, record.collection_date or 0
+    )
+
+
+def write_snapshot(path: str, records: Iterable[ProxyRecord]) -> int:
+    """
+    Записывает снимок атомарно: во временный файл и затем os.replace.
+
+    Args:
+        path: Путь к файлу снимка
+        records: Записи рабочих прокси
+
+    Returns:
+        int: Количество записанных записей (не-IPv4 прокси пропускаются)
+    """
+    body = bytearray()
+    count = 0
+    for record in records:
+        try:
+            body += _pack(record)
+        except ValueError:
+            continue
+        count += 1
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, RECORD.size, count, int(time.time())))
+        f.write(body)
+    os.replace(tmp_path, path)
+    return count
+
+
+def read_snapshot(path: str) -> Tuple[int, List[ProxyRecord]]:
+    """
+    Читает снимок через mmap.
+
+    Args:
+        path: Путь к файлу снимка
+
+    Returns:
+        Tuple[int, List[ProxyRecord]]: Время создания снимка и записи
+
+    Raises:
+        SnapshotError: Если файл поврежден или другой версии
+    """
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size < HEADER.size:
+            raise SnapshotError(f"Snapshot {path} is truncated")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            magic, version, record_size, count, created = HEADER.unpack_from(mm)
+            if magic != MAGIC or version != VERSION or record_size != RECORD.size:
+                raise SnapshotError(f"Unsupported snapshot format in {path}")
+            end = HEADER.size + count * RECORD.size
+            if len(mm) < end:
+                raise SnapshotError(f"Snapshot {path} is truncated")
+
+            view = memoryview(mm)[HEADER.size:end]
+            try:
+                inet_ntoa = socket.inet_ntoa
+                records = [
+                    ProxyRecord(
+                        inet_ntoa(ip), port, PROTOCOLS[protocol],
+                        None if response_time != response_time else response_time,
+                        last_check or None, collection_date or None
+                    )
+                    for ip, port, protocol, _, response_time, last_check, collection_date
+                    in RECORD.iter_unpack(view)
+                ]
+            except IndexError:
+                raise SnapshotError(f"Unknown protocol code in {path}") from None
+            finally:
+                view.release()
+    return created, records
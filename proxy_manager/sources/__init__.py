@@ -1,13 +1,33 @@
-from .base import BaseSource
-from .freeproxylist import FreeProxyListSource
-from .geonode import GeonodeSource
-from .github import GithubSource
-from .proxylist_download import ProxyListDownloadSource
+from importlib import import_module
+
+# Источники загружаются при первом обращении, вместе с requests/bs4
+_LAZY_ATTRIBUTES = {
+    'BaseSource': '.base',
+    'FreeProxyListSource': '.freeproxylist',
+    'GeonodeSource': '.geonode',
+    'GithubSource': '.github',
+    'PagedJSONSource': '.paging',
+    'ProxyListDownloadSource': '.proxylist_download',
+}
 
 __all__ = [
     'BaseSource',
     'FreeProxyListSource',
     'GeonodeSource',
     'GithubSource',
+    'PagedJSONSource',
     'ProxyListDownloadSource'
 ]
+
+
+def __getattr__(name):
+    module = _LAZY_ATTRIBUTES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_LAZY_ATTRIBUTES))
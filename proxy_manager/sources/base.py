@@ -1,6 +1,7 @@
 from abc import ABC, abstractmethod
 from typing import Set
 import logging
+from ..bogons import filter_valid
 from ..models import Proxy
 
 class BaseSource(ABC):
@@ -16,15 +17,13 @@ class BaseSource(ABC):
 
     def extract_proxies_from_text(self, text: str) -> Set[Proxy]:
         """Извлекает прокси из текста в формате IP:PORT."""
-        proxies = set()
+        proxies = []
         for line in text.splitlines():
             line = line.strip()
             if ':' in line:
                 try:
                     ip, port = line.split(':')
-                    proxy = Proxy(ip=ip.strip(), port=int(port.strip()))
-                    if proxy.is_valid_public_ip:
-                        proxies.add(proxy)
+                    proxies.append(Proxy(ip=ip.strip(), port=int(port.strip())))
                 except (ValueError, TypeError):
                     continue
-        return proxies
+        return set(filter_valid(proxies))
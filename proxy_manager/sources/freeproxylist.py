@@ -1,50 +1,66 @@
-import requests
-from bs4 import BeautifulSoup
-from typing import Set
+from concurrent.futures import Executor
+from typing import Optional, Set
 from .base import BaseSource
+from .tables import extract_rows
+from ..bogons import filter_valid
 from ..models import Proxy
 
+
+def parse_page(html: str, parser: str = 'regex') -> Set[Proxy]:
+    """
+    Извлекает прокси из страницы free-proxy-list.net.
+
+    Функция уровня модуля, чтобы ее можно было выполнять в пуле процессов.
+    """
+    proxies = []
+    for cols in extract_rows(html, parser):
+        if len(cols) >= 7:
+            try:
+                proxies.append(Proxy(
+                    ip=cols[0],
+                    port=int(cols[1]),
+                    protocol='https' if cols[6] == 'yes' else 'http',
+                    country=cols[2],
+                    anonymity=cols[4]
+                ))
+            except (ValueError, TypeError):
+                continue
+    return set(filter_valid(proxies))
+
+
 class FreeProxyListSource(BaseSource):
     """Источник прокси с free-proxy-list.net."""
-    
+
+    url = 'https://free-proxy-list.net/'
+
+    def __init__(self, parser: str = 'regex', executor: Optional[Executor] = None):
+        """
+        Args:
+            parser: Парсер таблицы ('regex', 'lxml' или 'bs4')
+            executor: Пул процессов для разбора страницы; без него
+                страница разбирается в вызывающем потоке
+        """
+        super().__init__()
+        self.parser = parser
+        self.executor = executor
+
     def get_proxies(self) -> Set[Proxy]:
+        import requests
+
         proxies = set()
-        url = 'https://free-proxy-list.net/'
-        
+
         try:
-            response = requests.get(url, timeout=10)
+            response = requests.get(self.url, timeout=10)
             response.raise_for_status()
-            
-            soup = BeautifulSoup(response.text, 'html.parser')
-            table = soup.find('table')
-            
-            if table:
-                rows = table.find_all('tr')[1:]  # Skip header
-                for row in rows:
-                    cols = row.find_all('td')
-                    if len(cols) >= 7:
-                        ip = cols[0].text.strip()
-                        port = cols[1].text.strip()
-                        country = cols[2].text.strip()
-                        anonymity = cols[4].text.strip()
-                        https = cols[6].text.strip() == 'yes'
-                        
-                        try:
-                            proxy = Proxy(
-                                ip=ip,
-                                port=int(port),
-                                protocol='https' if https else 'http',
-                                country=country,
-                                anonymity=anonymity
-                            )
-                            if proxy.is_valid_public_ip:
-                                proxies.add(proxy)
-                        except (ValueError, TypeError):
-                            continue
-            
+
+            if self.executor is not None:
+                proxies = self.executor.submit(parse_page, response.text, self.parser).result()
+            else:
+                proxies = parse_page(response.text, self.parser)
+
             self.logger.info(f"Found {len(proxies)} proxies from free-proxy-list.net")
-            
+
         except Exception as e:
             self.logger.error(f"Error fetching from free-proxy-list.net: {str(e)}")
-        
+
         return proxies
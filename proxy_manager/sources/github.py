@@ -1,4 +1,3 @@
-import requests
 from typing import Set, List
 from .base import BaseSource
 from ..models import Proxy
@@ -22,6 +21,8 @@ class GithubSource(BaseSource):
     
     def get_proxies(self) -> Set[Proxy]:
         """Получает прокси из всех GitHub источников."""
+        import requests
+        
         all_proxies = set()
         
         for url in self.sources:
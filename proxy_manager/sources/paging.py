@@ -0,0 +1,155 @@
+"""
+Постраничная загрузка JSON API источников прокси.
+
+Первая страница запрашивается сразу, по ней определяется общее число
+записей. Остальные страницы загружаются параллельно, не более
+max_concurrency запросов одновременно, и каждая страница отдается
+вызывающему коду сразу по готовности, не дожидаясь остальных.
+"""
+
+import asyncio
+import math
+from abc import abstractmethod
+from typing import Any, AsyncIterator, Dict, Optional, Set
+from .base import BaseSource
+from ..bogons import filter_valid
+from ..models import Proxy
+
+
+class PagedJSONSource(BaseSource):
+    """
+    Базовый класс источника с постраничным JSON API.
+
+    Подкласс задает url, params и parse_item; при другом формате ответа
+    переопределяются total_from и items_from.
+    """
+
+    url: str = ''
+    params: Dict[str, Any] = {}
+    page_param = 'page'
+    limit_param = 'limit'
+    page_size = 100
+    max_concurrency = 4
+    max_pages: Optional[int] = None
+    timeout = 10
+
+    def __init__(self, max_concurrency: Optional[int] = None, max_pages: Optional[int] = None):
+        """
+        Args:
+            max_concurrency: Максимум одновременных запросов к источнику
+            max_pages: Максимум загружаемых страниц
+        """
+        super().__init__()
+        if max_concurrency is not None:
+            self.max_concurrency = max_concurrency
+        if max_pages is not None:
+            self.max_pages = max_pages
+
+    @abstractmethod
+    def parse_item(self, item: Dict[str, Any]) -> Proxy:
+        """Собирает Proxy из элемента ответа; ValueError/KeyError для некорректных."""
+        pass
+
+    def total_from(self, data: Dict[str, Any]) -> Optional[int]:
+        """Общее число записей из ответа или None, если API его не сообщает."""
+        total = data.get('total')
+        return int(total) if total is not None else None
+
+    def items_from(self, data: Dict[str, Any]) -> list:
+        """Элементы списка прокси из ответа."""
+        return data.get('data', [])
+
+    def page_count(self, data: Dict[str, Any]) -> int:
+        """Число страниц по ответу на первую страницу."""
+        total = self.total_from(data)
+        pages = max(1, math.ceil(total / self.page_size)) if total else 1
+        if self.max_pages is not None:
+            pages = min(pages, self.max_pages)
+        return pages
+
+    def parse_page(self, data: Dict[str, Any]) -> Set[Proxy]:
+        """Прокси с публичными адресами из одной страницы ответа."""
+        proxies = []
+        for item in self.items_from(data):
+            try:
+                proxies.append(self.parse_item(item))
+            except (ValueError, TypeError, KeyError, IndexError):
+                continue
+        return set(filter_valid(proxies))
+
+    async def _fetch(self, session, page: int) -> Dict[str, Any]:
+        import aiohttp
+
+        params = dict(self.params, **{self.page_param: page, self.limit_param: self.page_size})
+        async with session.get(
+            self.url, params=params, timeout=aiohttp.ClientTimeout(total=self.timeout)
+        ) as response:
+            response.raise_for_status()
+            return await response.json(content_type=None)
+
+    async def iter_pages(self, session=None) -> AsyncIterator[Set[Proxy]]:
+        """
+        Загружает все страницы и отдает прокси постранично по мере готовности.
+
+        Args:
+            session: aiohttp.ClientSession; если не указана, создается своя
+
+        Yields:
+            Set[Proxy]: Прокси одной страницы; первая страница отдается первой,
+                остальные - в порядке завершения запросов
+
+        Raises:
+            aiohttp.ClientError: Если не удалось загрузить первую страницу.
+                Ошибки остальных страниц логируются, страница пропускается
+        """
+        if session is None:
+            import aiohttp
+
+            async with aiohttp.ClientSession() as session:
+                async for proxies in self.iter_pages(session):
+                    yield proxies
+            return
+
+        first = await self._fetch(session, 1)
+        yield self.parse_page(first)
+
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def fetch(page: int) -> Optional[Dict[str, Any]]:
+            async with semaphore:
+                try:
+                    return await self._fetch(session, page)
+                except Exception as e:
+                    self.logger.warning(f"Failed to fetch page {page} from {self.url}: {str(e)}")
+                    return None
+
+        tasks = [asyncio.ensure_future(fetch(page)) for page in range(2, self.page_count(first) + 1)]
+        try:
+            for task in asyncio.as_completed(tasks):
+                data = await task
+                if data is not None:
+                    yield self.parse_page(data)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def get_proxies(self) -> Set[Proxy]:
+        """
+        Синхронно загружает все страницы.
+
+        В асинхронном коде используйте iter_pages: этот метод запускает
+        собственный цикл событий.
+        """
+        proxies = set()
+
+        async def collect():
+            async for page in self.iter_pages():
+                proxies.update(page)
+
+        try:
+            asyncio.run(collect())
+            self.logger.info(f"Found {len(proxies)} proxies from {self.url}")
+        except Exception as e:
+            self.logger.error(f"Error fetching from {self.url}: {str(e)}")
+
+        return proxies
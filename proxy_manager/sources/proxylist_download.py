@@ -1,4 +1,3 @@
-import requests
 from typing import Set
 from .base import BaseSource
 from ..models import Proxy
@@ -7,6 +6,8 @@ class ProxyListDownloadSource(BaseSource):
     """Источник прокси с proxy-list.download."""
     
     def get_proxies(self) -> Set[Proxy]:
+        import requests
+        
         proxies = set()
         base_url = 'https://www.proxy-list.download/api/v1/get'
         protocols = ['http', 'https']
@@ -0,0 +1,127 @@
+"""
+Быстрое извлечение строк HTML-таблиц для табличных источников прокси.
+
+Парсеры:
+    regex - поиск ячеек регулярными выражениями по первой таблице страницы,
+            без построения дерева документа (по умолчанию)
+    lxml  - разбор через lxml, если он установлен
+    bs4   - исходный разбор BeautifulSoup(..., 'html.parser')
+
+Все парсеры возвращают одинаковый результат: список строк, каждая строка -
+список текстов ячеек <td>. Строки без <td> (заголовок из <th>) пропускаются.
+"""
+
+import re
+from concurrent.futures import Executor, ProcessPoolExecutor
+from html import unescape
+from typing import Callable, Iterable, List, Optional, TypeVar
+
+PARSERS = ('regex', 'lxml', 'bs4')
+
+_TABLE_START_RE = re.compile(r'<table\b', re.I)
+_TABLE_END_RE = re.compile(r'</table\s*>', re.I)
+_ROW_SPLIT_RE = re.compile(r'<tr\b[^>]*>', re.I)
+# Содержимое ячейки до </td>, следующей <td> или </tr>: закрывающие теги
+# в HTML необязательны. Развернутый цикл вместо .*? с опережающей
+# проверкой на каждом символе
+_CELL_RE = re.compile(r'<td\b[^>]*>([^<]*(?:<(?!/td\s*>|td\b|/tr\s*>)[^<]*)*)', re.I)
+_TAG_RE = re.compile(r'<[^>]*>')
+
+T = TypeVar('T')
+
+
+def _cell_text(cell: str) -> str:
+    if '<' in cell:
+        cell = _TAG_RE.sub('', cell)
+    if '&' in cell:
+        cell = unescape(cell)
+    return cell.strip()
+
+
+def _regex_rows(html: str) -> List[List[str]]:
+    start = _TABLE_START_RE.search(html)
+    if not start:
+        return []
+    end = _TABLE_END_RE.search(html, start.end())
+    table = html[start.start():end.start() if end else len(html)]
+    rows = []
+    for chunk in _ROW_SPLIT_RE.split(table)[1:]:
+        cells = _CELL_RE.findall(chunk)
+        if cells:
+            rows.append([_cell_text(cell) for cell in cells])
+    return rows
+
+
+def _lxml_rows(html: str) -> List[List[str]]:
+    from lxml import html as lxml_html
+
+    tables = lxml_html.fromstring(html).xpath('//table')
+    if not tables:
+        return []
+    rows = []
+    for row in tables[0].iter('tr'):
+        cells = [cell.text_content().strip() for cell in row.findall('td')]
+        if cells:
+            rows.append(cells)
+    return rows
+
+
+def _bs4_rows(html: str) -> List[List[str]]:
+    from bs4 import BeautifulSoup
+
+    table = BeautifulSoup(html, 'html.parser').find('table')
+    if not table:
+        return []
+    rows = []
+    for row in table.find_all('tr'):
+        cells = [cell.text.strip() for cell in row.find_all('td')]
+        if cells:
+            rows.append(cells)
+    return rows
+
+
+_PARSERS = {'regex': _regex_rows, 'lxml': _lxml_rows, 'bs4': _bs4_rows}
+
+
+def extract_rows(html: str, parser: str = 'regex') -> List[List[str]]:
+    """
+    Извлекает строки первой таблицы на странице.
+
+    Args:
+        html: Текст страницы
+        parser: Парсер из PARSERS
+
+    Returns:
+        List[List[str]]: Тексты ячеек <td> по строкам
+    """
+    extract = _PARSERS.get(parser)
+    if extract is None:
+        raise ValueError(f"Unknown table parser: {parser}")
+    return extract(html)
+
+
+def parse_pages(
+    parse: Callable[[str], T],
+    pages: Iterable[str],
+    executor: Optional[Executor] = None,
+    max_workers: Optional[int] = None
+) -> List[T]:
+    """
+    Разбирает страницы в пуле процессов, не занимая GIL вызывающего потока.
+
+    Args:
+        parse: Функция разбора одной страницы; должна сериализоваться pickle,
+            то есть быть функцией уровня модуля или functools.partial от нее
+        pages: Тексты страниц
+        executor: Готовый пул; если не указан, создается временный пул процессов
+        max_workers: Размер временного пула
+
+    Returns:
+        List[T]: Результаты в порядке страниц
+    """
+    pages = list(pages)
+    if executor is not None:
+        return list(executor.map(parse, pages))
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        return list(pool.map(parse, pages))
+
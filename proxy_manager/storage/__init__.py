@@ -0,0 +1,39 @@
+from .base import BaseStorage, ProxyRecord, SourceStats, TargetResult
+from .memory import MemoryStorage
+from .sqlite import SQLiteStorage
+
+# Доступные движки хранения по имени
+BACKENDS = {
+    SQLiteStorage.name: SQLiteStorage,
+    MemoryStorage.name: MemoryStorage,
+}
+
+
+def create_storage(name: str, **kwargs) -> BaseStorage:
+    """
+    Создает хранилище по имени движка.
+
+    Args:
+        name: Имя движка ('sqlite' или 'memory')
+        **kwargs: Параметры конструктора движка
+
+    Returns:
+        BaseStorage: Экземпляр хранилища
+    """
+    try:
+        backend = BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown storage backend: {name}") from None
+    return backend(**kwargs)
+
+
+__all__ = [
+    'BaseStorage',
+    'ProxyRecord',
+    'SourceStats',
+    'TargetResult',
+    'MemoryStorage',
+    'SQLiteStorage',
+    'BACKENDS',
+    'create_storage'
+]
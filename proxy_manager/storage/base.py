@@ -0,0 +1,517 @@
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import AsyncIterator, Callable, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+import logging
+from ..proxy import Proxy
+from ..targets import Target
+from ..tracing import PHASES, CheckPhases
+
+#: Колонки сглаженных длительностей фаз проверки, в порядке CheckPhases
+PHASE_COLUMNS = tuple(f"{phase}_time" for phase in PHASES)
+
+#: Вес нового замера в сглаженной длительности фазы
+PHASE_SMOOTHING = 0.3
+
+
+class ProxyRecord(NamedTuple):
+    """Компактная запись прокси с датами в секундах Unix-времени."""
+    ip: str
+    port: int
+    protocol: str
+    response_time: Optional[float]
+    last_check: Optional[int]
+    collection_date: Optional[int]
+
+
+class SourceStats(NamedTuple):
+    """Счетчики источника: сколько прокси он дал и сколько из них работало."""
+    name: str
+    collected: int
+    checked: int
+    working: int
+    working_rt_sum: float
+    working_rt_count: int
+
+    @property
+    def score(self) -> float:
+        """
+        Оценка доли рабочих прокси по правилу Лапласа.
+
+        Новый источник получает 1/2 и успевает проявить себя, а оценка
+        источника с парой удачных проверок не взлетает до 1.
+        """
+        return (self.working + 1) / (self.checked + 2)
+
+    @property
+    def avg_response_time(self) -> Optional[float]:
+        """Среднее время ответа рабочих прокси источника."""
+        return self.working_rt_sum / self.working_rt_count if self.working_rt_count else None
+
+
+class TargetResult(NamedTuple):
+    """Результат проверки прокси на целевом сайте."""
+    ip: str
+    port: int
+    ok: bool
+
+
+def to_epoch(value: datetime) -> int:
+    """Переводит дату в секунды Unix-времени, в которых хранятся даты."""
+    return int(value.timestamp())
+
+
+def from_epoch(value: Optional[int]) -> Optional[str]:
+    """Переводит сохраненную дату в ISO-строку, которую отдает API."""
+    return datetime.fromtimestamp(value).isoformat() if value is not None else None
+
+
+def smooth_phase(old: Optional[float], new: Optional[float]) -> Optional[float]:
+    """
+    Сглаживает длительность фазы экспоненциальным средним.
+
+    Одна проверка бесплатного прокси шумная; сглаженное значение хранит
+    типичную задержку и все же следует за ее изменением.
+    """
+    if new is None:
+        return old
+    if old is None:
+        return new
+    return old + PHASE_SMOOTHING * (new - old)
+
+
+def phases_from_row(values) -> Optional[CheckPhases]:
+    """CheckPhases из значений PHASE_COLUMNS или None, если фазы не замерялись."""
+    values = tuple(values)
+    return CheckPhases(*values) if any(value is not None for value in values) else None
+
+
+def phases_statistics(averages) -> dict:
+    """Словарь средних длительностей фаз по рабочим прокси для get_statistics."""
+    return {
+        phase: round(value, 3) if value is not None else None
+        for phase, value in zip(PHASES, averages)
+    }
+
+
+def parse_port(value) -> int:
+    """
+    Приводит порт к целому числу.
+
+    Raises:
+        ValueError: Если порт не число или вне диапазона 1-65535
+    """
+    port = int(value)
+    if not 0 < port < 65536:
+        raise ValueError(f"Port out of range: {value}")
+    return port
+
+
+# Уровни анонимности у разных источников называются по-разному
+_ANONYMITY_LEVELS = {
+    'elite proxy': 'elite',
+    'high anonymous': 'elite',
+    'high': 'elite',
+    'anonymous proxy': 'anonymous',
+    'noa': 'transparent',
+}
+
+
+def clean_country(value) -> Optional[str]:
+    """Код страны в верхнем регистре или None, если он не указан."""
+    if isinstance(value, str) and value.strip():
+        return value.strip().upper()
+    return None
+
+
+def clean_asn(value) -> Optional[int]:
+    """Номер автономной системы или None."""
+    if isinstance(value, int) and not isinstance(value, bool) and value > 0:
+        return value
+    return None
+
+
+def clean_anonymity(value) -> Optional[str]:
+    """Уровень анонимности: 'elite', 'anonymous', 'transparent' или None."""
+    if isinstance(value, str) and value.strip():
+        level = value.strip().lower()
+        return _ANONYMITY_LEVELS.get(level, level)
+    return None
+
+
+class BaseStorage(ABC):
+    """
+    Базовый класс для всех хранилищ прокси.
+
+    Хранилище отвечает только за данные: добавление, обновление статусов,
+    выборку рабочих прокси, статистику и очистку. Логика выбора и
+    логирование остаются в ProxyManager.
+    """
+
+    #: Короткое имя движка, используется в create_storage() и бенчмарках
+    name = 'base'
+
+    def __init__(self):
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    @abstractmethod
+    def setup(self) -> None:
+        """Подготавливает хранилище к работе (схема, индексы)."""
+        pass
+
+    @abstractmethod
+    def add_proxy(self, proxy: Proxy, source: Optional[str] = None) -> int:
+        """
+        Добавляет прокси, если его еще нет.
+
+        Args:
+            proxy: Объект Proxy для добавления
+            source: Имя источника; связь с ним запоминается и для уже
+                существующего прокси
+
+        Returns:
+            int: ID нового или уже существующего прокси
+        """
+        pass
+
+    @abstractmethod
+    def add_proxies(self, proxies: Iterable[Proxy], source: Optional[str] = None) -> int:
+        """
+        Добавляет пачку прокси, пропуская уже существующие.
+
+        Args:
+            proxies: Прокси для добавления
+            source: Имя источника; связь с ним запоминается и для уже
+                существующих прокси
+
+        Returns:
+            int: Количество действительно добавленных прокси
+        """
+        pass
+
+    @abstractmethod
+    def get_proxy_by_id(self, proxy_id: int) -> Optional[Proxy]:
+        """Возвращает прокси по ID или None."""
+        pass
+
+    @abstractmethod
+    def update_proxy_status(self, proxy: Proxy) -> None:
+        """
+        Сохраняет status, response_time и protocol прокси, обновляя last_check.
+        Список protocols и exit_ip сохраняются, только если они не None.
+        Замеренные фазы proxy.phases сглаживаются с сохраненными (smooth_phase).
+        """
+        pass
+
+    @abstractmethod
+    def update_proxy_statuses(self, proxies: Iterable[Proxy]) -> None:
+        """Пакетный вариант update_proxy_status."""
+        pass
+
+    @abstractmethod
+    def update_bandwidth(self, proxies: Iterable[Proxy]) -> None:
+        """Сохраняет bandwidth и ttfb прокси, не меняя статус и дату проверки."""
+        pass
+
+    @abstractmethod
+    def mark_failed(self, proxy_id: int) -> None:
+        """Помечает прокси с указанным ID как нерабочий."""
+        pass
+
+    @abstractmethod
+    def mark_all_outdated(self) -> None:
+        """Помечает все прокси как устаревшие."""
+        pass
+
+    @abstractmethod
+    def count_working(self, min_collection_date: datetime) -> int:
+        """Количество актуальных рабочих прокси, собранных после указанной даты."""
+        pass
+
+    @abstractmethod
+    def get_working(
+        self,
+        limit: int,
+        min_last_check: Optional[datetime] = None,
+        min_collection_date: Optional[datetime] = None,
+        random_order: bool = False,
+        country: Optional[str] = None,
+        anonymity: Optional[str] = None,
+        protocol: Optional[str] = None,
+        target: Optional[str] = None,
+        min_target_check: Optional[datetime] = None,
+        by_bandwidth: bool = False,
+        min_bandwidth: Optional[float] = None,
+        by_connect_time: bool = False
+    ) -> List[Proxy]:
+        """
+        Возвращает актуальные рабочие прокси.
+
+        Args:
+            limit: Максимальное количество прокси
+            min_last_check: Нижняя граница даты последней проверки
+            min_collection_date: Нижняя граница даты сбора
+            random_order: Случайный порядок вместо сортировки по response_time
+            country: Только прокси из этой страны (код, например 'US')
+            anonymity: Только прокси с этим уровнем анонимности
+            protocol: Только прокси с этим основным протоколом
+            target: Только прокси, успешно проверенные на этой цели
+            min_target_check: Нижняя граница даты проверки на цели
+            by_bandwidth: Только прокси с замеренной скоростью, от большей
+                пропускной способности к меньшей
+            min_bandwidth: Только прокси с пропускной способностью не ниже
+                этой (байт в секунду)
+            by_connect_time: Только прокси с замеренными фазами, от меньшего
+                времени соединения с прокси к большему
+
+        Returns:
+            List[Proxy]: Прокси, по умолчанию от самого быстрого к медленному
+        """
+        pass
+
+    @abstractmethod
+    def get_unchecked(self, limit: int) -> List[Proxy]:
+        """Возвращает непроверенные актуальные прокси."""
+        pass
+
+    @abstractmethod
+    def get_by_exit_ip(self, exit_ip: str) -> List[Proxy]:
+        """Возвращает актуальные прокси с этим внешним адресом, от быстрого к медленному."""
+        pass
+
+    @abstractmethod
+    def get_unchecked_from_source(self, source: str, limit: int) -> List[Proxy]:
+        """Возвращает непроверенные актуальные прокси, полученные из источника."""
+        pass
+
+    @abstractmethod
+    def get_source_stats(self) -> List[SourceStats]:
+        """
+        Возвращает счетчики всех источников.
+
+        collected - сколько раз источник дал прокси (накопительно),
+        checked/working и время ответа - по первой проверке его прокси.
+        """
+        pass
+
+    def get_unchecked_by_yield(self, limit: int) -> List[Proxy]:
+        """
+        Непроверенные прокси, начиная с источников с наибольшей долей рабочих.
+
+        Источники упорядочены по SourceStats.score, при равной оценке
+        вперед идет источник с меньшим временем ответа. Прокси, который
+        пришел из нескольких источников, берется один раз; остаток лимита
+        добирается прокси без известного источника.
+        """
+        sources = sorted(
+            self.get_source_stats(),
+            key=lambda s: (-s.score, s.avg_response_time is None, s.avg_response_time or 0.0)
+        )
+        result: List[Proxy] = []
+        seen = set()
+
+        def take(proxies: List[Proxy]) -> None:
+            for proxy in proxies:
+                key = (proxy.ip, int(proxy.port))
+                if key not in seen and len(result) < limit:
+                    seen.add(key)
+                    result.append(proxy)
+
+        # Среди limit прокси источника не больше len(result) уже взятых,
+        # поэтому запроса limit строк хватает, чтобы добрать остаток
+        for source in sources:
+            if len(result) >= limit:
+                break
+            take(self.get_unchecked_from_source(source.name, limit))
+        if len(result) < limit:
+            take(self.get_unchecked(limit))
+        return result
+
+    @abstractmethod
+    def save_target(self, target: Target) -> None:
+        """Сохраняет описание цели, заменяя прежнее; результаты цели не меняются."""
+        pass
+
+    @abstractmethod
+    def get_targets(self) -> List[Target]:
+        """Сохраненные описания целей."""
+        pass
+
+    @abstractmethod
+    def record_target_results(self, target: str, results: Iterable[TargetResult]) -> None:
+        """
+        Сохраняет результаты проверки прокси на цели, заменяя прежние.
+        Результаты для прокси, которых нет в хранилище, пропускаются.
+        """
+        pass
+
+    @abstractmethod
+    def get_target_candidates(
+        self,
+        target: str,
+        limit: int,
+        min_checked: datetime,
+        protocols: Optional[Sequence[str]] = None
+    ) -> List[Proxy]:
+        """
+        Возвращает рабочие прокси без результата на цели новее min_checked,
+        от самого быстрого к медленному; с protocols - только этих протоколов.
+        """
+        pass
+
+    @abstractmethod
+    def get_statistics(self) -> dict:
+        """
+        Возвращает статистику по прокси из счетчиков, которые обновляются
+        при записи, без прохода по всем записям.
+
+        Returns:
+            dict: Ключи total, working, failed, unchecked, outdated,
+                avg_response_time, oldest_proxy, latest_check и phases -
+                средние сглаженные длительности фаз проверки рабочих прокси
+        """
+        pass
+
+    @abstractmethod
+    def recompute_statistics(self) -> dict:
+        """
+        Считает ту же статистику полным проходом по данным.
+        Используется для проверки согласованности счетчиков.
+        """
+        pass
+
+    @abstractmethod
+    def cleanup(self, min_date: datetime) -> int:
+        """
+        Удаляет прокси, собранные до min_date, и нерабочие прокси,
+        проверенные до min_date.
+
+        Returns:
+            int: Количество удаленных записей
+        """
+        pass
+
+    @abstractmethod
+    def get_id_range(self) -> Tuple[Optional[int], Optional[int]]:
+        """Возвращает (минимальный, максимальный) ID записей или (None, None)."""
+        pass
+
+    @abstractmethod
+    def cleanup_range(self, min_date: datetime, first_id: int, last_id: int) -> int:
+        """
+        Вариант cleanup, ограниченный диапазоном ID [first_id, last_id].
+        Позволяет удалять старые записи небольшими пачками.
+
+        Returns:
+            int: Количество удаленных записей
+        """
+        pass
+
+    def incremental_vacuum(self, pages: int) -> int:
+        """
+        Возвращает системе до pages свободных страниц после удаления.
+
+        Returns:
+            int: Количество освобожденных страниц (0, если не поддерживается)
+        """
+        return 0
+
+    @abstractmethod
+    def working_records(self, limit: Optional[int] = None) -> List[ProxyRecord]:
+        """Возвращает актуальные рабочие прокси в виде ProxyRecord, от быстрого к медленному."""
+        pass
+
+    @abstractmethod
+    def working_page(self, after_id: int, limit: int, records: bool = False) -> Tuple[int, list]:
+        """
+        Порция актуальных рабочих прокси с ID больше after_id, по возрастанию ID.
+
+        Args:
+            after_id: ID последнего прокси предыдущей порции (0 - с начала)
+            limit: Размер порции
+            records: Вернуть ProxyRecord вместо Proxy
+
+        Returns:
+            Tuple[int, list]: ID последнего прокси порции (after_id, если
+                порция пуста) и сами прокси
+        """
+        pass
+
+    @abstractmethod
+    def unchecked_page(self, after_id: int, limit: int, records: bool = False) -> Tuple[int, list]:
+        """
+        Порция непроверенных прокси с ID больше after_id, по возрастанию ID.
+        С records=True прокси возвращаются кортежами (ip, port, protocol).
+        """
+        pass
+
+    def iter_working(self, chunk_size: int = 1000, records: bool = False) -> Iterator:
+        """
+        Обходит актуальные рабочие прокси порциями в порядке добавления.
+
+        Порция выбирается по ключу (ID больше последнего выданного), а не
+        смещением, и читается отдельным коротким запросом: между порциями
+        хранилище свободно для записи. Записи во время обхода не сдвигают
+        порции: каждый прокси выдается не больше одного раза, ставшие
+        нерабочими до своей порции пропускаются, добавленные - выдаются.
+        """
+        return self._pages(self.working_page, chunk_size, records)
+
+    def iter_unchecked(self, chunk_size: int = 1000, records: bool = False) -> Iterator:
+        """
+        Обходит непроверенные прокси порциями в порядке добавления (см. iter_working).
+        Прокси можно проверять по ходу обхода: это не сбивает порции.
+        """
+        return self._pages(self.unchecked_page, chunk_size, records)
+
+    @staticmethod
+    def _pages(page: Callable[[int, int, bool], Tuple[int, list]], chunk_size: int, records: bool) -> Iterator:
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be positive")
+
+        def walk():
+            after_id = 0
+            while True:
+                after_id, chunk = page(after_id, chunk_size, records)
+                yield from chunk
+                if len(chunk) < chunk_size:
+                    return
+
+        return walk()
+
+    def aiter_working(self, chunk_size: int = 1000, records: bool = False) -> AsyncIterator:
+        """Асинхронный вариант iter_working: порции читаются в пуле потоков."""
+        return self._apages(self.working_page, chunk_size, records)
+
+    def aiter_unchecked(self, chunk_size: int = 1000, records: bool = False) -> AsyncIterator:
+        """Асинхронный вариант iter_unchecked."""
+        return self._apages(self.unchecked_page, chunk_size, records)
+
+    @staticmethod
+    def _apages(page: Callable[[int, int, bool], Tuple[int, list]], chunk_size: int, records: bool) -> AsyncIterator:
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be positive")
+
+        async def walk():
+            import asyncio  # отложенный импорт ускоряет старт коротких задач
+
+            loop = asyncio.get_running_loop()
+            after_id = 0
+            while True:
+                after_id, chunk = await loop.run_in_executor(None, page, after_id, chunk_size, records)
+                for item in chunk:
+                    yield item
+                if len(chunk) < chunk_size:
+                    return
+
+        return walk()
+
+    @abstractmethod
+    def restore_working(self, records: Iterable[ProxyRecord]) -> int:
+        """
+        Загружает рабочие прокси вместе с датами проверки и сбора.
+        Существующая запись обновляется, только если ее проверка старее.
+
+        Returns:
+            int: Количество добавленных или обновленных записей
+        """
+        pass
@@ -0,0 +1,682 @@
+import bisect
+import random
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from .base import (
+    PHASE_COLUMNS, BaseStorage, ProxyRecord, SourceStats, TargetResult, clean_anonymity, clean_asn,
+    clean_country, from_epoch, parse_port, phases_from_row, phases_statistics, smooth_phase, to_epoch
+)
+from ..proxy import Proxy
+from ..targets import Target
+
+# Колонки, по которым рабочие прокси раскладываются по корзинам
+FILTER_COLUMNS = ('country', 'anonymity', 'protocol')
+
+
+class MemoryStorage(BaseStorage):
+    """
+    Хранилище прокси в памяти процесса.
+
+    Подходит для коротких задач и тестов. Рабочие прокси держатся в
+    отсортированном по response_time индексе, непроверенные - в отдельном
+    упорядоченном индексе, поэтому выборки не проходят по всем записям.
+    Для выборки с фильтром рабочие прокси дополнительно разложены по
+    корзинам (колонка, значение) с той же сортировкой.
+    """
+
+    name = 'memory'
+
+    def __init__(self):
+        super().__init__()
+        self._lock = threading.RLock()
+        self._rows: Dict[int, dict] = {}
+        self._ids: Dict[Tuple[str, int], int] = {}
+        self._next_id = 1
+        # (response_time, id) для актуальных рабочих прокси
+        self._working: List[Tuple[float, int]] = []
+        # (колонка, значение) -> (response_time, id) рабочих прокси с этим значением
+        self._buckets: Dict[Tuple[str, str], List[Tuple[float, int]]] = {}
+        # Непроверенные актуальные прокси в порядке добавления
+        self._unchecked: Dict[int, None] = {}
+        # Счетчики статистики, обновляются при каждой записи
+        self._counters = dict.fromkeys(
+            ('total', 'working', 'failed', 'unchecked', 'outdated', 'working_rt_count'), 0
+        )
+        self._counters['working_rt_sum'] = 0.0
+        for column in PHASE_COLUMNS:
+            self._counters[f'working_{column}_sum'] = 0.0
+            self._counters[f'working_{column}_count'] = 0
+        # Источники: имя -> счетчики SourceStats, имя -> ID его прокси
+        # в порядке связывания, ID прокси -> имена его источников
+        self._sources: Dict[str, dict] = {}
+        self._source_members: Dict[str, Dict[int, None]] = {}
+        self._proxy_sources: Dict[int, List[str]] = {}
+        # Внешний адрес -> ID прокси с ним
+        self._exit_ips: Dict[str, Dict[int, None]] = {}
+        # Цель -> ID прокси -> (успех, время проверки)
+        self._targets: Dict[str, Dict[int, Tuple[bool, int]]] = {}
+        # Имя цели -> ее описание
+        self._target_definitions: Dict[str, Target] = {}
+        self._latest_check: Optional[int] = None
+        self._oldest: Optional[int] = None
+        # В режиме пакетной загрузки _working досортировывается в конце
+        self._bulk = False
+
+    def setup(self) -> None:
+        """Хранилищу в памяти подготовка не требуется."""
+        pass
+
+    @staticmethod
+    def _key(ip: str, port) -> Tuple[str, int]:
+        return ip, int(port)
+
+    @staticmethod
+    def _sort_key(row: dict) -> Tuple[float, int]:
+        # NULL в SQLite сортируется раньше любых чисел
+        rt = row['response_time']
+        return (rt if rt is not None else float('-inf'), row['id'])
+
+    @staticmethod
+    def _row_to_proxy(row: dict) -> Proxy:
+        proxy = Proxy(
+            ip=row['ip'], port=row['port'], protocol=row['protocol'],
+            country=row['country'], anonymity=row['anonymity'], asn=row['asn']
+        )
+        proxy.status = row['status']
+        proxy.response_time = row['response_time']
+        proxy.last_check = from_epoch(row['last_check'])
+        proxy.collection_date = from_epoch(row['collection_date'])
+        proxy.exit_ip = row['exit_ip']
+        proxy.bandwidth = row['bandwidth']
+        proxy.ttfb = row['ttfb']
+        proxy.phases = phases_from_row(row[column] for column in PHASE_COLUMNS)
+        if row['protocols'] is not None:
+            proxy.protocols = list(row['protocols'])
+        return proxy
+
+    def _working_lists(self, row: dict, create: bool = False) -> List[List[Tuple[float, int]]]:
+        """Общий индекс рабочих прокси и корзины, в которые попадает строка."""
+        lists = [self._working]
+        for column in FILTER_COLUMNS:
+            value = row[column]
+            if value is None:
+                continue
+            bucket = self._buckets.get((column, value))
+            if bucket is None and create:
+                bucket = self._buckets[(column, value)] = []
+            if bucket is not None:
+                lists.append(bucket)
+        return lists
+
+    def _index(self, row: dict) -> None:
+        if row['is_outdated']:
+            return
+        if row['status'] == 'working':
+            key = self._sort_key(row)
+            for working in self._working_lists(row, create=True):
+                if self._bulk:
+                    working.append(key)
+                else:
+                    bisect.insort(working, key)
+        elif row['status'] is None:
+            self._unchecked[row['id']] = None
+
+    def _unindex(self, row: dict) -> None:
+        if row['status'] == 'working' and not row['is_outdated']:
+            key = self._sort_key(row)
+            for working in self._working_lists(row):
+                if self._bulk:
+                    working.remove(key)
+                else:
+                    pos = bisect.bisect_left(working, key)
+                    if pos < len(working) and working[pos] == key:
+                        del working[pos]
+        self._unchecked.pop(row['id'], None)
+
+    def _count(self, row: dict, sign: int) -> None:
+        """Прибавляет (sign=1) или вычитает (sign=-1) вклад строки в счетчики."""
+        counters = self._counters
+        counters['total'] += sign
+        status = row['status']
+        if status == 'working':
+            counters['working'] += sign
+            if row['response_time'] is not None:
+                counters['working_rt_sum'] += sign * row['response_time']
+                counters['working_rt_count'] += sign
+            for column in PHASE_COLUMNS:
+                if row[column] is not None:
+                    counters[f'working_{column}_sum'] += sign * row[column]
+                    counters[f'working_{column}_count'] += sign
+        elif status == 'failed':
+            counters['failed'] += sign
+        elif status is None:
+            counters['unchecked'] += sign
+        if row['is_outdated']:
+            counters['outdated'] += sign
+
+    def _insert(self, proxy: Proxy, now: int) -> Tuple[int, bool]:
+        key = (proxy.ip, parse_port(proxy.port))
+        proxy_id = self._ids.get(key)
+        if proxy_id is not None:
+            return proxy_id, False
+
+        proxy_id = self._next_id
+        self._next_id += 1
+        row = {
+            'id': proxy_id,
+            'ip': proxy.ip,
+            'port': key[1],
+            'protocol': proxy.protocol,
+            'status': None,
+            'response_time': None,
+            'last_check': None,
+            'collection_date': now,
+            'is_outdated': 0,
+            'protocols': None,
+            'country': clean_country(getattr(proxy, 'country', None)),
+            'anonymity': clean_anonymity(getattr(proxy, 'anonymity', None)),
+            'asn': clean_asn(getattr(proxy, 'asn', None)),
+            'exit_ip': None,
+            'bandwidth': None,
+            'ttfb': None,
+            **dict.fromkeys(PHASE_COLUMNS),
+        }
+        self._rows[proxy_id] = row
+        self._ids[key] = proxy_id
+        self._index(row)
+        self._count(row, 1)
+        if self._oldest is None or now < self._oldest:
+            self._oldest = now
+        return proxy_id, True
+
+    def _link(self, proxy_id: int, source: str) -> None:
+        """Связывает прокси с источником, заводя источник при первой встрече."""
+        members = self._source_members.get(source)
+        if members is None:
+            members = self._source_members[source] = {}
+            self._sources[source] = dict.fromkeys(
+                ('collected', 'checked', 'working', 'working_rt_count'), 0
+            )
+            self._sources[source]['working_rt_sum'] = 0.0
+        if proxy_id not in members:
+            members[proxy_id] = None
+            self._proxy_sources.setdefault(proxy_id, []).append(source)
+            self._sources[source]['collected'] += 1
+
+    def _count_first_check(self, row: dict) -> None:
+        """Учитывает первую проверку прокси в счетчиках его источников."""
+        working = row['status'] == 'working'
+        for source in self._proxy_sources.get(row['id'], ()):
+            counters = self._sources[source]
+            counters['checked'] += 1
+            if working:
+                counters['working'] += 1
+                if row['response_time'] is not None:
+                    counters['working_rt_sum'] += row['response_time']
+                    counters['working_rt_count'] += 1
+
+    def _replace(self, row: dict, **fields) -> None:
+        """Меняет поля строки, поддерживая индексы и счетчики."""
+        unchecked = row['status'] is None
+        self._unindex(row)
+        self._count(row, -1)
+        row.update(fields)
+        self._index(row)
+        self._count(row, 1)
+        if unchecked and row['status'] is not None:
+            self._count_first_check(row)
+        now = row['last_check']
+        if now is not None and (self._latest_check is None or now > self._latest_check):
+            self._latest_check = now
+
+    def _set_exit_ip(self, row: dict, exit_ip: Optional[str]) -> None:
+        if row['exit_ip'] is not None:
+            group = self._exit_ips[row['exit_ip']]
+            del group[row['id']]
+            if not group:
+                del self._exit_ips[row['exit_ip']]
+        row['exit_ip'] = exit_ip
+        if exit_ip is not None:
+            self._exit_ips.setdefault(exit_ip, {})[row['id']] = None
+
+    def _set_status(self, row: dict, status: Optional[str], response_time, now: int, **fields) -> None:
+        self._replace(row, status=status, response_time=response_time, last_check=now, **fields)
+
+    def add_proxy(self, proxy: Proxy, source: Optional[str] = None) -> int:
+        with self._lock:
+            proxy_id = self._insert(proxy, to_epoch(datetime.now()))[0]
+            if source is not None:
+                self._link(proxy_id, source)
+            return proxy_id
+
+    def add_proxies(self, proxies: Iterable[Proxy], source: Optional[str] = None) -> int:
+        now = to_epoch(datetime.now())
+        added = 0
+        with self._lock:
+            for proxy in proxies:
+                try:
+                    proxy_id, new = self._insert(proxy, now)
+                except (TypeError, ValueError):
+                    self.logger.debug(f"Skipping proxy with invalid port: {proxy.ip}:{proxy.port}")
+                    continue
+                added += new
+                if source is not None:
+                    self._link(proxy_id, source)
+            return added
+
+    def get_proxy_by_id(self, proxy_id: int) -> Optional[Proxy]:
+        with self._lock:
+            row = self._rows.get(proxy_id)
+            return self._row_to_proxy(row) if row else None
+
+    def update_proxy_status(self, proxy: Proxy) -> None:
+        self.update_proxy_statuses([proxy])
+
+    def update_proxy_statuses(self, proxies: Iterable[Proxy]) -> None:
+        now = to_epoch(datetime.now())
+        with self._lock:
+            for proxy in proxies:
+                proxy_id = self._ids.get(self._key(proxy.ip, proxy.port))
+                if proxy_id is None:
+                    continue
+                row = self._rows[proxy_id]
+                if proxy.protocols is not None:
+                    row['protocols'] = tuple(proxy.protocols)
+                exit_ip = getattr(proxy, 'exit_ip', None)
+                if exit_ip is not None and exit_ip != row['exit_ip']:
+                    self._set_exit_ip(row, exit_ip)
+                phases = getattr(proxy, 'phases', None) or ()
+                self._set_status(
+                    row, proxy.status, proxy.response_time, now, protocol=proxy.protocol,
+                    **{column: smooth_phase(row[column], value)
+                       for column, value in zip(PHASE_COLUMNS, phases)}
+                )
+
+    def update_bandwidth(self, proxies: Iterable[Proxy]) -> None:
+        with self._lock:
+            for proxy in proxies:
+                proxy_id = self._ids.get(self._key(proxy.ip, proxy.port))
+                if proxy_id is not None:
+                    self._rows[proxy_id].update(bandwidth=proxy.bandwidth, ttfb=proxy.ttfb)
+
+    def mark_failed(self, proxy_id: int) -> None:
+        with self._lock:
+            row = self._rows.get(proxy_id)
+            if row:
+                self._set_status(row, 'failed', row['response_time'], to_epoch(datetime.now()))
+
+    def mark_all_outdated(self) -> None:
+        with self._lock:
+            for row in self._rows.values():
+                row['is_outdated'] = 1
+            self._counters['outdated'] = self._counters['total']
+            self._working.clear()
+            self._buckets.clear()
+            self._unchecked.clear()
+
+    def count_working(self, min_collection_date: datetime) -> int:
+        min_date = to_epoch(min_collection_date)
+        with self._lock:
+            return sum(
+                1 for _, proxy_id in self._working
+                if self._rows[proxy_id]['collection_date'] > min_date
+            )
+
+    @staticmethod
+    def _matches(row: dict, min_last_check: Optional[int], min_collection_date: Optional[int]) -> bool:
+        if min_last_check is not None:
+            if row['last_check'] is None or row['last_check'] <= min_last_check:
+                return False
+        if min_collection_date is not None and row['collection_date'] <= min_collection_date:
+            return False
+        return True
+
+    def get_working(
+        self,
+        limit: int,
+        min_last_check: Optional[datetime] = None,
+        min_collection_date: Optional[datetime] = None,
+        random_order: bool = False,
+        country: Optional[str] = None,
+        anonymity: Optional[str] = None,
+        protocol: Optional[str] = None,
+        target: Optional[str] = None,
+        min_target_check: Optional[datetime] = None,
+        by_bandwidth: bool = False,
+        min_bandwidth: Optional[float] = None,
+        by_connect_time: bool = False
+    ) -> List[Proxy]:
+        if min_last_check is not None:
+            min_last_check = to_epoch(min_last_check)
+        min_target_check = to_epoch(min_target_check) if min_target_check is not None else None
+        if min_collection_date is not None:
+            min_collection_date = to_epoch(min_collection_date)
+        filters = [
+            (column, value)
+            for column, value in zip(
+                FILTER_COLUMNS, (clean_country(country), clean_anonymity(anonymity), protocol)
+            )
+            if value is not None
+        ]
+        with self._lock:
+            # Обходим самую маленькую из подходящих корзин, остальные
+            # фильтры проверяем по строке
+            working = min(
+                (self._buckets.get(key, []) for key in filters),
+                key=len, default=self._working
+            )
+
+            results = self._targets.get(target, {}) if target is not None else None
+
+            def matches(row):
+                if by_connect_time and row['connect_time'] is None:
+                    return False
+                if by_bandwidth or min_bandwidth is not None:
+                    bandwidth = row['bandwidth']
+                    if bandwidth is None or (min_bandwidth is not None and bandwidth < min_bandwidth):
+                        return False
+                if results is not None:
+                    ok, checked_at = results.get(row['id'], (False, 0))
+                    if not ok or (min_target_check is not None and checked_at <= min_target_check):
+                        return False
+                return self._matches(row, min_last_check, min_collection_date) and all(
+                    row[column] == value for column, value in filters
+                )
+
+            if random_order:
+                candidates = [
+                    self._rows[proxy_id] for _, proxy_id in working
+                    if matches(self._rows[proxy_id])
+                ]
+                rows = random.sample(candidates, min(limit, len(candidates)))
+            elif by_bandwidth or by_connect_time:
+                # Замеренных прокси немного: сортируем их, а не держим отдельный индекс
+                if by_bandwidth:
+                    def order(row):
+                        return -row['bandwidth']
+                else:
+                    def order(row):
+                        return row['connect_time']
+                rows = sorted(
+                    (self._rows[proxy_id] for _, proxy_id in working if matches(self._rows[proxy_id])),
+                    key=order
+                )[:limit]
+            else:
+                rows = []
+                for _, proxy_id in working:
+                    if len(rows) >= limit:
+                        break
+                    row = self._rows[proxy_id]
+                    if matches(row):
+                        rows.append(row)
+            return [self._row_to_proxy(row) for row in rows]
+
+    def get_unchecked(self, limit: int) -> List[Proxy]:
+        with self._lock:
+            result = []
+            for proxy_id in self._unchecked:
+                if len(result) >= limit:
+                    break
+                row = self._rows[proxy_id]
+                result.append(Proxy(ip=row['ip'], port=row['port'], protocol=row['protocol']))
+            return result
+
+    def get_by_exit_ip(self, exit_ip: str) -> List[Proxy]:
+        with self._lock:
+            rows = [self._rows[proxy_id] for proxy_id in self._exit_ips.get(exit_ip, ())]
+            rows = [row for row in rows if not row['is_outdated']]
+            rows.sort(key=self._sort_key)
+            return [self._row_to_proxy(row) for row in rows]
+
+    def get_unchecked_from_source(self, source: str, limit: int) -> List[Proxy]:
+        with self._lock:
+            result = []
+            for proxy_id in self._source_members.get(source, ()):
+                if len(result) >= limit:
+                    break
+                if proxy_id in self._unchecked:
+                    row = self._rows[proxy_id]
+                    result.append(Proxy(ip=row['ip'], port=row['port'], protocol=row['protocol']))
+            return result
+
+    def get_source_stats(self) -> List[SourceStats]:
+        with self._lock:
+            return [
+                SourceStats(
+                    name, counters['collected'], counters['checked'], counters['working'],
+                    counters['working_rt_sum'], counters['working_rt_count']
+                )
+                for name, counters in self._sources.items()
+            ]
+
+    def save_target(self, target: Target) -> None:
+        with self._lock:
+            self._target_definitions[target.name] = target
+
+    def get_targets(self) -> List[Target]:
+        with self._lock:
+            return list(self._target_definitions.values())
+
+    def record_target_results(self, target: str, results: Iterable[TargetResult]) -> None:
+        now = to_epoch(datetime.now())
+        with self._lock:
+            matrix = self._targets.setdefault(target, {})
+            for result in results:
+                proxy_id = self._ids.get(self._key(result.ip, result.port))
+                if proxy_id is not None:
+                    matrix[proxy_id] = (bool(result.ok), now)
+
+    def get_target_candidates(
+        self,
+        target: str,
+        limit: int,
+        min_checked: datetime,
+        protocols: Optional[Sequence[str]] = None
+    ) -> List[Proxy]:
+        min_checked = to_epoch(min_checked)
+        with self._lock:
+            results = self._targets.get(target, {})
+            rows = []
+            for _, proxy_id in self._working:
+                if len(rows) >= limit:
+                    break
+                row = self._rows[proxy_id]
+                if protocols and row['protocol'] not in protocols:
+                    continue
+                result = results.get(proxy_id)
+                if result is None or result[1] <= min_checked:
+                    rows.append(row)
+            return [self._row_to_proxy(row) for row in rows]
+
+    def get_statistics(self) -> dict:
+        with self._lock:
+            counters = self._counters
+            avg = (
+                counters['working_rt_sum'] / counters['working_rt_count']
+                if counters['working_rt_count'] else None
+            )
+            phases = [
+                counters[f'working_{column}_sum'] / counters[f'working_{column}_count']
+                if counters[f'working_{column}_count'] else None
+                for column in PHASE_COLUMNS
+            ]
+            return self._statistics(
+                counters['total'], counters['working'], counters['failed'],
+                counters['unchecked'], counters['outdated'],
+                avg, self._oldest, self._latest_check, phases
+            )
+
+    def recompute_statistics(self) -> dict:
+        with self._lock:
+            rows = list(self._rows.values())
+            working_times = [
+                row['response_time'] for row in rows
+                if row['status'] == 'working' and row['response_time'] is not None
+            ]
+            collection_dates = [row['collection_date'] for row in rows]
+            last_checks = [row['last_check'] for row in rows if row['last_check'] is not None]
+            phases = []
+            for column in PHASE_COLUMNS:
+                values = [
+                    row[column] for row in rows
+                    if row['status'] == 'working' and row[column] is not None
+                ]
+                phases.append(sum(values) / len(values) if values else None)
+            return self._statistics(
+                len(rows),
+                sum(1 for row in rows if row['status'] == 'working'),
+                sum(1 for row in rows if row['status'] == 'failed'),
+                sum(1 for row in rows if row['status'] is None),
+                sum(1 for row in rows if row['is_outdated']),
+                sum(working_times) / len(working_times) if working_times else None,
+                min(collection_dates) if collection_dates else None,
+                max(last_checks) if last_checks else None,
+                phases
+            )
+
+    @staticmethod
+    def _statistics(total, working, failed, unchecked, outdated, avg, oldest, latest, phases) -> dict:
+        return {
+            'total': total,
+            'working': working,
+            'failed': failed,
+            'unchecked': unchecked,
+            'outdated': outdated,
+            'avg_response_time': round(avg, 3) if avg else None,
+            'oldest_proxy': from_epoch(oldest),
+            'latest_check': from_epoch(latest),
+            'phases': phases_statistics(phases)
+        }
+
+    @staticmethod
+    def _expired(row: dict, min_date: int) -> bool:
+        return (
+            row['collection_date'] < min_date
+            or (row['status'] == 'failed' and row['last_check'] is not None
+                and row['last_check'] < min_date)
+        )
+
+    def _delete(self, row: dict) -> None:
+        self._unindex(row)
+        self._count(row, -1)
+        del self._rows[row['id']]
+        del self._ids[self._key(row['ip'], row['port'])]
+        for source in self._proxy_sources.pop(row['id'], ()):
+            del self._source_members[source][row['id']]
+        self._set_exit_ip(row, None)
+        for results in self._targets.values():
+            results.pop(row['id'], None)
+
+    def _refresh_bounds(self, removed: List[dict]) -> None:
+        """Пересчитывает крайние даты, если удалена запись, которая их задавала."""
+        if any(row['last_check'] == self._latest_check for row in removed):
+            self._latest_check = max(
+                (row['last_check'] for row in self._rows.values() if row['last_check'] is not None),
+                default=None
+            )
+        if any(row['collection_date'] == self._oldest for row in removed):
+            self._oldest = min((row['collection_date'] for row in self._rows.values()), default=None)
+
+    def cleanup(self, min_date: datetime) -> int:
+        min_date = to_epoch(min_date)
+        with self._lock:
+            expired = [row for row in self._rows.values() if self._expired(row, min_date)]
+            for row in expired:
+                self._delete(row)
+            self._refresh_bounds(expired)
+            return len(expired)
+
+    def get_id_range(self) -> Tuple[Optional[int], Optional[int]]:
+        with self._lock:
+            if not self._rows:
+                return None, None
+            # ID выдаются по возрастанию, а dict хранит порядок вставки
+            return next(iter(self._rows)), next(reversed(self._rows))
+
+    def cleanup_range(self, min_date: datetime, first_id: int, last_id: int) -> int:
+        min_date = to_epoch(min_date)
+        with self._lock:
+            expired = []
+            for proxy_id in range(first_id, last_id + 1):
+                row = self._rows.get(proxy_id)
+                if row is not None and self._expired(row, min_date):
+                    self._delete(row)
+                    expired.append(row)
+            self._refresh_bounds(expired)
+            return len(expired)
+
+    @staticmethod
+    def _row_to_record(row: dict) -> ProxyRecord:
+        return ProxyRecord(
+            row['ip'], row['port'], row['protocol'], row['response_time'],
+            row['last_check'], row['collection_date']
+        )
+
+    def working_records(self, limit: Optional[int] = None) -> List[ProxyRecord]:
+        with self._lock:
+            working = self._working if limit is None else self._working[:limit]
+            return [self._row_to_record(self._rows[proxy_id]) for _, proxy_id in working]
+
+    def _page(self, after_id: int, limit: int, matches) -> Tuple[int, List[dict]]:
+        """Строки с ID больше after_id, подходящие под matches; ID выдаются по возрастанию."""
+        rows = []
+        for proxy_id in range(after_id + 1, self._next_id):
+            if len(rows) >= limit:
+                break
+            row = self._rows.get(proxy_id)
+            if row is not None and matches(row):
+                rows.append(row)
+        return (rows[-1]['id'] if rows else after_id), rows
+
+    def working_page(self, after_id: int, limit: int, records: bool = False) -> Tuple[int, list]:
+        with self._lock:
+            last_id, rows = self._page(
+                after_id, limit, lambda row: row['status'] == 'working' and not row['is_outdated']
+            )
+            make = self._row_to_record if records else self._row_to_proxy
+            return last_id, [make(row) for row in rows]
+
+    def unchecked_page(self, after_id: int, limit: int, records: bool = False) -> Tuple[int, list]:
+        with self._lock:
+            last_id, rows = self._page(after_id, limit, lambda row: row['id'] in self._unchecked)
+            if records:
+                return last_id, [(row['ip'], row['port'], row['protocol']) for row in rows]
+            return last_id, [
+                Proxy(ip=row['ip'], port=row['port'], protocol=row['protocol']) for row in rows
+            ]
+
+    def restore_working(self, records: Iterable[ProxyRecord]) -> int:
+        with self._lock:
+            self._bulk = True
+            try:
+                restored = self._restore(records)
+            finally:
+                self._bulk = False
+                self._working.sort()
+                for bucket in self._buckets.values():
+                    bucket.sort()
+            return restored
+
+    def _restore(self, records: Iterable[ProxyRecord]) -> int:
+        restored = 0
+        for record in records:
+            # В снимке дата сбора может отсутствовать: без нее сравнения
+            # в cleanup и count_working падали бы на None
+            collected = record.collection_date or record.last_check or to_epoch(datetime.now())
+            proxy_id, _ = self._insert(record, collected)
+            row = self._rows[proxy_id]
+            if row['last_check'] is not None and (
+                record.last_check is None or row['last_check'] >= record.last_check
+            ):
+                continue
+            self._replace(
+                row,
+                protocol=record.protocol,
+                status='working',
+                response_time=record.response_time,
+                last_check=record.last_check,
+                is_outdated=0
+            )
+            restored += 1
+        return restored
@@ -0,0 +1,453 @@
+"""
+Версионированные миграции схемы SQLite.
+
+Версия схемы хранится в PRAGMA user_version. Каждая миграция применяется
+один раз, в порядке возрастания версии, в отдельной транзакции.
+"""
+
+import logging
+import sqlite3
+from typing import Callable, List, Tuple
+from .base import PHASE_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+
+def _initial_schema(conn: sqlite3.Connection) -> None:
+    """Исходная схема: текстовые даты и порт, одиночные индексы."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS proxies (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ip TEXT NOT NULL,
+            port TEXT NOT NULL,
+            protocol TEXT NOT NULL,
+            status TEXT,
+            response_time REAL,
+            last_check TEXT,
+            collection_date TEXT,
+            is_outdated INTEGER DEFAULT 0,
+            UNIQUE(ip, port)
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_proxies_status ON proxies(status)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_proxies_is_outdated ON proxies(is_outdated)")
+
+
+def _numeric_columns_and_selection_indexes(conn: sqlite3.Connection) -> None:
+    """
+    Переводит порт в INTEGER, даты в секунды Unix-времени и заменяет
+    одиночные индексы на частичные покрывающие под запросы выборки.
+    """
+    conn.execute("""
+        CREATE TABLE proxies_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ip TEXT NOT NULL,
+            port INTEGER NOT NULL,
+            protocol TEXT NOT NULL,
+            status TEXT,
+            response_time REAL,
+            last_check INTEGER,
+            collection_date INTEGER,
+            is_outdated INTEGER DEFAULT 0,
+            UNIQUE(ip, port)
+        )
+    """)
+    # Старые даты записаны datetime.now().isoformat(), то есть в локальном
+    # времени - модификатор 'utc' переводит их в UTC перед '%s'
+    conn.execute("""
+        INSERT OR IGNORE INTO proxies_new
+            (id, ip, port, protocol, status, response_time,
+             last_check, collection_date, is_outdated)
+        SELECT id, ip, CAST(port AS INTEGER), protocol, status, response_time,
+               CAST(strftime('%s', last_check, 'utc') AS INTEGER),
+               CAST(strftime('%s', collection_date, 'utc') AS INTEGER),
+               is_outdated
+        FROM proxies
+    """)
+    conn.execute("DROP TABLE proxies")
+    conn.execute("ALTER TABLE proxies_new RENAME TO proxies")
+
+    # Колонки из условия частичного индекса продублированы в его конце:
+    # иначе SQLite не считает индекс покрывающим и читает строку таблицы.
+
+    # get_working_proxy / get_multiple_working_proxies / get_working_proxies:
+    # обход в порядке response_time без сортировки и без чтения таблицы
+    conn.execute("""
+        CREATE INDEX idx_proxies_working_rt
+        ON proxies(response_time, last_check, collection_date, ip, port, protocol,
+                   status, is_outdated)
+        WHERE status = 'working' AND is_outdated = 0
+    """)
+    # needs_update: подсчет свежих рабочих прокси по диапазону дат
+    conn.execute("""
+        CREATE INDEX idx_proxies_working_collected
+        ON proxies(collection_date, status, is_outdated)
+        WHERE status = 'working' AND is_outdated = 0
+    """)
+    # get_unchecked_proxies
+    conn.execute("""
+        CREATE INDEX idx_proxies_unchecked
+        ON proxies(ip, port, protocol, status, is_outdated)
+        WHERE status IS NULL AND is_outdated = 0
+    """)
+    # cleanup_old_data и MIN/MAX в статистике
+    conn.execute("CREATE INDEX idx_proxies_collection_date ON proxies(collection_date)")
+    conn.execute("CREATE INDEX idx_proxies_last_check ON proxies(last_check)")
+
+
+# Вклад строки в счетчики статистики: (колонка, выражение от строки)
+_STATS_TERMS = [
+    ("total", "1"),
+    ("working", "({row}.status IS 'working')"),
+    ("failed", "({row}.status IS 'failed')"),
+    ("unchecked", "({row}.status IS NULL)"),
+    ("outdated", "({row}.is_outdated IS 1)"),
+    ("working_rt_sum",
+     "(CASE WHEN {row}.status IS 'working' THEN IFNULL({row}.response_time, 0) ELSE 0 END)"),
+    ("working_rt_count",
+     "({row}.status IS 'working' AND {row}.response_time IS NOT NULL)"),
+]
+
+
+# Счетчики фаз проверки рабочих прокси (миграция 11)
+_PHASE_STATS_TERMS = [
+    term
+    for column in PHASE_COLUMNS
+    for term in (
+        (f"working_{column}_sum",
+         f"(CASE WHEN {{row}}.status IS 'working' THEN IFNULL({{row}}.{column}, 0) ELSE 0 END)"),
+        (f"working_{column}_count",
+         f"({{row}}.status IS 'working' AND {{row}}.{column} IS NOT NULL)"),
+    )
+]
+
+
+def _stats_update(*changes: Tuple[str, str], terms=None) -> str:
+    """Строит UPDATE proxy_stats, прибавляя/вычитая вклад строк NEW/OLD."""
+    assignments = []
+    for column, term in terms or _STATS_TERMS:
+        expr = column
+        for sign, row in changes:
+            expr += f" {sign} {term.format(row=row)}"
+        assignments.append(f"{column} = {expr}")
+    return f"UPDATE proxy_stats SET {', '.join(assignments)} WHERE id = 1;"
+
+
+def _incremental_statistics(conn: sqlite3.Connection) -> None:
+    """
+    Счетчики статистики в таблице proxy_stats, которые поддерживаются
+    триггерами при вставке, изменении статуса и удалении прокси.
+    """
+    conn.execute("""
+        CREATE TABLE proxy_stats (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            total INTEGER NOT NULL DEFAULT 0,
+            working INTEGER NOT NULL DEFAULT 0,
+            failed INTEGER NOT NULL DEFAULT 0,
+            unchecked INTEGER NOT NULL DEFAULT 0,
+            outdated INTEGER NOT NULL DEFAULT 0,
+            working_rt_sum REAL NOT NULL DEFAULT 0,
+            working_rt_count INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    conn.execute(f"""
+        INSERT INTO proxy_stats
+        SELECT 1, {', '.join(f"IFNULL(SUM({term.format(row='proxies')}), 0)" for _, term in _STATS_TERMS)}
+        FROM proxies
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER trg_proxies_stats_insert AFTER INSERT ON proxies
+        BEGIN {_stats_update(("+", "NEW"))} END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER trg_proxies_stats_delete AFTER DELETE ON proxies
+        BEGIN {_stats_update(("-", "OLD"))} END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER trg_proxies_stats_update
+        AFTER UPDATE OF status, response_time, is_outdated ON proxies
+        BEGIN {_stats_update(("-", "OLD"), ("+", "NEW"))} END
+    """)
+
+
+def _working_protocols(conn: sqlite3.Connection) -> None:
+    """Протоколы, которые прокси поддерживает по результатам определения."""
+    # Список через запятую, например 'socks5,http'; NULL - не определялись
+    conn.execute("ALTER TABLE proxies ADD COLUMN protocols TEXT")
+
+
+def _country_anonymity_and_filtered_indexes(conn: sqlite3.Connection) -> None:
+    """
+    Страна и уровень анонимности прокси и частичные индексы для выборки
+    рабочих прокси с фильтром по стране, анонимности или протоколу.
+    """
+    conn.execute("ALTER TABLE proxies ADD COLUMN country TEXT")
+    conn.execute("ALTER TABLE proxies ADD COLUMN anonymity TEXT")
+
+    # Выборка теперь возвращает и страну с анонимностью: пересоздаем
+    # основной индекс, чтобы он остался покрывающим
+    conn.execute("DROP INDEX idx_proxies_working_rt")
+    conn.execute("""
+        CREATE INDEX idx_proxies_working_rt
+        ON proxies(response_time, last_check, collection_date, ip, port, protocol,
+                   country, anonymity, status, is_outdated)
+        WHERE status = 'working' AND is_outdated = 0
+    """)
+    # Выборка с фильтром: равенство по первой колонке и обход в порядке
+    # response_time без сортировки; строки таблицы читаются только для LIMIT
+    for column in ('country', 'anonymity', 'protocol'):
+        conn.execute(f"""
+            CREATE INDEX idx_proxies_working_{column}
+            ON proxies({column}, response_time)
+            WHERE status = 'working' AND is_outdated = 0
+        """)
+
+
+def _autonomous_system(conn: sqlite3.Connection) -> None:
+    """Номер автономной системы прокси из офлайн-базы GeoIP."""
+    conn.execute("ALTER TABLE proxies ADD COLUMN asn INTEGER")
+    conn.execute("DROP INDEX idx_proxies_working_rt")
+    conn.execute("""
+        CREATE INDEX idx_proxies_working_rt
+        ON proxies(response_time, last_check, collection_date, ip, port, protocol,
+                   country, anonymity, asn, status, is_outdated)
+        WHERE status = 'working' AND is_outdated = 0
+    """)
+
+
+def _proxy_sources(conn: sqlite3.Connection) -> None:
+    """
+    Источники прокси (многие ко многим) и счетчики источника: сколько
+    прокси он дал и сколько из них оказались рабочими при первой проверке.
+    """
+    conn.execute("""
+        CREATE TABLE sources (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE,
+            collected INTEGER NOT NULL DEFAULT 0,
+            checked INTEGER NOT NULL DEFAULT 0,
+            working INTEGER NOT NULL DEFAULT 0,
+            working_rt_sum REAL NOT NULL DEFAULT 0,
+            working_rt_count INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    # Ключ (source_id, proxy_id) - выборка непроверенных прокси источника
+    conn.execute("""
+        CREATE TABLE proxy_sources (
+            source_id INTEGER NOT NULL,
+            proxy_id INTEGER NOT NULL,
+            PRIMARY KEY (source_id, proxy_id)
+        ) WITHOUT ROWID
+    """)
+    # Триггеры находят источники прокси по proxy_id
+    conn.execute("CREATE INDEX idx_proxy_sources_proxy ON proxy_sources(proxy_id)")
+
+    conn.execute("""
+        CREATE TRIGGER trg_proxy_sources_insert AFTER INSERT ON proxy_sources
+        BEGIN
+            UPDATE sources SET collected = collected + 1 WHERE id = NEW.source_id;
+        END
+    """)
+    # Доля рабочих считается по первой проверке: повторные проверки
+    # говорят о прокси, а не об источнике
+    conn.execute("""
+        CREATE TRIGGER trg_proxies_sources_checked
+        AFTER UPDATE OF status ON proxies
+        WHEN OLD.status IS NULL AND NEW.status IS NOT NULL
+        BEGIN
+            UPDATE sources SET
+                checked = checked + 1,
+                working = working + (NEW.status IS 'working'),
+                working_rt_sum = working_rt_sum + (CASE WHEN NEW.status IS 'working'
+                    THEN IFNULL(NEW.response_time, 0) ELSE 0 END),
+                working_rt_count = working_rt_count + (NEW.status IS 'working'
+                    AND NEW.response_time IS NOT NULL)
+            WHERE id IN (SELECT source_id FROM proxy_sources WHERE proxy_id = NEW.id);
+        END
+    """)
+    # Счетчики источника накопительные и при удалении прокси не уменьшаются
+    conn.execute("""
+        CREATE TRIGGER trg_proxies_sources_delete AFTER DELETE ON proxies
+        BEGIN
+            DELETE FROM proxy_sources WHERE proxy_id = OLD.id;
+        END
+    """)
+
+
+def _exit_ip(conn: sqlite3.Connection) -> None:
+    """Внешний адрес прокси по ответу проверочного запроса."""
+    conn.execute("ALTER TABLE proxies ADD COLUMN exit_ip TEXT")
+    conn.execute("DROP INDEX idx_proxies_working_rt")
+    conn.execute("""
+        CREATE INDEX idx_proxies_working_rt
+        ON proxies(response_time, last_check, collection_date, ip, port, protocol,
+                   country, anonymity, asn, exit_ip, status, is_outdated)
+        WHERE status = 'working' AND is_outdated = 0
+    """)
+    # Группа прокси с общим внешним адресом, от быстрого к медленному
+    conn.execute("""
+        CREATE INDEX idx_proxies_exit_ip
+        ON proxies(exit_ip, response_time)
+        WHERE exit_ip IS NOT NULL
+    """)
+
+
+def _proxy_targets(conn: sqlite3.Connection) -> None:
+    """
+    Результаты проверки прокси на целевых сайтах: матрица (прокси x цель).
+
+    Строка занимает несколько байт: ключ из двух целых, флаг успеха и
+    время проверки в секундах Unix-времени.
+    """
+    conn.execute("""
+        CREATE TABLE targets (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE
+        )
+    """)
+    # Ключ (target_id, proxy_id) - прокси цели одним диапазоном
+    conn.execute("""
+        CREATE TABLE proxy_targets (
+            target_id INTEGER NOT NULL,
+            proxy_id INTEGER NOT NULL,
+            ok INTEGER NOT NULL,
+            checked_at INTEGER NOT NULL,
+            PRIMARY KEY (target_id, proxy_id)
+        ) WITHOUT ROWID
+    """)
+    conn.execute("CREATE INDEX idx_proxy_targets_proxy ON proxy_targets(proxy_id)")
+    conn.execute("""
+        CREATE TRIGGER trg_proxies_targets_delete AFTER DELETE ON proxies
+        BEGIN
+            DELETE FROM proxy_targets WHERE proxy_id = OLD.id;
+        END
+    """)
+
+
+def _target_definitions(conn: sqlite3.Connection) -> None:
+    """Описание цели (Target.to_json) рядом с ее результатами; NULL - цель без описания."""
+    conn.execute("ALTER TABLE targets ADD COLUMN definition TEXT")
+
+
+def _bandwidth(conn: sqlite3.Connection) -> None:
+    """Пропускная способность и время до первого байта по замеру скорости."""
+    conn.execute("ALTER TABLE proxies ADD COLUMN bandwidth REAL")
+    conn.execute("ALTER TABLE proxies ADD COLUMN ttfb REAL")
+    conn.execute("DROP INDEX idx_proxies_working_rt")
+    conn.execute("""
+        CREATE INDEX idx_proxies_working_rt
+        ON proxies(response_time, last_check, collection_date, ip, port, protocol,
+                   country, anonymity, asn, exit_ip, bandwidth, ttfb, status, is_outdated)
+        WHERE status = 'working' AND is_outdated = 0
+    """)
+    # Выборка по скорости: только замеренные рабочие прокси, от быстрых к медленным
+    conn.execute("""
+        CREATE INDEX idx_proxies_working_bandwidth
+        ON proxies(bandwidth DESC)
+        WHERE status = 'working' AND is_outdated = 0 AND bandwidth IS NOT NULL
+    """)
+
+
+def _check_phases(conn: sqlite3.Connection) -> None:
+    """
+    Сглаженные длительности фаз проверки (DNS, соединение, ожидание ответа,
+    чтение) и их суммы по рабочим прокси в proxy_stats.
+    """
+    for column in PHASE_COLUMNS:
+        conn.execute(f"ALTER TABLE proxies ADD COLUMN {column} REAL")
+    for column, _ in _PHASE_STATS_TERMS:
+        kind = "REAL" if column.endswith("_sum") else "INTEGER"
+        conn.execute(f"ALTER TABLE proxy_stats ADD COLUMN {column} {kind} NOT NULL DEFAULT 0")
+
+    # Триггеры счетчиков пересоздаются с новыми слагаемыми; фаз у
+    # существующих прокси еще нет, поэтому новые счетчики начинаются с нуля
+    terms = _STATS_TERMS + _PHASE_STATS_TERMS
+    for trigger in ('insert', 'delete', 'update'):
+        conn.execute(f"DROP TRIGGER trg_proxies_stats_{trigger}")
+    conn.execute(f"""
+        CREATE TRIGGER trg_proxies_stats_insert AFTER INSERT ON proxies
+        BEGIN {_stats_update(("+", "NEW"), terms=terms)} END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER trg_proxies_stats_delete AFTER DELETE ON proxies
+        BEGIN {_stats_update(("-", "OLD"), terms=terms)} END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER trg_proxies_stats_update
+        AFTER UPDATE OF status, response_time, is_outdated, {', '.join(PHASE_COLUMNS)} ON proxies
+        BEGIN {_stats_update(("-", "OLD"), ("+", "NEW"), terms=terms)} END
+    """)
+
+    conn.execute("DROP INDEX idx_proxies_working_rt")
+    conn.execute(f"""
+        CREATE INDEX idx_proxies_working_rt
+        ON proxies(response_time, last_check, collection_date, ip, port, protocol,
+                   country, anonymity, asn, exit_ip, bandwidth, ttfb,
+                   {', '.join(PHASE_COLUMNS)}, status, is_outdated)
+        WHERE status = 'working' AND is_outdated = 0
+    """)
+    # Выборка по времени соединения с прокси, без задержек проверочного сайта
+    conn.execute("""
+        CREATE INDEX idx_proxies_working_connect
+        ON proxies(connect_time)
+        WHERE status = 'working' AND is_outdated = 0 AND connect_time IS NOT NULL
+    """)
+
+
+#: (версия, описание, функция миграции) в порядке применения
+MIGRATIONS: List[Tuple[int, str, Callable[[sqlite3.Connection], None]]] = [
+    (1, "initial schema", _initial_schema),
+    (2, "numeric columns and selection indexes", _numeric_columns_and_selection_indexes),
+    (3, "incremental statistics", _incremental_statistics),
+    (4, "working protocols", _working_protocols),
+    (5, "country, anonymity and filtered selection indexes", _country_anonymity_and_filtered_indexes),
+    (6, "autonomous system number", _autonomous_system),
+    (7, "proxy sources", _proxy_sources),
+    (8, "exit ip", _exit_ip),
+    (9, "proxy targets", _proxy_targets),
+    (10, "bandwidth", _bandwidth),
+    (11, "check phases", _check_phases),
+    (12, "target definitions", _target_definitions),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def get_version(conn: sqlite3.Connection) -> int:
+    """Возвращает текущую версию схемы базы."""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn: sqlite3.Connection, target: int = SCHEMA_VERSION) -> int:
+    """
+    Применяет недостающие миграции.
+
+    Args:
+        conn: Соединение с базой данных
+        target: Версия схемы, до которой нужно обновиться
+
+    Returns:
+        int: Версия схемы после миграции
+    """
+    version = get_version(conn)
+    if version == 0 and not conn.execute("SELECT 1 FROM sqlite_master LIMIT 1").fetchone():
+        # auto_vacuum меняется только до создания первой таблицы; включаем его
+        # для новых баз, чтобы очистка могла возвращать место по частям
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    for number, description, apply in MIGRATIONS:
+        if version < number <= target:
+            logger.info(f"Applying schema migration {number}: {description}")
+            if conn.in_transaction:
+                conn.commit()
+            # Каждая миграция целиком в своей транзакции, включая DDL
+            conn.execute("BEGIN")
+            try:
+                apply(conn)
+                # PRAGMA не поддерживает параметры запроса
+                conn.execute(f"PRAGMA user_version = {int(number)}")
+            except Exception:
+                conn.rollback()
+                raise
+            conn.commit()
+            version = number
+    return version
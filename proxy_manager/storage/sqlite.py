@@ -0,0 +1,639 @@
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import ContextManager, Iterable, List, Optional, Sequence, Tuple
+from .base import (
+    PHASE_COLUMNS, PHASE_SMOOTHING, BaseStorage, ProxyRecord, SourceStats, TargetResult,
+    clean_anonymity, clean_asn, clean_country, from_epoch, parse_port, phases_from_row,
+    phases_statistics, to_epoch
+)
+from .migrations import migrate
+from ..proxy import Proxy
+from ..targets import Target
+
+
+# Колонки, из которых _row_to_proxy собирает Proxy: основные, затем фазы проверки
+_BASE_COLUMNS = (
+    "ip", "port", "protocol", "status", "response_time", "last_check", "collection_date",
+    "country", "anonymity", "asn", "exit_ip", "bandwidth", "ttfb"
+)
+PROXY_COLUMNS = ", ".join(_BASE_COLUMNS + PHASE_COLUMNS)
+
+# Позиции фаз в строке PROXY_COLUMNS и protocols, если он запрошен следом
+_PHASES_AT = len(_BASE_COLUMNS)
+_PROTOCOLS_AT = _PHASES_AT + len(PHASE_COLUMNS)
+
+# update_proxy_statuses: новый замер фазы сглаживается с сохраненным (smooth_phase)
+_PHASE_ASSIGNMENTS = ", ".join(
+    f"{column} = CASE WHEN ? IS NULL THEN {column}"
+    f" ELSE IFNULL({column} + {PHASE_SMOOTHING} * (? - {column}), ?) END"
+    for column in PHASE_COLUMNS
+)
+
+# Фильтры get_working: у каждого есть частичный индекс idx_proxies_working_<колонка>
+FILTER_COLUMNS = ('country', 'anonymity', 'protocol')
+
+# needs_update: покрывается индексом idx_proxies_working_collected
+COUNT_WORKING_SQL = """
+    SELECT COUNT(*)
+    FROM proxies
+    WHERE status = 'working'
+    AND is_outdated = 0
+    AND collection_date > ?
+"""
+
+# get_unchecked_proxies: покрывается индексом idx_proxies_unchecked
+UNCHECKED_SQL = """
+    SELECT ip, port, protocol
+    FROM proxies
+    WHERE status IS NULL
+    AND is_outdated = 0
+    LIMIT ?
+"""
+
+# iter_working/iter_unchecked: порция по ключу id идет по первичному ключу,
+# OFFSET не нужен, а записи между порциями ее не сдвигают
+WORKING_PAGE_SQL = f"""
+    SELECT id, {PROXY_COLUMNS}
+    FROM proxies
+    WHERE status = 'working'
+    AND is_outdated = 0
+    AND id > ?
+    ORDER BY id
+    LIMIT ?
+"""
+
+WORKING_RECORDS_PAGE_SQL = """
+    SELECT id, ip, port, protocol, response_time, last_check, collection_date
+    FROM proxies
+    WHERE status = 'working'
+    AND is_outdated = 0
+    AND id > ?
+    ORDER BY id
+    LIMIT ?
+"""
+
+UNCHECKED_PAGE_SQL = """
+    SELECT id, ip, port, protocol
+    FROM proxies
+    WHERE status IS NULL
+    AND is_outdated = 0
+    AND id > ?
+    ORDER BY id
+    LIMIT ?
+"""
+
+# get_unchecked_by_yield: источник по уникальному имени, его прокси по
+# ключу proxy_sources, строки proxies по id
+SOURCE_UNCHECKED_SQL = """
+    SELECT p.ip, p.port, p.protocol
+    FROM sources s
+    JOIN proxy_sources ps ON ps.source_id = s.id
+    JOIN proxies p ON p.id = ps.proxy_id
+    WHERE s.name = ?
+    AND p.status IS NULL
+    AND p.is_outdated = 0
+    LIMIT ?
+"""
+
+# get_by_exit_ip: частичный индекс по exit_ip уже упорядочен по response_time
+EXIT_IP_SQL = f"""
+    SELECT {PROXY_COLUMNS}
+    FROM proxies
+    WHERE exit_ip = ? AND is_outdated = 0
+    ORDER BY response_time ASC
+"""
+
+# get_target_candidates: рабочие прокси по индексу idx_proxies_working_rt,
+# свежие результаты цели одним диапазоном ключа proxy_targets
+def _target_candidates_sql(protocols: int = 0) -> str:
+    """Запрос кандидатов цели; protocols - число параметров фильтра по протоколу."""
+    # Унарный плюс не дает взять индекс по протоколу: обход индекса по
+    # response_time уже в нужном порядке и останавливается на LIMIT
+    protocol = f"AND +protocol IN ({', '.join('?' * protocols)})" if protocols else ""
+    return f"""
+        SELECT {PROXY_COLUMNS}
+        FROM proxies
+        WHERE status = 'working'
+        AND is_outdated = 0
+        {protocol}
+        AND id NOT IN (
+            SELECT proxy_id FROM proxy_targets
+            WHERE target_id = (SELECT id FROM targets WHERE name = ?)
+            AND checked_at > ?
+        )
+        ORDER BY response_time ASC
+        LIMIT ?
+    """
+
+
+TARGET_CANDIDATES_SQL = _target_candidates_sql()
+
+# get_statistics: счетчики из proxy_stats, MIN/MAX берутся из концов индексов
+STATISTICS_SQL = f"""
+    SELECT total, working, failed, unchecked, outdated,
+           working_rt_sum, working_rt_count,
+           (SELECT MIN(collection_date) FROM proxies),
+           (SELECT MAX(last_check) FROM proxies),
+           {', '.join(f'working_{c}_sum, working_{c}_count' for c in PHASE_COLUMNS)}
+    FROM proxy_stats
+    WHERE id = 1
+"""
+
+
+class SQLiteStorage(BaseStorage):
+    """
+    Хранилище прокси в базе SQLite.
+
+    Файл базы и схема создаются при первом обращении, а не в конструкторе,
+    чтобы короткие задачи не платили за миграции, которые им не нужны.
+    """
+
+    name = 'sqlite'
+
+    def __init__(self, db_path: str = "proxies.db"):
+        super().__init__()
+        self._setup_lock = threading.Lock()
+        self.db_path = db_path
+
+    @property
+    def db_path(self) -> str:
+        """Путь к файлу базы данных."""
+        return self._db_path
+
+    @db_path.setter
+    def db_path(self, value: str):
+        self._db_path = value
+        self._ready = False
+
+    @contextmanager
+    def get_connection(self) -> ContextManager[sqlite3.Connection]:
+        """
+        Контекстный менеджер для работы с базой данных.
+
+        Yields:
+            sqlite3.Connection: Соединение с базой данных
+        """
+        conn = sqlite3.connect(self.db_path)
+        try:
+            if not self._ready:
+                self._migrate(conn)
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _migrate(self, conn: sqlite3.Connection) -> None:
+        """Применяет миграции один раз на экземпляр, даже из нескольких потоков."""
+        with self._setup_lock:
+            if not self._ready:
+                migrate(conn)
+                self._ready = True
+
+    def setup(self) -> None:
+        """Создает базу данных и применяет недостающие миграции схемы."""
+        with self.get_connection():
+            pass
+
+    @staticmethod
+    def _row_to_proxy(row) -> Proxy:
+        """Собирает Proxy из строки PROXY_COLUMNS и, если есть, protocols."""
+        proxy = Proxy(
+            ip=row[0], port=row[1], protocol=row[2],
+            country=row[7], anonymity=row[8], asn=row[9]
+        )
+        proxy.status = row[3]
+        proxy.response_time = row[4]
+        proxy.last_check = from_epoch(row[5])
+        proxy.collection_date = from_epoch(row[6])
+        proxy.exit_ip = row[10]
+        proxy.bandwidth = row[11]
+        proxy.ttfb = row[12]
+        proxy.phases = phases_from_row(row[_PHASES_AT:_PROTOCOLS_AT])
+        if len(row) > _PROTOCOLS_AT and row[_PROTOCOLS_AT] is not None:
+            protocols = row[_PROTOCOLS_AT]
+            proxy.protocols = protocols.split(',') if protocols else []
+        return proxy
+
+    @staticmethod
+    def _insert_values(proxy: Proxy, port: int, now: int) -> tuple:
+        return (
+            proxy.ip, port, proxy.protocol, now,
+            clean_country(getattr(proxy, 'country', None)),
+            clean_anonymity(getattr(proxy, 'anonymity', None)),
+            clean_asn(getattr(proxy, 'asn', None))
+        )
+
+    def add_proxy(self, proxy: Proxy, source: Optional[str] = None) -> int:
+        port = parse_port(proxy.port)
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                INSERT OR IGNORE INTO proxies
+                    (ip, port, protocol, collection_date, country, anonymity, asn)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, self._insert_values(proxy, port, to_epoch(datetime.now())))
+
+            # Если прокси уже существует, получаем его ID
+            if cursor.rowcount == 0:
+                cursor.execute("""
+                    SELECT id FROM proxies WHERE ip = ? AND port = ?
+                """, (proxy.ip, port))
+                proxy_id = cursor.fetchone()[0]
+            else:
+                proxy_id = cursor.lastrowid
+
+            if source is not None:
+                self._link_source(conn, source, [(proxy.ip, port)])
+            return proxy_id
+
+    def _insert_rows(self, proxies: Iterable[Proxy], now: int):
+        """Строки для INSERT, прокси с некорректным портом пропускаются."""
+        for proxy in proxies:
+            try:
+                port = parse_port(proxy.port)
+            except (TypeError, ValueError):
+                self.logger.debug(f"Skipping proxy with invalid port: {proxy.ip}:{proxy.port}")
+                continue
+            yield self._insert_values(proxy, port, now)
+
+    @staticmethod
+    def _link_source(conn: sqlite3.Connection, source: str, keys: Iterable[Tuple[str, int]]) -> None:
+        """Связывает прокси (ip, port) с источником, заводя источник при первой встрече."""
+        conn.execute("INSERT OR IGNORE INTO sources (name) VALUES (?)", (source,))
+        source_id = conn.execute("SELECT id FROM sources WHERE name = ?", (source,)).fetchone()[0]
+        conn.executemany("""
+            INSERT OR IGNORE INTO proxy_sources (source_id, proxy_id)
+            SELECT ?, id FROM proxies WHERE ip = ? AND port = ?
+        """, ((source_id, ip, port) for ip, port in keys))
+
+    def add_proxies(self, proxies: Iterable[Proxy], source: Optional[str] = None) -> int:
+        now = to_epoch(datetime.now())
+        rows = self._insert_rows(proxies, now)
+        if source is not None:
+            rows = list(rows)
+        with self.get_connection() as conn:
+            # rowcount, в отличие от total_changes, не учитывает записи триггеров
+            cursor = conn.executemany("""
+                INSERT OR IGNORE INTO proxies
+                    (ip, port, protocol, collection_date, country, anonymity, asn)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, rows)
+            added = max(cursor.rowcount, 0)
+            if source is not None:
+                self._link_source(conn, source, (row[:2] for row in rows))
+            return added
+
+    def get_proxy_by_id(self, proxy_id: int) -> Optional[Proxy]:
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"""
+                SELECT {PROXY_COLUMNS}, protocols
+                FROM proxies
+                WHERE id = ?
+            """, (proxy_id,))
+
+            row = cursor.fetchone()
+            return self._row_to_proxy(row) if row else None
+
+    def update_proxy_status(self, proxy: Proxy) -> None:
+        self.update_proxy_statuses([proxy])
+
+    def update_proxy_statuses(self, proxies: Iterable[Proxy]) -> None:
+        now = to_epoch(datetime.now())
+        no_phases = (None,) * len(PHASE_COLUMNS)
+        with self.get_connection() as conn:
+            conn.executemany(f"""
+                UPDATE proxies
+                SET status = ?, response_time = ?, last_check = ?, protocol = ?,
+                    protocols = COALESCE(?, protocols), exit_ip = COALESCE(?, exit_ip),
+                    {_PHASE_ASSIGNMENTS}
+                WHERE ip = ? AND port = ?
+            """, (
+                (
+                    p.status, p.response_time, now, p.protocol,
+                    None if p.protocols is None else ','.join(p.protocols),
+                    getattr(p, 'exit_ip', None),
+                    *(value for value in (getattr(p, 'phases', None) or no_phases) for _ in range(3)),
+                    p.ip, int(p.port)
+                )
+                for p in proxies
+            ))
+
+    def update_bandwidth(self, proxies: Iterable[Proxy]) -> None:
+        with self.get_connection() as conn:
+            conn.executemany("""
+                UPDATE proxies SET bandwidth = ?, ttfb = ? WHERE ip = ? AND port = ?
+            """, ((p.bandwidth, p.ttfb, p.ip, int(p.port)) for p in proxies))
+
+    def mark_failed(self, proxy_id: int) -> None:
+        with self.get_connection() as conn:
+            conn.execute("""
+                UPDATE proxies
+                SET status = 'failed',
+                    last_check = ?
+                WHERE id = ?
+            """, (to_epoch(datetime.now()), proxy_id))
+
+    def mark_all_outdated(self) -> None:
+        with self.get_connection() as conn:
+            conn.execute("UPDATE proxies SET is_outdated = 1")
+
+    def count_working(self, min_collection_date: datetime) -> int:
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(COUNT_WORKING_SQL, (to_epoch(min_collection_date),))
+            return cursor.fetchone()[0]
+
+    @staticmethod
+    def working_query(
+        limit: int,
+        min_last_check: Optional[datetime] = None,
+        min_collection_date: Optional[datetime] = None,
+        random_order: bool = False,
+        country: Optional[str] = None,
+        anonymity: Optional[str] = None,
+        protocol: Optional[str] = None,
+        target: Optional[str] = None,
+        min_target_check: Optional[datetime] = None,
+        by_bandwidth: bool = False,
+        min_bandwidth: Optional[float] = None,
+        by_connect_time: bool = False
+    ) -> Tuple[str, list]:
+        """
+        Строит запрос выборки рабочих прокси.
+
+        Условия status/is_outdated записаны буквально, чтобы планировщик
+        мог использовать частичные индексы idx_proxies_working_*.
+
+        Returns:
+            Tuple[str, list]: SQL и параметры запроса
+        """
+        conditions = ["status = 'working'", "is_outdated = 0"]
+        params = []
+        filters = (clean_country(country), clean_anonymity(anonymity), protocol)
+        for column, value in zip(FILTER_COLUMNS, filters):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+        if min_last_check is not None:
+            conditions.append("last_check > ?")
+            params.append(to_epoch(min_last_check))
+        if min_collection_date is not None:
+            conditions.append("collection_date > ?")
+            params.append(to_epoch(min_collection_date))
+        if target is not None:
+            # Успешные результаты цели - один диапазон ключа proxy_targets
+            checked = ""
+            params.append(target)
+            if min_target_check is not None:
+                checked = " AND checked_at > ?"
+                params.append(to_epoch(min_target_check))
+            conditions.append(
+                "id IN (SELECT proxy_id FROM proxy_targets"
+                " WHERE target_id = (SELECT id FROM targets WHERE name = ?)"
+                f" AND ok = 1{checked})"
+            )
+        if by_bandwidth or min_bandwidth is not None:
+            # Условие буквально как у частичного индекса idx_proxies_working_bandwidth
+            conditions.append("bandwidth IS NOT NULL")
+        if min_bandwidth is not None:
+            conditions.append("bandwidth >= ?")
+            params.append(min_bandwidth)
+        if by_connect_time:
+            # Условие буквально как у частичного индекса idx_proxies_working_connect
+            conditions.append("connect_time IS NOT NULL")
+        if random_order:
+            order = "RANDOM()"
+        elif by_bandwidth:
+            order = "bandwidth DESC"
+        elif by_connect_time:
+            order = "connect_time ASC"
+        else:
+            order = "response_time ASC"
+        params.append(limit)
+        sql = f"""
+            SELECT {PROXY_COLUMNS}
+            FROM proxies
+            WHERE {' AND '.join(conditions)}
+            ORDER BY {order}
+            LIMIT ?
+        """
+        return sql, params
+
+    def get_working(
+        self,
+        limit: int,
+        min_last_check: Optional[datetime] = None,
+        min_collection_date: Optional[datetime] = None,
+        random_order: bool = False,
+        country: Optional[str] = None,
+        anonymity: Optional[str] = None,
+        protocol: Optional[str] = None,
+        target: Optional[str] = None,
+        min_target_check: Optional[datetime] = None,
+        by_bandwidth: bool = False,
+        min_bandwidth: Optional[float] = None,
+        by_connect_time: bool = False
+    ) -> List[Proxy]:
+        sql, params = self.working_query(
+            limit, min_last_check, min_collection_date, random_order, country, anonymity, protocol,
+            target, min_target_check, by_bandwidth, min_bandwidth, by_connect_time
+        )
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(sql, params)
+            return [self._row_to_proxy(row) for row in cursor.fetchall()]
+
+    def get_unchecked(self, limit: int) -> List[Proxy]:
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(UNCHECKED_SQL, (limit,))
+            return [
+                Proxy(ip=row[0], port=row[1], protocol=row[2])
+                for row in cursor.fetchall()
+            ]
+
+    def working_page(self, after_id: int, limit: int, records: bool = False) -> Tuple[int, list]:
+        sql = WORKING_RECORDS_PAGE_SQL if records else WORKING_PAGE_SQL
+        with self.get_connection() as conn:
+            rows = conn.execute(sql, (after_id, limit)).fetchall()
+        if not rows:
+            return after_id, []
+        make = ProxyRecord._make if records else self._row_to_proxy
+        return rows[-1][0], [make(row[1:]) for row in rows]
+
+    def unchecked_page(self, after_id: int, limit: int, records: bool = False) -> Tuple[int, list]:
+        with self.get_connection() as conn:
+            rows = conn.execute(UNCHECKED_PAGE_SQL, (after_id, limit)).fetchall()
+        if not rows:
+            return after_id, []
+        if records:
+            return rows[-1][0], [row[1:] for row in rows]
+        return rows[-1][0], [Proxy(ip=row[1], port=row[2], protocol=row[3]) for row in rows]
+
+    def get_by_exit_ip(self, exit_ip: str) -> List[Proxy]:
+        with self.get_connection() as conn:
+            cursor = conn.execute(EXIT_IP_SQL, (exit_ip,))
+            return [self._row_to_proxy(row) for row in cursor]
+
+    def get_unchecked_from_source(self, source: str, limit: int) -> List[Proxy]:
+        with self.get_connection() as conn:
+            cursor = conn.execute(SOURCE_UNCHECKED_SQL, (source, limit))
+            return [Proxy(ip=row[0], port=row[1], protocol=row[2]) for row in cursor]
+
+    def get_source_stats(self) -> List[SourceStats]:
+        with self.get_connection() as conn:
+            cursor = conn.execute("""
+                SELECT name, collected, checked, working, working_rt_sum, working_rt_count
+                FROM sources
+                ORDER BY id
+            """)
+            return [SourceStats._make(row) for row in cursor]
+
+    def save_target(self, target: Target) -> None:
+        with self.get_connection() as conn:
+            conn.execute("""
+                INSERT INTO targets (name, definition) VALUES (?, ?)
+                ON CONFLICT(name) DO UPDATE SET definition = excluded.definition
+            """, (target.name, target.to_json()))
+
+    def get_targets(self) -> List[Target]:
+        with self.get_connection() as conn:
+            cursor = conn.execute("SELECT definition FROM targets WHERE definition IS NOT NULL")
+            return [Target.from_json(row[0]) for row in cursor]
+
+    def record_target_results(self, target: str, results: Iterable[TargetResult]) -> None:
+        now = to_epoch(datetime.now())
+        with self.get_connection() as conn:
+            conn.execute("INSERT OR IGNORE INTO targets (name) VALUES (?)", (target,))
+            target_id = conn.execute("SELECT id FROM targets WHERE name = ?", (target,)).fetchone()[0]
+            conn.executemany("""
+                INSERT OR REPLACE INTO proxy_targets
+                    (target_id, proxy_id, ok, checked_at)
+                SELECT ?, id, ?, ? FROM proxies WHERE ip = ? AND port = ?
+            """, ((target_id, int(r.ok), now, r.ip, int(r.port)) for r in results))
+
+    def get_target_candidates(
+        self,
+        target: str,
+        limit: int,
+        min_checked: datetime,
+        protocols: Optional[Sequence[str]] = None
+    ) -> List[Proxy]:
+        protocols = tuple(protocols or ())
+        sql = _target_candidates_sql(len(protocols)) if protocols else TARGET_CANDIDATES_SQL
+        with self.get_connection() as conn:
+            cursor = conn.execute(sql, protocols + (target, to_epoch(min_checked), limit))
+            return [self._row_to_proxy(row) for row in cursor]
+
+    def get_statistics(self) -> dict:
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(STATISTICS_SQL)
+            row = cursor.fetchone()
+            averages = [
+                total / count if count else None
+                for total, count in zip((row[5],) + row[9::2], (row[6],) + row[10::2])
+            ]
+            return self._statistics(row[:5] + (averages[0],) + row[7:9] + tuple(averages[1:]))
+
+    def recompute_statistics(self) -> dict:
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT
+                    COUNT(*) as total,
+                    SUM(CASE WHEN status = 'working' THEN 1 ELSE 0 END) as working,
+                    SUM(CASE WHEN status = 'failed' THEN 1 ELSE 0 END) as failed,
+                    SUM(CASE WHEN status IS NULL THEN 1 ELSE 0 END) as unchecked,
+                    SUM(CASE WHEN is_outdated = 1 THEN 1 ELSE 0 END) as outdated,
+                    AVG(CASE WHEN status = 'working' THEN response_time ELSE NULL END) as avg_response,
+                    MIN(collection_date) as oldest_proxy,
+                    MAX(last_check) as latest_check,
+                    """ + ", ".join(
+                        f"AVG(CASE WHEN status = 'working' THEN {column} ELSE NULL END)"
+                        for column in PHASE_COLUMNS
+                    ) + """
+                FROM proxies
+            """)
+            return self._statistics(cursor.fetchone())
+
+    @staticmethod
+    def _statistics(row) -> dict:
+        """
+        Собирает словарь статистики из (total, working, failed, unchecked,
+        outdated, avg, oldest, latest, средние фазы проверки...).
+        """
+        return {
+            'total': row[0] or 0,
+            'working': row[1] or 0,
+            'failed': row[2] or 0,
+            'unchecked': row[3] or 0,
+            'outdated': row[4] or 0,
+            'avg_response_time': round(row[5], 3) if row[5] else None,
+            'oldest_proxy': from_epoch(row[6]),
+            'latest_check': from_epoch(row[7]),
+            'phases': phases_statistics(row[8:])
+        }
+
+    def cleanup(self, min_date: datetime) -> int:
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                DELETE FROM proxies
+                WHERE collection_date < ?
+                OR (status = 'failed' AND last_check < ?)
+            """, (to_epoch(min_date), to_epoch(min_date)))
+            return cursor.rowcount
+
+    def get_id_range(self) -> Tuple[Optional[int], Optional[int]]:
+        with self.get_connection() as conn:
+            return conn.execute("SELECT MIN(id), MAX(id) FROM proxies").fetchone()
+
+    def cleanup_range(self, min_date: datetime, first_id: int, last_id: int) -> int:
+        with self.get_connection() as conn:
+            cursor = conn.execute("""
+                DELETE FROM proxies
+                WHERE id BETWEEN ? AND ?
+                AND (collection_date < ? OR (status = 'failed' AND last_check < ?))
+            """, (first_id, last_id, to_epoch(min_date), to_epoch(min_date)))
+            return cursor.rowcount
+
+    def incremental_vacuum(self, pages: int) -> int:
+        with self.get_connection() as conn:
+            # 2 = INCREMENTAL; базы, созданные до миграций, его не включают
+            if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+                return 0
+            before = conn.execute("PRAGMA freelist_count").fetchone()[0]
+            conn.execute(f"PRAGMA incremental_vacuum({int(pages)})").fetchall()
+            return before - conn.execute("PRAGMA freelist_count").fetchone()[0]
+
+    def working_records(self, limit: Optional[int] = None) -> List[ProxyRecord]:
+        with self.get_connection() as conn:
+            cursor = conn.execute("""
+                SELECT ip, port, protocol, response_time, last_check, collection_date
+                FROM proxies
+                WHERE status = 'working'
+                AND is_outdated = 0
+                ORDER BY response_time ASC
+                LIMIT ?
+            """, (-1 if limit is None else limit,))
+            return [ProxyRecord._make(row) for row in cursor]
+
+    def restore_working(self, records: Iterable[ProxyRecord]) -> int:
+        with self.get_connection() as conn:
+            cursor = conn.executemany("""
+                INSERT INTO proxies
+                    (ip, port, protocol, status, response_time, last_check, collection_date)
+                VALUES (?, ?, ?, 'working', ?, ?, ?)
+                ON CONFLICT(ip, port) DO UPDATE SET
+                    protocol = excluded.protocol,
+                    status = 'working',
+                    response_time = excluded.response_time,
+                    last_check = excluded.last_check,
+                    is_outdated = 0
+                WHERE proxies.last_check IS NULL OR proxies.last_check < excluded.last_check
+            """, records)
+            return max(cursor.rowcount, 0)
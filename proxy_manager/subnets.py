@@ -0,0 +1,148 @@
+"""
+Модуль учета подсетей и автономных систем прокси.
+
+Прокси из одной /24 или у одного хостера обычно работают и отказывают
+вместе, а разные прокси из списков часто выходят в сеть с одного адреса.
+Здесь собраны выбор пакета с ограничением числа прокси на подсеть, ASN
+и внешний адрес и учет отказов по подсетям, по которому проверка
+пропускает остальных членов явно мертвой подсети.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, Iterable, List, Optional, Sequence
+from .geoip import ip_to_int
+
+
+def subnet_key(ip: str, prefix: int = 24) -> Hashable:
+    """
+    Ключ подсети адреса: номер IPv4-сети длины prefix.
+    Адреса не-IPv4 образуют каждый свою группу.
+    """
+    number = ip_to_int(ip)
+    if number is None:
+        return ip
+    return number >> (32 - prefix)
+
+
+def diversify(
+    proxies: Iterable,
+    limit: int,
+    max_per_subnet: Optional[int] = None,
+    max_per_asn: Optional[int] = None,
+    prefix: int = 24,
+    max_per_exit_ip: Optional[int] = None
+) -> List:
+    """
+    Отбирает прокси по порядку, пропуская те, чья подсеть, ASN или внешний
+    адрес уже набрали лимит.
+
+    Args:
+        proxies: Прокси в порядке предпочтения (например, по response_time)
+        limit: Сколько прокси вернуть
+        max_per_subnet: Максимум прокси из одной подсети
+        max_per_asn: Максимум прокси из одной автономной системы;
+            прокси с неизвестным ASN не ограничиваются
+        prefix: Длина префикса подсети
+        max_per_exit_ip: Максимум прокси с одним внешним адресом;
+            прокси с неизвестным адресом не ограничиваются
+
+    Returns:
+        List: Не более limit прокси с сохранением порядка
+    """
+    per_subnet: Dict[Hashable, int] = {}
+    per_asn: Dict[int, int] = {}
+    per_exit_ip: Dict[str, int] = {}
+    picked = []
+    for proxy in proxies:
+        if len(picked) >= limit:
+            break
+        subnet = subnet_key(proxy.ip, prefix) if max_per_subnet is not None else None
+        asn = getattr(proxy, 'asn', None) if max_per_asn is not None else None
+        exit_ip = getattr(proxy, 'exit_ip', None) if max_per_exit_ip is not None else None
+        if subnet is not None and per_subnet.get(subnet, 0) >= max_per_subnet:
+            continue
+        if asn is not None and per_asn.get(asn, 0) >= max_per_asn:
+            continue
+        if exit_ip is not None and per_exit_ip.get(exit_ip, 0) >= max_per_exit_ip:
+            continue
+        if subnet is not None:
+            per_subnet[subnet] = per_subnet.get(subnet, 0) + 1
+        if asn is not None:
+            per_asn[asn] = per_asn.get(asn, 0) + 1
+        if exit_ip is not None:
+            per_exit_ip[exit_ip] = per_exit_ip.get(exit_ip, 0) + 1
+        picked.append(proxy)
+    return picked
+
+
+def group_by_exit_ip(proxies: Iterable) -> List[List]:
+    """
+    Группы прокси с общим внешним адресом в порядке первого появления.
+
+    Прокси с неизвестным внешним адресом образуют каждый свою группу.
+    """
+    groups: Dict[Hashable, List] = OrderedDict()
+    for proxy in proxies:
+        exit_ip = getattr(proxy, 'exit_ip', None)
+        groups.setdefault(exit_ip if exit_ip is not None else id(proxy), []).append(proxy)
+    return list(groups.values())
+
+
+def interleave(proxies: Sequence, prefix: int = 24) -> List:
+    """
+    Чередует прокси по подсетям: сначала первый из каждой подсети, затем
+    второй и так далее. Так отказ целой подсети обнаруживается по первым
+    ее членам, а не после проверки всех подряд.
+    """
+    groups: Dict[Hashable, List] = OrderedDict()
+    for proxy in proxies:
+        groups.setdefault(subnet_key(proxy.ip, prefix), []).append(proxy)
+    result = []
+    for position in range(max((len(group) for group in groups.values()), default=0)):
+        for group in groups.values():
+            if position < len(group):
+                result.append(group[position])
+    return result
+
+
+class SubnetHealth:
+    """
+    Последовательные отказы по подсетям.
+
+    Подсеть считается мертвой, если threshold ее прокси подряд не прошли
+    проверку, ни один не прошел и последний отказ был не раньше window
+    секунд назад. Успешная проверка любого прокси подсети сбрасывает счетчик.
+    """
+
+    def __init__(self, threshold: int = 3, window: float = 3600.0, prefix: int = 24):
+        """
+        Args:
+            threshold: Число отказов подряд, после которого подсеть мертва
+            window: Сколько секунд помнить отказы
+            prefix: Длина префикса подсети
+        """
+        self.threshold = threshold
+        self.window = window
+        self.prefix = prefix
+        # подсеть -> (отказов подряд, время последнего отказа)
+        self._failures: Dict[Hashable, tuple] = {}
+
+    def record(self, ip: str, ok: bool) -> None:
+        """Учитывает результат проверки прокси."""
+        key = subnet_key(ip, self.prefix)
+        if ok:
+            self._failures.pop(key, None)
+            return
+        count, _ = self._failures.get(key, (0, 0.0))
+        self._failures[key] = (count + 1, time.monotonic())
+
+    def failures(self, ip: str) -> int:
+        """Отказы подряд в подсети адреса за последние window секунд."""
+        count, last = self._failures.get(subnet_key(ip, self.prefix), (0, 0.0))
+        if count and time.monotonic() - last > self.window:
+            return 0
+        return count
+
+    def is_dead(self, ip: str) -> bool:
+        return self.failures(ip) >= self.threshold
@@ -0,0 +1,76 @@
+"""
+Модуль целевых сайтов.
+
+Прокси, прошедший общую проверку по check_url, нередко заблокирован на
+сайтах, ради которых он нужен. Цель описывает такой сайт: легкую
+страницу для пробного запроса, признаки успешного ответа и срок, в
+течение которого результат считается действительным. Результаты
+проверок на целях хранятся в хранилище как матрица (прокси x цель), и
+выборка с target отдает только прокси со свежим успешным результатом.
+Описания целей хранятся там же, поэтому после перезапуска выборка по
+имени цели работает без повторной регистрации.
+"""
+
+import json
+from dataclasses import asdict, dataclass
+from typing import Optional, Tuple
+
+
+@dataclass(frozen=True)
+class Target:
+    """
+    Целевой сайт и критерии успешной проверки на нем.
+
+    Пример:
+        Target("example.com", "https://example.com/robots.txt",
+               must_not_contain=("captcha",), ttl=1800)
+    """
+    #: Имя цели, обычно домен; по нему выбираются прокси
+    name: str
+    #: Легкая страница сайта для пробного запроса
+    url: str
+    #: Коды ответа, которые считаются успехом
+    statuses: Tuple[int, ...] = (200,)
+    #: Строка, которая должна быть в ответе
+    must_contain: Optional[str] = None
+    #: Признаки блокировки (капча, страница запрета), без учета регистра
+    must_not_contain: Tuple[str, ...] = ()
+    #: Сколько секунд результат проверки действителен
+    ttl: float = 3600.0
+    #: Срок пробного запроса в секундах; None - срок проверщика
+    timeout: Optional[float] = None
+
+    @property
+    def needs_body(self) -> bool:
+        """Нужно ли читать тело ответа для решения."""
+        return self.must_contain is not None or bool(self.must_not_contain)
+
+    def accepts(self, status: int, body: str = "") -> bool:
+        """
+        Успешен ли ответ цели.
+
+        Args:
+            status: Код ответа
+            body: Тело ответа; читается, только если needs_body
+
+        Returns:
+            bool: True, если прокси работает для этой цели
+        """
+        if status not in self.statuses:
+            return False
+        if self.must_contain is not None and self.must_contain not in body:
+            return False
+        lowered = body.lower()
+        return not any(marker.lower() in lowered for marker in self.must_not_contain)
+
+    def to_json(self) -> str:
+        """Описание цели для хранилища."""
+        return json.dumps(asdict(self), sort_keys=True)
+
+    @classmethod
+    def from_json(cls, text: str) -> "Target":
+        """Восстанавливает цель из to_json."""
+        fields = json.loads(text)
+        fields['statuses'] = tuple(fields['statuses'])
+        fields['must_not_contain'] = tuple(fields['must_not_contain'])
+        return cls(**fields)
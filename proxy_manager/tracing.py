@@ -0,0 +1,97 @@
+"""
+Модуль разбивки времени проверки по фазам.
+
+Время ответа прокси складывается из разных задержек: разрешение имени
+прокси, TCP-соединение с ним, ожидание ответа (отправка запроса, выход
+прокси на проверочный сайт и работа самого сайта) и чтение тела. Одна
+разница datetime.now() их смешивает, и медленный прокси не отличить от
+медленного проверочного сайта или зависшего локального DNS.
+
+Фазы размечаются хуками aiohttp.TraceConfig по монотонным часам. Для
+HTTP-прокси соединение прокси с сайтом входит в ожидание: клиент его не
+видит. У прокси, заданного IP-адресом, фазы DNS нет.
+"""
+
+import time
+from typing import NamedTuple, Optional
+
+#: Фазы проверки в порядке прохождения
+PHASES = ('dns', 'connect', 'wait', 'transfer')
+
+
+class CheckPhases(NamedTuple):
+    """Длительность фаз проверки в секундах; None - фаза не наблюдалась."""
+    dns: Optional[float] = None
+    connect: Optional[float] = None
+    wait: Optional[float] = None
+    transfer: Optional[float] = None
+
+
+class PhaseRecorder:
+    """
+    Отметки времени одного запроса.
+
+    Передается в запрос как trace_request_ctx; хуки trace_config()
+    заполняют отметки, а finish() отмечает конец чтения тела.
+    """
+
+    __slots__ = ('dns_start', 'dns_end', 'connect_start', 'connect_end', 'headers', 'done')
+
+    def __init__(self):
+        self.dns_start = self.dns_end = None
+        self.connect_start = self.connect_end = None
+        self.headers = self.done = None
+
+    def finish(self) -> None:
+        self.done = time.monotonic()
+
+    def phases(self) -> Optional[CheckPhases]:
+        """Фазы по отметкам или None, если ответ не был получен."""
+        if self.headers is None or self.connect_end is None:
+            return None
+        dns = _span(self.dns_start, self.dns_end)
+        connect = _span(self.connect_start, self.connect_end)
+        if connect is not None and dns is not None:
+            # Разрешение имени идет внутри создания соединения
+            connect = max(connect - dns, 0.0)
+        return CheckPhases(
+            dns, connect,
+            self.headers - self.connect_end,
+            _span(self.headers, self.done)
+        )
+
+
+def _span(start: Optional[float], end: Optional[float]) -> Optional[float]:
+    return end - start if start is not None and end is not None else None
+
+
+def _marker(attribute: str):
+    async def mark(session, context, params):
+        recorder = context.trace_request_ctx
+        if isinstance(recorder, PhaseRecorder):
+            setattr(recorder, attribute, time.monotonic())
+    return mark
+
+
+def trace_config():
+    """
+    TraceConfig, который размечает фазы запросов с PhaseRecorder.
+
+    Пример:
+        session = aiohttp.ClientSession(trace_configs=[trace_config()])
+        recorder = PhaseRecorder()
+        async with session.get(url, trace_request_ctx=recorder) as response:
+            await response.read()
+        recorder.finish()
+    """
+    import aiohttp
+
+    config = aiohttp.TraceConfig()
+    config.on_dns_resolvehost_start.append(_marker('dns_start'))
+    config.on_dns_resolvehost_end.append(_marker('dns_end'))
+    config.on_connection_create_start.append(_marker('connect_start'))
+    config.on_connection_create_end.append(_marker('connect_end'))
+    # Переиспользованное соединение готово сразу
+    config.on_connection_reuseconn.append(_marker('connect_end'))
+    config.on_request_end.append(_marker('headers'))
+    return config
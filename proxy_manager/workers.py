@@ -0,0 +1,236 @@
+"""
+Модуль многопроцессной проверки прокси.
+
+На десятках тысяч проверок в минуту один цикл событий упирается в ядро:
+накладные расходы aiohttp на запрос - это Python-код. Здесь кандидаты
+делятся на шарды по числу процессов; каждый процесс проверяет свой шард
+в собственном цикле событий (uvloop, если установлен) через одну общую
+сессию aiohttp. Результаты пачками возвращаются в родительский процесс,
+который один пишет их в базу.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import queue
+import time
+from typing import Iterable, List, Optional, Sequence, Tuple
+from .checker import CheckReport, ProxyChecker, parse_exit_ip
+from .latency import CheckTimeouts
+from .prober import ProbeError, ProtocolProber
+from .proxy import Proxy
+from .tracing import CheckPhases, PhaseRecorder, trace_config
+
+# (номер в общем списке, ip, порт, протокол)
+_Task = Tuple[int, str, int, str]
+
+# (время ответа, внешний адрес, фазы запроса); время None - прокси не работает
+_Outcome = Tuple[Optional[float], Optional[str], Optional[CheckPhases]]
+
+
+def _install_fast_loop() -> bool:
+    """Включает uvloop, если он установлен."""
+    try:
+        import uvloop
+    except ImportError:
+        return False
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    return True
+
+
+async def _check(session, prober: ProtocolProber, url: str, task: _Task,
+                 timeouts: CheckTimeouts) -> _Outcome:
+    """Проверяет прокси; время ответа, внешний адрес из ответа и фазы запроса."""
+    import aiohttp
+
+    _, ip, port, protocol = task
+    if protocol in ('socks4', 'socks5'):
+        try:
+            return await prober.probe(
+                ip, port, protocol, timeout=timeouts.read, connect_timeout=timeouts.connect
+            ), None, None
+        except (ProbeError, OSError, asyncio.TimeoutError):
+            return None, None, None
+
+    recorder = PhaseRecorder()
+    start = time.monotonic()
+    try:
+        async with session.get(
+            url,
+            proxy=f"{protocol}://{ip}:{port}",
+            timeout=aiohttp.ClientTimeout(
+                total=timeouts.total, sock_connect=timeouts.connect, sock_read=timeouts.read
+            ),
+            ssl=False,
+            trace_request_ctx=recorder
+        ) as response:
+            body = await response.read()
+            recorder.finish()
+            if response.status == 200:
+                exit_ip = parse_exit_ip(body.decode('utf-8', 'replace'))
+                return time.monotonic() - start, exit_ip, recorder.phases()
+    except (aiohttp.ClientError, asyncio.TimeoutError, OSError, ValueError):
+        pass
+    return None, None, None
+
+
+async def _check_shard(shard: Sequence[_Task], url: str, timeouts: CheckTimeouts,
+                       concurrency: int, results, batch_size: int) -> None:
+    import aiohttp
+
+    prober = ProtocolProber.from_url(url)
+    pending = iter(shard)
+    batch = []
+
+    async def worker(session):
+        for task in pending:
+            elapsed, exit_ip, phases = await _check(session, prober, url, task, timeouts)
+            batch.append((task[0], elapsed, exit_ip, phases))
+            if len(batch) >= batch_size:
+                results.put(('results', batch[:]))
+                del batch[:]
+
+    connector = aiohttp.TCPConnector(limit=concurrency, ttl_dns_cache=300)
+    async with aiohttp.ClientSession(connector=connector, trace_configs=[trace_config()]) as session:
+        await asyncio.gather(*(worker(session) for _ in range(min(concurrency, len(shard)))))
+    if batch:
+        results.put(('results', batch))
+
+
+def _run_worker(shard, url, timeouts, concurrency, results, batch_size, fast_loop) -> None:
+    """Точка входа процесса-проверщика."""
+    if fast_loop:
+        _install_fast_loop()
+    try:
+        asyncio.run(_check_shard(shard, url, timeouts, concurrency, results, batch_size))
+    finally:
+        results.put(('done', os.getpid()))
+
+
+class ShardedChecker:
+    """
+    Проверка прокси в нескольких процессах.
+
+    Пример:
+        report = ShardedChecker(manager, processes=4).check_unchecked(20000)
+    """
+
+    def __init__(
+        self,
+        manager,
+        processes: Optional[int] = None,
+        concurrency: int = 200,
+        check_url: str = "http://api.ipify.org?format=json",
+        timeouts: Optional[CheckTimeouts] = None,
+        fast_loop: bool = True,
+        batch_size: int = 100,
+        write_batch: int = 1000,
+        start_method: Optional[str] = None
+    ):
+        """
+        Args:
+            manager: Экземпляр ProxyManager
+            processes: Число процессов (по умолчанию число ядер)
+            concurrency: Одновременных проверок в каждом процессе
+            check_url: Адрес проверочного запроса
+            timeouts: Сроки проверки; по умолчанию адаптивные сроки ProxyChecker
+            fast_loop: Использовать uvloop, если он установлен
+            batch_size: Сколько результатов процесс отправляет одной пачкой
+            write_batch: Сколько результатов записывается в базу одной операцией
+            start_method: Способ запуска процессов multiprocessing
+                ('fork', 'spawn', 'forkserver'); по умолчанию системный
+        """
+        self.manager = manager
+        self.processes = processes or os.cpu_count() or 1
+        self.concurrency = concurrency
+        self.check_url = check_url
+        self.timeouts = timeouts
+        self.fast_loop = fast_loop
+        self.batch_size = batch_size
+        self.write_batch = write_batch
+        self.context = multiprocessing.get_context(start_method)
+        self.logger = logging.getLogger(__name__)
+
+    def check_unchecked(self, limit: int = 10000) -> CheckReport:
+        """Проверяет до limit непроверенных прокси из базы, начиная с лучших источников."""
+        return self.check(self.manager.get_unchecked_proxies(limit, by_source_yield=True))
+
+    def check(self, proxies: Iterable[Proxy]) -> CheckReport:
+        """
+        Проверяет прокси и сохраняет результаты.
+
+        Процессы получают шарды по очереди (каждый N-й прокси), так что
+        прокси одной подсети, идущие подряд, распределяются между ними.
+        Результаты записываются в базу пачками по мере поступления.
+
+        Args:
+            proxies: Прокси для проверки
+
+        Returns:
+            CheckReport: Рабочие прокси и счетчики проверки
+        """
+        proxies = list(proxies)
+        report = CheckReport()
+        if not proxies:
+            return report
+        timeouts = self.timeouts or ProxyChecker(self.manager).timeouts()
+        tasks = [(i, p.ip, int(p.port), p.protocol) for i, p in enumerate(proxies)]
+        count = min(self.processes, len(tasks))
+
+        results = self.context.Queue()
+        workers = [
+            self.context.Process(
+                target=_run_worker,
+                args=(tasks[shard::count], self.check_url, timeouts, self.concurrency,
+                      results, self.batch_size, self.fast_loop),
+                daemon=True
+            )
+            for shard in range(count)
+        ]
+        started = time.monotonic()
+        for worker in workers:
+            worker.start()
+
+        finished = 0
+        unsaved: List[Proxy] = []
+        try:
+            while finished < count:
+                try:
+                    kind, payload = results.get(timeout=1.0)
+                except queue.Empty:
+                    if not any(worker.is_alive() for worker in workers):
+                        self.logger.error("Check workers exited without reporting results")
+                        break
+                    continue
+                if kind == 'done':
+                    finished += 1
+                    continue
+                for index, elapsed, exit_ip, phases in payload:
+                    proxy = proxies[index]
+                    proxy.response_time = elapsed
+                    proxy.exit_ip = exit_ip
+                    proxy.phases = phases
+                    proxy.status = "working" if elapsed is not None else "failed"
+                    if elapsed is not None:
+                        report.working.append(proxy)
+                    unsaved.append(proxy)
+                report.checked += len(payload)
+                if len(unsaved) >= self.write_batch:
+                    self.manager.update_proxy_statuses(unsaved)
+                    unsaved = []
+        finally:
+            if unsaved:
+                self.manager.update_proxy_statuses(unsaved)
+            for worker in workers:
+                worker.join(timeout=5)
+                if worker.is_alive():
+                    worker.terminate()
+
+        report.elapsed = time.monotonic() - started
+        self.manager.save_dead_cache()
+        self.logger.info(
+            f"Checked {report.checked} proxies in {count} processes in {report.elapsed:.1f}s: "
+            f"{report.checks_per_second:.0f} checks/s, {len(report.working)} working"
+        )
+        return report
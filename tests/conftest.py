@@ -4,6 +4,7 @@ import os
 import pytest
 import sqlite3
 from proxy_manager import ProxyManager
+from proxy_manager.storage import BACKENDS, create_storage
 
 
 @pytest.fixture
@@ -14,19 +15,25 @@ def temp_db_path(tmp_path):
 
 
 @pytest.fixture
-def proxy_manager(temp_db_path, monkeypatch):
+def proxy_manager(temp_db_path):
     """Создает экземпляр ProxyManager с временной базой данных."""
-    manager = ProxyManager()
-    monkeypatch.setattr(manager, "db_path", temp_db_path)
-    manager._setup_database()
-    return manager
+    return ProxyManager(db_path=temp_db_path)
 
 
 @pytest.fixture
 def sample_proxies():
     """Возвращает список тестовых прокси."""
     return [
-        {"ip": "1.2.3.4", "port": "8080", "protocol": "http"},
-        {"ip": "5.6.7.8", "port": "3128", "protocol": "http"},
-        {"ip": "9.10.11.12", "port": "80", "protocol": "https"}
-    ]
\ No newline at end of file
+        {"ip": "1.2.3.4", "port": 8080, "protocol": "http"},
+        {"ip": "5.6.7.8", "port": 3128, "protocol": "http"},
+        {"ip": "9.10.11.12", "port": 80, "protocol": "https"}
+    ]
+
+
+@pytest.fixture(params=sorted(BACKENDS))
+def storage(request, temp_db_path):
+    """Создает хранилище каждого доступного движка."""
+    kwargs = {'db_path': temp_db_path} if request.param == 'sqlite' else {}
+    backend = create_storage(request.param, **kwargs)
+    backend.setup()
+    return backend
@@ -0,0 +1,69 @@
+"""Тесты пакетной проверки адресов и портов."""
+
+import builtins
+import random
+import pytest
+from unittest.mock import patch
+from proxy_manager.bogons import ENDS, STARTS, address_number, filter_valid, is_bogon, valid_mask
+from proxy_manager.models import Proxy
+
+
+@pytest.fixture(params=["numpy", "bisect"])
+def batch_mode(request):
+    """valid_mask с NumPy и без него."""
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+        yield
+        return
+    real_import = builtins.__import__
+
+    def no_numpy(name, *args, **kwargs):
+        if name == "numpy":
+            raise ImportError(name)
+        return real_import(name, *args, **kwargs)
+
+    with patch("builtins.__import__", side_effect=no_numpy):
+        yield
+
+
+def test_table_is_sorted_and_disjoint():
+    assert STARTS == sorted(STARTS)
+    assert all(end < start for end, start in zip(ENDS, STARTS[1:]))
+
+
+def test_is_bogon_edges():
+    assert is_bogon(address_number("10.0.0.0"))
+    assert is_bogon(address_number("10.255.255.255"))
+    assert not is_bogon(address_number("11.0.0.0"))
+    assert not is_bogon(address_number("100.63.255.255"))
+    assert is_bogon(address_number("100.64.0.0"))
+    assert is_bogon(address_number("255.255.255.255"))
+    assert not is_bogon(address_number("223.255.255.255"))
+
+
+def test_valid_mask(batch_mode):
+    ips = ["1.1.1.1", "10.0.0.1", "172.31.0.1", "8.8.8.8", "8.8.4.4", "2001:4860::8888",
+           "::1", "garbage", "01.2.3.4", None, "9.9.9.9"]
+    ports = [80, "8080", 80, 0, "70000", 443, 80, 80, 80, 80, "x"]
+    assert valid_mask(ips, ports) == [
+        True, False, False, False, False, True, False, False, False, False, False
+    ]
+    assert valid_mask([], []) == []
+
+
+def test_numpy_matches_fallback():
+    pytest.importorskip("numpy")
+    rnd = random.Random(1)
+    ips = [".".join(str(rnd.randrange(256)) for _ in range(4)) for _ in range(5000)]
+    ports = [rnd.randrange(-10, 70000) for _ in range(5000)]
+    expected = [0 < port < 65536 and not is_bogon(address_number(ip)) for ip, port in zip(ips, ports)]
+    assert valid_mask(ips, ports) == expected
+    assert valid_mask(ips, [str(port) for port in ports]) == expected
+
+
+def test_filter_valid_and_model():
+    proxies = [Proxy("1.2.3.4", 80), Proxy("192.168.1.1", 80), Proxy("5.6.7.8", 0)]
+    assert filter_valid(proxies) == proxies[:1]
+    assert Proxy("1.2.3.4", 80).is_valid_public_ip
+    assert not Proxy("100.64.0.1", 80).is_valid_public_ip
+    assert not Proxy("not an ip", 80).is_valid_public_ip
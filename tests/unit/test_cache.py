@@ -0,0 +1,147 @@
+"""Тесты кеша ответов."""
+
+import asyncio
+import pytest
+import pytest_asyncio
+from aiohttp import web
+from email.utils import formatdate
+from unittest.mock import patch
+from proxy_manager.cache import ResponseCache, cache_key, freshness_lifetime
+from proxy_manager.hedging import HedgedClient
+from proxy_manager.proxy import Proxy
+
+FRESH = {"Cache-Control": "max-age=60"}
+
+
+def test_cache_key_sorts_params():
+    assert cache_key("get", "http://a.test/x", {"b": 2, "a": 1}) == "GET http://a.test/x?a=1&b=2"
+    assert cache_key("GET", "http://a.test/x?q=1", {"a": 1}) == "GET http://a.test/x?q=1&a=1"
+    assert cache_key("GET", "http://a.test/x") == "GET http://a.test/x"
+
+
+@pytest.mark.parametrize("headers, expected", [
+    ({"Cache-Control": "public, max-age=120"}, 120),
+    ({"cache-control": "max-age=120", "Age": "20"}, 100),
+    ({"Cache-Control": "private, max-age=30"}, 30),
+    ({"Cache-Control": "no-store, max-age=120"}, 0),
+    ({"Cache-Control": "no-cache"}, 0),
+    ({"Date": formatdate(1000, usegmt=True), "Expires": formatdate(1090, usegmt=True)}, 90),
+    ({"Expires": "0"}, 0),
+    ({}, 5),
+])
+def test_freshness_lifetime(headers, expected):
+    assert freshness_lifetime(headers, default_ttl=5) == pytest.approx(expected)
+
+
+def test_memory_lru_bounds():
+    cache = ResponseCache(max_entries=2, max_bytes=10)
+    cache.put("a", 200, FRESH, b"1234")
+    cache.put("b", 200, FRESH, b"1234")
+    assert cache.get("a") is not None  # a становится самой свежей
+    cache.put("c", 200, FRESH, b"1234")
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+
+    cache.put("d", 200, FRESH, b"123456789")  # вытесняет по объему
+    assert len(cache) == 1
+    assert not cache.put("e", 500, FRESH, b"x")
+    assert not cache.put("f", 200, {}, b"x")
+
+
+def test_expired_entries_are_dropped():
+    cache = ResponseCache()
+    cache.put("a", 200, FRESH, b"x")
+    with patch("proxy_manager.cache.time.time", return_value=10 ** 12):
+        assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_disk_tier_survives_restart(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = ResponseCache(path=path)
+    cache.put("a", 200, {"Cache-Control": "max-age=60", "X-Test": "1"}, b"body")
+    cache.put("b", 200, {"Cache-Control": "max-age=1"}, b"old")
+    cache.close()
+
+    cache = ResponseCache(path=path)
+    entry = cache.get("a")
+    assert (entry.status, entry.body, entry.headers["X-Test"]) == (200, b"body", "1")
+    assert len(cache) == 1
+    with patch("proxy_manager.cache.time.time", return_value=10 ** 12):
+        assert cache.purge_expired() == 2
+    cache.close()
+
+
+@pytest.mark.asyncio
+async def test_coalesce_shares_one_fetch():
+    cache = ResponseCache()
+    calls = []
+
+    class Result:
+        status, headers, body = 200, FRESH, b"shared"
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return Result()
+
+    results = await asyncio.gather(*(cache.coalesce("k", fetch) for _ in range(10)))
+    assert len(calls) == 1
+    assert all(result.body == b"shared" for result in results)
+    assert cache.coalesced == 9
+    assert cache.get("k").body == b"shared"
+
+
+@pytest.mark.asyncio
+async def test_coalesce_shares_errors():
+    cache = ResponseCache()
+
+    async def fetch():
+        await asyncio.sleep(0.01)
+        raise ValueError("upstream")
+
+    results = await asyncio.gather(*(cache.coalesce("k", fetch) for _ in range(3)),
+                                   return_exceptions=True)
+    assert all(isinstance(result, ValueError) for result in results)
+    assert cache.get("k") is None
+
+
+@pytest_asyncio.fixture
+async def origin_proxy():
+    """Имитация прокси, который отвечает с max-age и считает запросы."""
+    hits = []
+
+    async def handler(request):
+        hits.append(request.path_qs)
+        await asyncio.sleep(0.01)
+        return web.Response(text="page", headers={"Cache-Control": "max-age=60"})
+
+    app = web.Application()
+    app.router.add_route("*", "/{tail:.*}", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    yield site._server.sockets[0].getsockname()[1], hits
+    await runner.cleanup()
+
+
+@pytest.mark.asyncio
+async def test_hedged_client_uses_cache(proxy_manager, origin_proxy):
+    port, hits = origin_proxy
+    proxy = Proxy("127.0.0.1", port)
+    proxy_manager.add_proxy(proxy)
+    proxy.status = "working"
+    proxy.response_time = 0.1
+    proxy_manager.update_proxy_status(proxy)
+
+    async with HedgedClient(proxy_manager, cache=ResponseCache()) as client:
+        first = await asyncio.gather(*(client.get("http://target.test/a") for _ in range(5)))
+        again = await client.get("http://target.test/a")
+        other = await client.get("http://target.test/a", params={"page": 2})
+        posted = await client.request("POST", "http://target.test/a", data=b"x")
+
+    assert len(hits) == 3
+    assert all(response.text() == "page" for response in first)
+    assert again.from_cache and again.proxy is None
+    assert not other.from_cache and not posted.from_cache
@@ -1,9 +1,15 @@
 """Тесты для ProxyChecker."""
 
+import asyncio
+import re
+import socketserver
+import threading
+import time
 import pytest
 import aiohttp
 from unittest.mock import AsyncMock, patch, MagicMock
 from proxy_manager import ProxyChecker
+from proxy_manager.checker import parse_exit_ip
 from proxy_manager.proxy import Proxy
 
 
@@ -98,3 +104,234 @@ def test_get_unchecked_proxies(proxy_checker, sample_proxies, proxy_manager):
     assert len(unchecked) == 2  # два прокси должны остаться непроверенными
     for proxy in unchecked:
         assert proxy.status is None
+
+
+def test_get_unchecked_proxies_prefers_productive_sources(proxy_checker, proxy_manager):
+    """Сначала проверяются прокси источника с большей долей рабочих."""
+    proxy_manager.add_proxies([Proxy(f"10.0.0.{i}", 80) for i in range(1, 4)], source="poor")
+    proxy_manager.add_proxies([Proxy(f"10.0.1.{i}", 80) for i in range(1, 4)], source="rich")
+    for ip, status in [("10.0.0.1", "failed"), ("10.0.1.1", "working")]:
+        proxy = Proxy(ip, 80)
+        proxy.status = status
+        proxy.response_time = 0.2 if status == "working" else None
+        proxy_manager.update_proxy_status(proxy)
+
+    unchecked = proxy_checker.get_unchecked_proxies(3)
+
+    assert [p.ip for p in unchecked] == ["10.0.1.2", "10.0.1.3", "10.0.0.2"]
+    assert [s["name"] for s in proxy_manager.get_source_stats()] == ["rich", "poor"]
+    assert proxy_manager.get_source_stats()[0]["working_ratio"] == 1.0
+
+
+@pytest.mark.asyncio
+async def test_revalidate_working_proxies(proxy_checker, sample_proxies, proxy_manager):
+    """Перепроверка пула рабочих прокси."""
+    for data in sample_proxies:
+        proxy = Proxy(**data)
+        proxy_manager.add_proxy(proxy)
+        proxy.status = "working"
+        proxy.response_time = 0.5
+        proxy_manager.update_proxy_status(proxy)
+
+    async def mock_check_proxy(proxy):
+        return proxy.ip == sample_proxies[1]["ip"]
+
+    with patch.object(proxy_checker, 'check_proxy', side_effect=mock_check_proxy):
+        alive = await proxy_checker.revalidate_working_proxies(limit=10)
+
+    assert [p.ip for p in alive] == [sample_proxies[1]["ip"]]
+
+
+@pytest.mark.asyncio
+async def test_revalidate_checks_one_per_exit_ip(proxy_checker, proxy_manager):
+    """Из группы с общим внешним адресом проверяется один прокси, остальные - после его отказа."""
+    layout = [("10.0.0.1", "5.5.5.5", 0.1), ("10.0.1.1", "5.5.5.5", 0.2),
+              ("10.0.2.1", "6.6.6.6", 0.3), ("10.0.3.1", "6.6.6.6", 0.4)]
+    for ip, exit_ip, response_time in layout:
+        proxy = Proxy(ip, 8080)
+        proxy_manager.add_proxy(proxy)
+        proxy.status = "working"
+        proxy.response_time = response_time
+        proxy.exit_ip = exit_ip
+        proxy_manager.update_proxy_status(proxy)
+
+    stored = {p.ip: p.last_check for p in proxy_manager.get_working_proxies(10)}
+    checked = []
+
+    async def mock_check_proxy(proxy):
+        checked.append(proxy.ip)
+        return proxy.ip != "10.0.2.1"
+
+    with patch.object(proxy_checker, 'check_proxy', side_effect=mock_check_proxy):
+        alive = await proxy_checker.revalidate_working_proxies(limit=10)
+
+    assert checked == ["10.0.0.1", "10.0.2.1", "10.0.3.1"]
+    # Непроверенный член работающей группы не выдается и в базе не меняется
+    assert [p.ip for p in alive] == ["10.0.0.1", "10.0.3.1"]
+    unchecked = proxy_manager.get_proxies_by_exit_ip("5.5.5.5")[1]
+    assert (unchecked.ip, unchecked.status) == ("10.0.1.1", "working")
+    assert unchecked.last_check == stored["10.0.1.1"]
+
+    # Следующая перепроверка берет того, кто дольше не проверялся
+    with proxy_manager.storage.get_connection() as conn:
+        conn.execute("UPDATE proxies SET last_check = last_check - 60 WHERE ip = '10.0.1.1'")
+    checked.clear()
+    with patch.object(proxy_checker, 'check_proxy', side_effect=mock_check_proxy):
+        await proxy_checker.revalidate_working_proxies(limit=10)
+    assert checked[0] == "10.0.1.1"
+    # Один прокси на внешний адрес - только по запросу
+    assert len(proxy_manager.get_working_proxies(10)) == 4
+    picked = proxy_manager.get_working_proxies(10, max_per_exit_ip=1)
+    assert [p.ip for p in picked] == ["10.0.0.1", "10.0.2.1"]
+    assert len(proxy_manager.get_proxies_by_exit_ip("5.5.5.5")) == 2
+
+
+def test_parse_exit_ip():
+    assert parse_exit_ip('{"ip": "1.2.3.4"}') == "1.2.3.4"
+    assert parse_exit_ip('{"origin": "10.0.0.1, 5.6.7.8"}') == "5.6.7.8"
+    assert parse_exit_ip(" 2001:db8::1\n") == "2001:db8::1"
+    assert parse_exit_ip("<html>blocked</html>") is None
+    assert parse_exit_ip('{"args": {}}') is None
+    assert parse_exit_ip("[1, 2]") is None
+
+
+def test_timeouts_fixed_without_samples(proxy_checker):
+    """Пока пул пуст, используется полный таймаут."""
+    timeouts = proxy_checker.timeouts()
+    assert timeouts.read == 10.0
+    assert timeouts.connect == 5.0
+    assert timeouts.total == 15.0
+
+
+def test_timeouts_follow_working_pool(proxy_checker, proxy_manager):
+    """Срок ответа - p90 времени ответа пула, умноженный на timeout_factor."""
+    for i in range(1, 21):
+        proxy = Proxy(f"45.10.{i}.1", 8080)
+        proxy_manager.add_proxy(proxy)
+        proxy.status = "working"
+        proxy.response_time = 0.05 * i
+        proxy_manager.update_proxy_status(proxy)
+
+    timeouts = proxy_checker.timeouts()
+    assert timeouts.read == pytest.approx(0.9 * 3)
+    assert timeouts.connect == pytest.approx(1.35)
+
+    # Нижняя граница и отключение адаптации
+    proxy_checker.timeout_factor = 0.1
+    assert proxy_checker.timeouts().read == 1.0
+    proxy_checker.timeout_factor = None
+    assert proxy_checker.timeouts().read == 10.0
+
+
+@pytest.mark.asyncio
+async def test_check_proxies_stops_at_target(proxy_checker):
+    """Найдя нужное число рабочих прокси, проверка отменяет остальные."""
+    proxies = [Proxy(f"45.10.{i}.1", 8080) for i in range(6)]
+    delays = {"45.10.0.1": 0.01, "45.10.1.1": 0.02}
+
+    async def mock_check_proxy(proxy):
+        await asyncio.sleep(delays.get(proxy.ip, 5))
+        return True
+
+    with patch.object(proxy_checker, 'check_proxy', side_effect=mock_check_proxy):
+        report = await asyncio.wait_for(
+            proxy_checker.check_proxies(proxies, target=2, concurrency=4), 2
+        )
+
+    assert [p.ip for p in report.working] == ["45.10.0.1", "45.10.1.1"]
+    assert report.checked == 2
+    assert report.cancelled == 3  # освободившийся воркер успел взять следующий
+    assert report.useful_per_second > 10
+
+
+class PayloadProxy(socketserver.StreamRequestHandler):
+    """
+    Прокси-заглушка: на ?bytes=N отдает N байт кусками, на остальное - JSON
+    с адресом; ?delay=M задерживает ответ на M миллисекунд.
+    """
+
+    def handle(self):
+        request_line = self.rfile.readline()
+        while self.rfile.readline() not in (b"\r\n", b""):
+            pass
+        delay = re.search(rb"delay=(\d+)", request_line)
+        if delay is not None:
+            time.sleep(int(delay.group(1)) / 1000)
+        size = re.search(rb"bytes=(\d+)", request_line)
+        if size is None:
+            body = b'{"ip": "203.0.113.9"}'
+            self.wfile.write(b"HTTP/1.1 200 OK\r\nContent-Length: %d\r\n\r\n%s" % (len(body), body))
+            return
+        size = int(size.group(1))
+        self.wfile.write(b"HTTP/1.1 200 OK\r\nContent-Length: %d\r\nConnection: close\r\n\r\n" % size)
+        for offset in range(0, size, 65536):
+            self.wfile.write(b"x" * min(65536, size - offset))
+            time.sleep(0.05)
+
+
+@pytest.fixture
+def payload_proxy():
+    server = socketserver.ThreadingTCPServer(("0.0.0.0", 0), PayloadProxy)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server.server_address[1]
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.asyncio
+async def test_bandwidth_probe_after_check(proxy_manager, payload_proxy):
+    """Рабочий прокси проходит замер скорости, не чаще bandwidth_rate замеров в секунду."""
+    checker = ProxyChecker(
+        proxy_manager, timeout_factor=None, bandwidth_url="http://payload.test/?bytes=300000",
+        bandwidth_bytes=200000, bandwidth_rate=0.5
+    )
+    first, second = Proxy("127.0.0.1", payload_proxy), Proxy("127.0.0.2", payload_proxy)
+    for proxy in (first, second):
+        proxy_manager.add_proxy(proxy)
+
+    assert await checker.check_proxy(first)
+    assert await checker.check_proxy(second)
+
+    assert first.exit_ip == "203.0.113.9"
+    assert 0 < first.ttfb < 1.0
+    # Первый кусок приходит с заголовками, до 200 КБ нужны еще три по 64 КБ,
+    # каждый после паузы 50 мс
+    assert 4 * 65536 / 1.0 < first.bandwidth <= 4 * 65536 / 0.15
+    assert second.bandwidth is None
+
+    ranked = proxy_manager.get_working_proxies(limit=10, by_bandwidth=True)
+    assert [p.ip for p in ranked] == ["127.0.0.1"]
+    assert ranked[0].bandwidth == pytest.approx(first.bandwidth)
+
+
+def test_zero_bandwidth_rate_disables_probe(proxy_manager):
+    checker = ProxyChecker(proxy_manager, bandwidth_url="http://payload.test/", bandwidth_rate=0)
+    assert not checker._bandwidth_due()
+    with pytest.raises(ValueError):
+        ProxyChecker(proxy_manager, bandwidth_url="http://payload.test/", bandwidth_rate=-1)
+
+
+@pytest.mark.asyncio
+async def test_check_records_phases(proxy_manager, payload_proxy):
+    """Фазы проверки размечаются по хукам aiohttp и сглаживаются в хранилище."""
+    checker = ProxyChecker(proxy_manager, timeout_factor=None)
+    checker.check_url = "http://check.test/?delay=100"
+    proxy = Proxy("127.0.0.1", payload_proxy)
+    proxy_manager.add_proxy(proxy)
+
+    assert await checker.check_proxy(proxy)
+
+    phases = proxy.phases
+    assert phases.dns is None  # прокси задан адресом
+    assert 0 <= phases.connect < 0.1
+    assert phases.wait >= 0.1
+    assert phases.transfer >= 0
+    assert proxy.response_time >= phases.connect + phases.wait
+
+    stored = proxy_manager.get_working_proxies(limit=1, by_connect_time=True)[0]
+    assert stored.phases.wait == pytest.approx(phases.wait)
+    stats = proxy_manager.get_statistics()
+    assert stats["phases"]["wait"] == round(phases.wait, 3)
+    assert stats["phases"]["dns"] is None
+    assert proxy_manager.verify_statistics()
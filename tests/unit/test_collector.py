@@ -3,6 +3,7 @@
 import pytest
 from unittest.mock import AsyncMock, patch, MagicMock
 from proxy_manager import ProxyCollector
+from proxy_manager.proxy import Proxy
 
 
 @pytest.fixture
@@ -39,6 +40,30 @@ async def test_collect_from_api(proxy_collector):
     assert proxies[1].protocol == "http"
 
 
+@pytest.mark.asyncio
+async def test_collect_from_api_skips_malformed_lines(proxy_collector):
+    """Кривые строки пропускаются по одной, остальной источник сохраняется."""
+    mock_response = AsyncMock()
+    mock_response.status = 200
+    mock_response.text.return_value = (
+        "1.2.3.4:8080\n\n5.6.7.8:3128:user:pass\n2001:db8::1\njunk\n9.9.9.9:80\n"
+    )
+    mock_response.__aenter__.return_value = mock_response
+    
+    mock_session = AsyncMock()
+    mock_session.__aenter__.return_value = mock_session
+    mock_session.get.return_value = mock_response
+    mock_session.close = AsyncMock()
+    
+    with patch('aiohttp.ClientSession', return_value=mock_session):
+        proxies = await proxy_collector._collect_from_api(
+            "http://test.com/proxies",
+            "http"
+        )
+    
+    assert [(p.ip, p.port) for p in proxies] == [("1.2.3.4", "8080"), ("9.9.9.9", "80")]
+
+
 @pytest.mark.asyncio
 async def test_collect_from_api_failure(proxy_collector):
     """Тест обработки ошибок при сборе прокси."""
@@ -106,3 +131,23 @@ async def test_collect_all_with_duplicates(proxy_collector):
     # Проверяем, что дубликаты были отфильтрованы
     stats = proxy_collector.manager.get_statistics()
     assert stats["total"] == 2  # должно быть только 2 уникальных прокси
+
+
+@pytest.mark.asyncio
+async def test_collect_all_records_every_source(proxy_collector):
+    """Прокси из нескольких источников связывается с каждым из них."""
+    async def mock_collect(url, protocol):
+        if "source1" in url:
+            return [Proxy("1.1.1.1", "80"), Proxy("2.2.2.2", "8080")]
+        return [Proxy("1.1.1.1", "80")]
+
+    with patch.object(proxy_collector, '_collect_from_api', side_effect=mock_collect):
+        proxy_collector.sources = [
+            {"url": "http://source1.com/proxies", "protocol": "http"},
+            {"url": "http://source2.com/proxies", "protocol": "http"}
+        ]
+        await proxy_collector.collect_all()
+
+    stats = {s["name"]: s["collected"] for s in proxy_collector.manager.get_source_stats()}
+    assert stats == {"http://source1.com/proxies": 2, "http://source2.com/proxies": 1}
+    assert proxy_collector.manager.get_statistics()["total"] == 2
@@ -0,0 +1,153 @@
+"""Тесты отрицательного кеша нерабочих прокси."""
+
+import os
+import pytest
+from unittest.mock import patch
+from proxy_manager import ProxyChecker, ProxyCollector, ProxyManager
+from proxy_manager.deadcache import BloomFilter, DeadProxyCache, proxy_key
+from proxy_manager.proxy import Proxy
+
+HOUR = 3600.0
+
+
+class Clock:
+    """Управляемое время для проверки периодов и забывания."""
+
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    clock = Clock()
+    with patch("proxy_manager.deadcache.time.time", clock):
+        yield clock
+
+
+def test_proxy_key():
+    assert proxy_key("1.2.3.4", "8080") == bytes([1, 2, 3, 4, 0x1F, 0x90])
+    assert proxy_key("1.2.3.4", 8080) == proxy_key("1.2.3.4", "8080")
+    assert proxy_key("proxy.example", 80) == b"proxy.example:80"
+
+
+def test_bloom_false_positive_rate():
+    size, hashes = BloomFilter.optimal(10000, 0.01)
+    bloom = BloomFilter(size, hashes, 0.0)
+    for i in range(10000):
+        bloom.add(proxy_key(f"10.0.{i // 256}.{i % 256}", 80))
+    assert all(proxy_key(f"10.0.{i // 256}.{i % 256}", 80) in bloom for i in range(10000))
+    false_positives = sum(proxy_key(f"10.1.{i // 256}.{i % 256}", 80) in bloom for i in range(10000))
+    assert false_positives < 200
+
+
+def test_dead_after_failures_in_several_periods(clock):
+    cache = DeadProxyCache(capacity=1000, period=HOUR, generations=4, min_failures=2)
+    cache.record_failure("1.2.3.4", 80)
+    cache.record_failure("1.2.3.4", 80)  # тот же период не считается
+    assert cache.failures("1.2.3.4", 80) == 1
+    assert not cache.is_dead("1.2.3.4", 80)
+
+    clock.now += HOUR
+    cache.record_failure("1.2.3.4", 80)
+    assert cache.is_dead("1.2.3.4", 80)
+    assert not cache.is_dead("1.2.3.4", 81)
+
+    # Через окно из generations периодов отказы забываются
+    clock.now += 4 * HOUR
+    assert cache.failures("1.2.3.4", 80) == 0
+
+
+def test_memory_is_bounded(clock):
+    cache = DeadProxyCache(capacity=10, period=HOUR, generations=3, min_failures=1)
+    for i in range(100):
+        cache.record_failure(f"1.2.3.{i}", 80)
+    # Заполненный фильтр начинает новый период раньше срока
+    assert len(cache.filters) == 3
+    assert all(bloom.count <= 10 for bloom in cache.filters)
+    assert cache.memory_bytes == cache.size // 8 * 3
+    assert cache.is_dead("1.2.3.99", 80)
+
+
+def test_persistence(tmp_path, clock):
+    path = str(tmp_path / "proxies.dead")
+    cache = DeadProxyCache(path, capacity=1000, period=HOUR, min_failures=1)
+    cache.record_failure("1.2.3.4", 80)
+    assert cache.dirty
+    cache.save()
+
+    assert DeadProxyCache(path, capacity=1000, period=HOUR, min_failures=1).is_dead("1.2.3.4", 80)
+    # Другие параметры - кеш начинается заново
+    assert not DeadProxyCache(path, capacity=2000, period=HOUR, min_failures=1).is_dead("1.2.3.4", 80)
+
+    with open(path, "r+b") as f:
+        f.truncate(40)
+    assert DeadProxyCache(path, capacity=1000, period=HOUR, min_failures=1).filters == []
+
+
+@pytest.fixture
+def manager(temp_db_path, clock):
+    return ProxyManager(temp_db_path, dead_cache=DeadProxyCache(
+        os.path.splitext(temp_db_path)[0] + ".dead", capacity=1000, period=HOUR, min_failures=2
+    ))
+
+
+def fail(manager, proxy):
+    proxy.status = "failed"
+    manager.update_proxy_status(proxy)
+
+
+def test_manager_records_failures(manager, clock):
+    proxy = Proxy("1.2.3.4", 80)
+    manager.add_proxy(proxy)
+    fail(manager, proxy)
+    clock.now += HOUR
+    manager.update_proxy_statuses([proxy])
+    assert manager.is_known_dead("1.2.3.4", "80")
+
+    manager.save_dead_cache()
+    assert ProxyManager(manager.db_path, dead_cache=True).dead_cache.path == manager.dead_cache.path
+    assert not ProxyManager(manager.db_path).is_known_dead("1.2.3.4", 80)
+
+
+@pytest.mark.asyncio
+async def test_collector_skips_dead(manager, clock):
+    for _ in range(2):
+        manager.dead_cache.record_failure("1.1.1.1", "80")
+        clock.now += HOUR
+    collector = ProxyCollector(manager)
+    collector.sources = [{"url": "http://test.com", "protocol": "http"}]
+
+    async def collect(url, protocol):
+        return [Proxy("1.1.1.1", "80"), Proxy("2.2.2.2", "8080")]
+
+    with patch.object(collector, "_collect_from_api", side_effect=collect):
+        await collector.collect_all()
+
+    assert [p.ip for p in manager.get_unchecked_proxies()] == ["2.2.2.2"]
+
+
+@pytest.mark.asyncio
+async def test_checker_checks_dead_last(manager, clock):
+    for ip in ["45.10.1.1", "45.20.1.1", "45.30.1.1"]:
+        manager.add_proxy(Proxy(ip, 80))
+    for _ in range(2):
+        manager.dead_cache.record_failure("45.10.1.1", 80)
+        clock.now += HOUR
+
+    checker = ProxyChecker(manager)
+    order = []
+
+    async def mock_check_proxy(proxy):
+        order.append(proxy.ip)
+        proxy.status = "failed"
+        manager.update_proxy_status(proxy)
+        return False
+
+    with patch.object(checker, "check_proxy", side_effect=mock_check_proxy):
+        await checker.check_random_proxies(limit=10)
+
+    assert order[-1] == "45.10.1.1"
+    assert not manager.dead_cache.dirty  # сохранен после проверки
@@ -0,0 +1,116 @@
+"""Тесты офлайн-базы GeoIP."""
+
+import builtins
+import pytest
+from unittest.mock import patch
+from proxy_manager import ProxyCollector
+from proxy_manager.geoip import GeoInfo, GeoIPDatabase, GeoIPError, compile_database, ip_to_int
+from proxy_manager.models import Proxy as ModelProxy
+from proxy_manager.proxy import Proxy
+
+CSV = """\
+# start,end,country,asn
+start_ip,end_ip,country,asn
+45.10.0.0,45.10.255.255,DE,AS24940
+1.0.0.0,1.0.0.255,AU,13335
+2001:db8::,2001:db8::ffff,US,1
+751435776,751436031,US,
+103.152.112.0,103.152.112.255,-,AS0
+185.1.0.0,185.1.0.255,ZZ,64500
+"""
+
+
+@pytest.fixture
+def geoip(tmp_path):
+    source = tmp_path / "ranges.csv"
+    source.write_text(CSV)
+    path = str(tmp_path / "geoip.bin")
+    assert compile_database(str(source), path) == 4
+    with GeoIPDatabase(path) as db:
+        yield db
+
+
+@pytest.fixture(params=["numpy", "bisect"])
+def batch_mode(request):
+    """lookup_many с NumPy и без него."""
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+        yield
+        return
+    real_import = builtins.__import__
+
+    def no_numpy(name, *args, **kwargs):
+        if name == "numpy":
+            raise ImportError(name)
+        return real_import(name, *args, **kwargs)
+
+    with patch("builtins.__import__", side_effect=no_numpy):
+        yield
+
+
+def test_lookup(geoip):
+    """Поиск по границам диапазонов, промахи и некорректные адреса."""
+    assert len(geoip) == 4
+    assert geoip.lookup("45.10.0.0") == GeoInfo("DE", 24940)
+    assert geoip.lookup("45.10.255.255") == GeoInfo("DE", 24940)
+    assert geoip.lookup("1.0.0.7") == GeoInfo("AU", 13335)
+    assert geoip.lookup("44.202.0.5") == GeoInfo("US", None)
+    assert geoip.lookup("185.1.0.1") == GeoInfo(None, 64500)
+    assert geoip.lookup("45.11.0.0") is None
+    assert geoip.lookup("0.0.0.1") is None
+    assert geoip.lookup("255.255.255.255") is None
+    assert geoip.lookup("not-an-ip") is None
+    assert geoip.lookup("127.1") is None
+    assert geoip.lookup("2001:db8::1") is None
+
+
+def test_lookup_many_matches_lookup(geoip, batch_mode):
+    ips = ["45.10.3.4", "8.8.8.8", "1.0.0.255", "bad", "44.202.0.255", "0.0.0.0"]
+    assert geoip.lookup_many(ips) == [geoip.lookup(ip) for ip in ips]
+    assert geoip.lookup_many([]) == []
+
+
+def test_enrich(geoip):
+    """Страна из источника сохраняется, ASN дописывается; frozen-модели копируются."""
+    mutable = Proxy("45.10.1.1", 8080, country="FR")
+    frozen = ModelProxy("1.0.0.1", 80)
+    unknown = Proxy("8.8.8.8", 80)
+
+    result = geoip.enrich([mutable, frozen, unknown])
+
+    assert result[0] is mutable
+    assert (mutable.country, mutable.asn) == ("FR", 24940)
+    assert (result[1].country, result[1].asn) == ("AU", 13335)
+    assert result[2] is unknown and unknown.country is None
+
+
+def test_corrupted_database(tmp_path):
+    path = tmp_path / "broken.bin"
+    path.write_bytes(b"PXGI")
+    with pytest.raises(GeoIPError):
+        GeoIPDatabase(str(path))
+    path.write_bytes(b"XXXX" + bytes(12))
+    with pytest.raises(GeoIPError):
+        GeoIPDatabase(str(path))
+
+
+def test_ip_to_int():
+    assert ip_to_int("1.0.0.1") == 0x01000001
+    assert ip_to_int(None) is None
+
+
+@pytest.mark.asyncio
+async def test_collector_enriches_batches(geoip, proxy_manager):
+    """Коллектор сохраняет страну и ASN из офлайн-базы."""
+    collector = ProxyCollector(proxy_manager, geoip=geoip)
+
+    async def collect(url, protocol):
+        return [Proxy("45.10.9.9", "8080", protocol), Proxy("8.8.8.8", "80", protocol)]
+
+    collector.sources = [{"url": "http://source.test/", "protocol": "http"}]
+    with patch.object(collector, "_collect_from_api", side_effect=collect):
+        await collector.collect_all()
+
+    stored = {p.ip: p for p in (proxy_manager.get_proxy_by_id(i) for i in (1, 2))}
+    assert (stored["45.10.9.9"].country, stored["45.10.9.9"].asn) == ("DE", 24940)
+    assert stored["8.8.8.8"].country is None
@@ -0,0 +1,151 @@
+"""Тесты дублированных запросов через локальные имитации HTTP-прокси."""
+
+import asyncio
+import pytest
+import pytest_asyncio
+from aiohttp import web
+from proxy_manager.hedging import HedgeError, HedgedClient
+from proxy_manager.proxy import Proxy
+
+
+@pytest_asyncio.fixture
+async def fake_proxies():
+    """Запускает имитации прокси с заданной задержкой или статусом ответа."""
+    runners = []
+
+    async def start(delay=0.0, status=200):
+        async def handler(request):
+            await asyncio.sleep(delay)
+            return web.Response(status=status, text=f"via {delay}")
+
+        app = web.Application()
+        app.router.add_route("*", "/{tail:.*}", handler)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        runners.append(runner)
+        return site._server.sockets[0].getsockname()[1]
+
+    yield start
+    for runner in runners:
+        await runner.cleanup()
+
+
+def register(manager, port, response_time):
+    proxy = Proxy("127.0.0.1", port)
+    manager.add_proxy(proxy)
+    proxy.status = "working"
+    proxy.response_time = response_time
+    manager.update_proxy_status(proxy)
+
+
+def statuses(manager):
+    return {p.port: p.response_time for p in manager.get_working_proxies(limit=10)}
+
+
+@pytest.mark.asyncio
+async def test_fast_primary_is_not_hedged(proxy_manager, fake_proxies):
+    fast = await fake_proxies(0.0)
+    register(proxy_manager, fast, 0.1)
+    register(proxy_manager, await fake_proxies(0.0), 0.2)
+
+    async with HedgedClient(proxy_manager, default_delay=1.0) as client:
+        response = await client.get("http://target.test/path")
+
+    assert response.status == 200
+    assert response.proxy.port == fast
+    assert response.attempts == 1
+    assert client.hedges == 0
+
+
+@pytest.mark.asyncio
+async def test_slow_primary_is_hedged(proxy_manager, fake_proxies):
+    """Медленный лучший прокси обгоняет дополнительная попытка, проигравшая отменяется."""
+    slow = await fake_proxies(0.5)
+    fast = await fake_proxies(0.0)
+    register(proxy_manager, slow, 0.1)
+    register(proxy_manager, fast, 0.2)
+
+    async with HedgedClient(proxy_manager, hedge_budget=1.0, min_delay=0.05) as client:
+        client.latencies.extend([0.05] * 20)
+        response = await asyncio.wait_for(client.get("http://target.test/"), 0.4)
+
+    assert response.proxy.port == fast
+    assert response.attempts == 2
+    assert response.text() == "via 0.0"
+    assert client.hedges == 1
+    # Задержка запроса идет в окно клиента, время проверки в базе не меняется
+    assert statuses(proxy_manager) == {slow: 0.1, fast: 0.2}
+    assert response.elapsed in client.latencies._values
+
+
+@pytest.mark.asyncio
+async def test_hedge_budget_limits_hedging(proxy_manager, fake_proxies):
+    register(proxy_manager, await fake_proxies(0.3), 0.1)
+    register(proxy_manager, await fake_proxies(0.0), 0.2)
+
+    async with HedgedClient(proxy_manager, hedge_budget=0.0, min_delay=0.01) as client:
+        response = await client.get("http://target.test/")
+
+    assert response.attempts == 1
+    assert client.hedges == 0
+
+
+@pytest.mark.asyncio
+async def test_failed_attempt_is_replaced_and_recorded(proxy_manager, fake_proxies):
+    """Ошибка прокси сразу запускает следующую попытку, прокси помечается нерабочим."""
+    broken = await fake_proxies(status=407)
+    good = await fake_proxies(0.0)
+    register(proxy_manager, broken, 0.1)
+    register(proxy_manager, good, 0.2)
+
+    async with HedgedClient(proxy_manager, hedge_budget=0.0) as client:
+        response = await client.get("http://target.test/")
+
+    assert response.proxy.port == good
+    assert len(response.errors) == 1
+    assert broken not in statuses(proxy_manager)
+    assert [p.port for p in client._pool] == [good]
+
+
+@pytest.mark.asyncio
+async def test_all_attempts_fail(proxy_manager, fake_proxies):
+    register(proxy_manager, await fake_proxies(status=407), 0.1)
+
+    async with HedgedClient(proxy_manager) as client:
+        with pytest.raises(HedgeError):
+            await client.get("http://target.test/")
+        with pytest.raises(HedgeError, match="No working proxies"):
+            await client.get("http://target.test/")
+
+
+@pytest.mark.asyncio
+async def test_upstream_error_is_returned(proxy_manager, fake_proxies):
+    """5xx может вернуть сам сайт: ответ отдается, прокси остается рабочим."""
+    port = await fake_proxies(status=503)
+    register(proxy_manager, port, 0.1)
+
+    async with HedgedClient(proxy_manager) as client:
+        response = await client.get("http://target.test/")
+
+    assert response.status == 503
+    assert response.errors == []
+    assert statuses(proxy_manager) == {port: 0.1}
+
+
+@pytest.mark.asyncio
+async def test_request_errors_keep_proxies(proxy_manager, fake_proxies):
+    """Ошибка в самом запросе пробрасывается сразу и не портит пул."""
+    ports = [await fake_proxies(0.0) for _ in range(3)]
+    for i, port in enumerate(ports):
+        register(proxy_manager, port, 0.1 * (i + 1))
+
+    async with HedgedClient(proxy_manager) as client:
+        with pytest.raises(ValueError):
+            await client.get("not-a-url")
+        with pytest.raises(TypeError):
+            await client.get("http://target.test/", bogus=1)
+
+    assert statuses(proxy_manager) == {ports[0]: 0.1, ports[1]: 0.2, ports[2]: pytest.approx(0.3)}
+    assert proxy_manager.get_statistics()["failed"] == 0
@@ -0,0 +1,65 @@
+"""Тесты времени импорта и отложенной загрузки зависимостей."""
+
+import os
+import subprocess
+import sys
+import pytest
+
+# Верхняя граница на импорт пакета; с aiohttp импорт занимал ~250 мс
+IMPORT_TIME_LIMIT = 0.2
+
+HEAVY_MODULES = ("aiohttp", "asyncio", "requests", "bs4")
+
+_PROBE = """
+import sys, time
+start = time.perf_counter()
+import proxy_manager
+from proxy_manager import ProxyManager
+elapsed = time.perf_counter() - start
+print(elapsed)
+print(",".join(m for m in {modules!r} if m in sys.modules))
+"""
+
+
+def _run_probe():
+    """Импортирует пакет в чистом интерпретаторе и возвращает (время, загруженные модули)."""
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    output = subprocess.run(
+        [sys.executable, "-c", _PROBE.format(modules=HEAVY_MODULES)],
+        cwd=root, capture_output=True, text=True, check=True
+    ).stdout.splitlines()
+    return float(output[0]), [m for m in output[1].split(",") if m]
+
+
+def test_import_does_not_load_heavy_dependencies():
+    """Импорт пакета и ProxyManager не загружает сетевые зависимости."""
+    _, loaded = _run_probe()
+    assert loaded == []
+
+
+def test_import_time_upper_bound():
+    """Импорт укладывается в верхнюю границу (лучшая из трех попыток)."""
+    best = min(_run_probe()[0] for _ in range(3))
+    assert best < IMPORT_TIME_LIMIT
+
+
+def test_lazy_attributes():
+    """Классы доступны как атрибуты пакета и попадают в dir()."""
+    import proxy_manager
+    from proxy_manager import sources
+
+    assert proxy_manager.ProxyChecker.__name__ == "ProxyChecker"
+    assert "ProxyCollector" in dir(proxy_manager)
+    assert sources.GeonodeSource.__name__ == "GeonodeSource"
+    with pytest.raises(AttributeError):
+        proxy_manager.DoesNotExist
+
+
+def test_manager_defers_schema_setup(temp_db_path):
+    """Файл базы создается при первом обращении, а не в конструкторе."""
+    from proxy_manager import ProxyManager
+    manager = ProxyManager(db_path=temp_db_path)
+    assert not os.path.exists(temp_db_path)
+
+    assert manager.get_working_proxy() is None
+    assert os.path.exists(temp_db_path)
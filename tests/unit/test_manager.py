@@ -70,6 +70,23 @@ def test_get_working_proxies(proxy_manager, sample_proxies):
     assert working[0].status == "working"
 
 
+def test_get_working_proxy_by_country(proxy_manager):
+    """Выбор рабочего прокси по стране и анонимности."""
+    for ip, country, anonymity, rt in [("45.1.1.1", "US", "elite", 0.5), ("45.1.1.2", "DE", "anonymous", 0.1)]:
+        proxy = Proxy(ip, 8080, country=country, anonymity=anonymity)
+        proxy_manager.add_proxy(proxy)
+        proxy.status, proxy.response_time = "working", rt
+        proxy_manager.update_proxy_status(proxy)
+
+    assert proxy_manager.get_working_proxy()["country"] == "DE"
+
+    result = proxy_manager.get_working_proxy(country="us", anonymity="elite")
+    assert (result["ip"], result["country"], result["anonymity"]) == ("45.1.1.1", "US", "elite")
+    assert proxy_manager.get_working_proxy(country="US", anonymity="anonymous") is None
+    assert [p.ip for p in proxy_manager.get_working_proxies(country="DE")] == ["45.1.1.2"]
+    assert proxy_manager.get_random_working_proxy(country="US")["ip"] == "45.1.1.1"
+
+
 def test_mark_proxy_as_failed(proxy_manager, sample_proxies):
     """Тест отметки прокси как нерабочего."""
     proxy_data = sample_proxies[0]
@@ -115,3 +132,38 @@ def test_get_statistics(proxy_manager, sample_proxies):
     assert stats["unchecked"] == 1
     assert stats["outdated"] == 0
     assert stats["avg_response_time"] == 0.5
+
+
+def test_verify_statistics(proxy_manager, sample_proxies):
+    """Сверка счетчиков статистики с полным пересчетом."""
+    for data in sample_proxies:
+        proxy_manager.add_proxy(Proxy(**data))
+
+    assert proxy_manager.verify_statistics()
+
+    # Счетчики, разошедшиеся с данными, обнаруживаются
+    with proxy_manager.get_connection() as conn:
+        conn.execute("UPDATE proxy_stats SET total = total + 1")
+    assert not proxy_manager.verify_statistics()
+
+
+@pytest.mark.asyncio
+async def test_aiter_working_proxies(proxy_manager):
+    """Асинхронный обход отдает те же прокси, что и синхронный."""
+    for i in range(1, 6):
+        proxy = Proxy(f"10.0.0.{i}", 80)
+        proxy_manager.add_proxy(proxy)
+        proxy.status, proxy.response_time = "working", 0.1 * i
+        proxy_manager.update_proxy_status(proxy)
+    proxy_manager.add_proxy(Proxy("10.0.1.1", 80))
+
+    streamed = [proxy.ip async for proxy in proxy_manager.aiter_working_proxies(chunk_size=2)]
+    assert streamed == [proxy.ip for proxy in proxy_manager.iter_working_proxies(chunk_size=3)]
+    assert len(streamed) == 5
+    unchecked = [record async for record in proxy_manager.aiter_unchecked(records=True)]
+    assert unchecked == [("10.0.1.1", 80, "http")]
+    # Как и у синхронных iter_*, ошибка возникает при вызове, а не при обходе
+    with pytest.raises(ValueError):
+        proxy_manager.aiter_working_proxies(chunk_size=0)
+    with pytest.raises(ValueError):
+        proxy_manager.aiter_unchecked(chunk_size=0)
@@ -0,0 +1,216 @@
+"""Тесты миграций схемы и планов запросов SQLite."""
+
+import sqlite3
+import pytest
+from datetime import datetime, timedelta
+from proxy_manager.storage import SQLiteStorage
+from proxy_manager.storage.migrations import SCHEMA_VERSION, get_version, migrate
+from proxy_manager.storage.sqlite import COUNT_WORKING_SQL, UNCHECKED_SQL
+
+
+@pytest.fixture
+def sqlite_storage(temp_db_path):
+    """Создает хранилище SQLite с актуальной схемой."""
+    storage = SQLiteStorage(temp_db_path)
+    storage.setup()
+    return storage
+
+
+def _plan(conn, sql, params):
+    """Возвращает строки EXPLAIN QUERY PLAN одним текстом."""
+    rows = conn.execute("EXPLAIN QUERY PLAN " + sql, params).fetchall()
+    return "\n".join(row[3] for row in rows)
+
+
+def test_fresh_database_has_latest_schema(sqlite_storage):
+    """Новая база сразу получает последнюю версию схемы."""
+    with sqlite_storage.get_connection() as conn:
+        assert get_version(conn) == SCHEMA_VERSION
+        columns = {row[1]: row[2] for row in conn.execute("PRAGMA table_info(proxies)")}
+
+    assert columns["port"] == "INTEGER"
+    assert columns["last_check"] == "INTEGER"
+    assert columns["collection_date"] == "INTEGER"
+
+
+def test_setup_is_idempotent(sqlite_storage, sample_proxies):
+    """Повторный setup не трогает данные."""
+    from proxy_manager.proxy import Proxy
+    sqlite_storage.add_proxy(Proxy(**sample_proxies[0]))
+
+    sqlite_storage.setup()
+
+    assert sqlite_storage.get_statistics()["total"] == 1
+
+
+def test_legacy_database_is_migrated(temp_db_path):
+    """База исходного формата переводится на числовые колонки без потери данных."""
+    checked = datetime.now().replace(microsecond=0) - timedelta(hours=1)
+    conn = sqlite3.connect(temp_db_path)
+    migrate(conn, target=1)
+    conn.execute("""
+        INSERT INTO proxies (ip, port, protocol, status, response_time, last_check, collection_date)
+        VALUES ('1.2.3.4', '8080', 'http', 'working', 0.4, ?, ?)
+    """, (checked.isoformat(), checked.isoformat()))
+    conn.commit()
+    conn.close()
+
+    storage = SQLiteStorage(temp_db_path)
+    storage.setup()
+
+    working = storage.get_working(10)
+    assert len(working) == 1
+    assert working[0].port == 8080
+    assert working[0].last_check == checked.isoformat()
+    assert working[0].collection_date == checked.isoformat()
+    assert storage.count_working(checked - timedelta(minutes=1)) == 1
+    with storage.get_connection() as conn:
+        assert get_version(conn) == SCHEMA_VERSION
+        indexes = {row[1] for row in conn.execute("PRAGMA index_list(proxies)")}
+    assert "idx_proxies_status" not in indexes
+    assert "idx_proxies_working_rt" in indexes
+
+
+@pytest.mark.parametrize("kwargs", [
+    {"limit": 1, "min_last_check": datetime.now()},
+    {"limit": 100, "min_collection_date": datetime.now()},
+    {"limit": 10},
+])
+def test_working_query_uses_covering_index(sqlite_storage, kwargs):
+    """Выборка рабочих прокси идет по покрывающему индексу без сортировки."""
+    sql, params = sqlite_storage.working_query(**kwargs)
+    with sqlite_storage.get_connection() as conn:
+        plan = _plan(conn, sql, params)
+
+    assert "COVERING INDEX idx_proxies_working_rt" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+@pytest.mark.parametrize("column", ["country", "anonymity", "protocol"])
+def test_filtered_working_query_uses_attribute_index(sqlite_storage, column):
+    """Выборка с фильтром ищет по индексу атрибута без сортировки."""
+    sql, params = sqlite_storage.working_query(10, **{column: "x"})
+    with sqlite_storage.get_connection() as conn:
+        plan = _plan(conn, sql, params)
+
+    assert f"SEARCH proxies USING INDEX idx_proxies_working_{column}" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+@pytest.mark.parametrize("kwargs", [{"by_bandwidth": True}, {"by_bandwidth": True, "min_bandwidth": 1e5}])
+def test_bandwidth_query_uses_partial_index(sqlite_storage, kwargs):
+    """Выборка по скорости идет по индексу замеренных прокси без сортировки."""
+    sql, params = sqlite_storage.working_query(10, **kwargs)
+    with sqlite_storage.get_connection() as conn:
+        plan = _plan(conn, sql, params)
+
+    assert "idx_proxies_working_bandwidth" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+def test_connect_time_query_uses_partial_index(sqlite_storage):
+    """Выборка по времени соединения идет по индексу замеренных прокси без сортировки."""
+    sql, params = sqlite_storage.working_query(10, by_connect_time=True)
+    with sqlite_storage.get_connection() as conn:
+        plan = _plan(conn, sql, params)
+
+    assert "idx_proxies_working_connect" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+@pytest.mark.parametrize("name", ["WORKING_PAGE_SQL", "WORKING_RECORDS_PAGE_SQL", "UNCHECKED_PAGE_SQL"])
+def test_page_queries_follow_primary_key(sqlite_storage, name):
+    """Порции обхода ищутся по диапазону первичного ключа без сортировки."""
+    from proxy_manager.storage import sqlite
+    with sqlite_storage.get_connection() as conn:
+        plan = _plan(conn, getattr(sqlite, name), (0, 10))
+
+    assert "SEARCH proxies USING INTEGER PRIMARY KEY (rowid>?)" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+def test_count_working_uses_index_range(sqlite_storage):
+    """needs_update ищет по диапазону дат в частичном индексе."""
+    with sqlite_storage.get_connection() as conn:
+        plan = _plan(conn, COUNT_WORKING_SQL, (0,))
+
+    assert "SEARCH proxies USING COVERING INDEX idx_proxies_working_collected" in plan
+
+
+def test_unchecked_query_uses_partial_index(sqlite_storage):
+    """Выборка непроверенных прокси не читает таблицу."""
+    with sqlite_storage.get_connection() as conn:
+        plan = _plan(conn, UNCHECKED_SQL, (10,))
+
+    assert "COVERING INDEX idx_proxies_unchecked" in plan
+
+
+def test_source_unchecked_query_follows_source_key(sqlite_storage):
+    """Непроверенные прокси источника ищутся по ключу связи, а не обходом proxies."""
+    from proxy_manager.storage.sqlite import SOURCE_UNCHECKED_SQL
+    with sqlite_storage.get_connection() as conn:
+        plan = _plan(conn, SOURCE_UNCHECKED_SQL, ("list", 10))
+
+    assert "SCAN proxies" not in plan
+    assert "SEARCH ps USING PRIMARY KEY (source_id=?)" in plan
+
+
+def test_exit_ip_query_uses_partial_index(sqlite_storage):
+    """Прокси одного внешнего адреса ищутся по индексу уже в порядке скорости."""
+    from proxy_manager.storage.sqlite import EXIT_IP_SQL
+    with sqlite_storage.get_connection() as conn:
+        plan = _plan(conn, EXIT_IP_SQL, ("1.2.3.4",))
+
+    assert "SEARCH proxies USING INDEX idx_proxies_exit_ip (exit_ip=?)" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+def test_target_candidates_query_uses_indexes(sqlite_storage):
+    """Кандидаты на проверку цели идут по индексу рабочих прокси, результаты цели - по ключу."""
+    from proxy_manager.storage.sqlite import TARGET_CANDIDATES_SQL
+    with sqlite_storage.get_connection() as conn:
+        plan = _plan(conn, TARGET_CANDIDATES_SQL, ("shop", 0, 10))
+
+    assert "SCAN proxies USING COVERING INDEX idx_proxies_working_rt" in plan
+    assert "SEARCH proxy_targets USING PRIMARY KEY (target_id=?)" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+def test_protocol_target_candidates_keep_speed_order(sqlite_storage):
+    """Фильтр кандидатов цели по протоколу не ломает обход по скорости."""
+    from proxy_manager.storage.sqlite import _target_candidates_sql
+    with sqlite_storage.get_connection() as conn:
+        plan = _plan(conn, _target_candidates_sql(2), ("http", "https", "shop", 0, 10))
+
+    assert "COVERING INDEX idx_proxies_working_rt" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+def test_statistics_query_does_not_scan(sqlite_storage):
+    """Статистика читается из счетчиков и концов индексов, без прохода по таблице."""
+    from proxy_manager.storage.sqlite import STATISTICS_SQL
+    with sqlite_storage.get_connection() as conn:
+        plan = _plan(conn, STATISTICS_SQL, ())
+
+    assert "SCAN proxies\n" not in plan + "\n"
+    assert "idx_proxies_collection_date" in plan
+    assert "idx_proxies_last_check" in plan
+
+
+def test_migrated_statistics_counters(temp_db_path):
+    """Миграция заполняет счетчики по уже существующим данным."""
+    conn = sqlite3.connect(temp_db_path)
+    migrate(conn, target=2)
+    conn.executemany("""
+        INSERT INTO proxies (ip, port, protocol, status, response_time, collection_date)
+        VALUES (?, 8080, 'http', ?, ?, 0)
+    """, [("1.1.1.1", "working", 0.5), ("2.2.2.2", "failed", None), ("3.3.3.3", None, None)])
+    conn.commit()
+    conn.close()
+
+    storage = SQLiteStorage(temp_db_path)
+    storage.setup()
+
+    stats = storage.get_statistics()
+    assert stats == storage.recompute_statistics()
+    assert (stats["working"], stats["failed"], stats["unchecked"]) == (1, 1, 1)
@@ -0,0 +1,123 @@
+"""Тесты постраничной загрузки JSON API источников."""
+
+import asyncio
+import pytest
+import pytest_asyncio
+from aiohttp import web
+from proxy_manager import ProxyChecker, ProxyCollector
+from proxy_manager.pipeline import ProxyPipeline
+from proxy_manager.sources import GeonodeSource
+
+TOTAL = 250
+
+
+@pytest_asyncio.fixture
+async def api():
+    """Локальный API в формате geonode: 250 прокси, страница 3 отвечает 500."""
+    state = {"in_flight": 0, "max_in_flight": 0, "pages": [], "broken": set()}
+
+    async def handler(request):
+        page = int(request.query["page"])
+        limit = int(request.query["limit"])
+        state["pages"].append(page)
+        state["in_flight"] += 1
+        state["max_in_flight"] = max(state["max_in_flight"], state["in_flight"])
+        try:
+            await asyncio.sleep(0.01)
+            if page in state["broken"]:
+                raise web.HTTPInternalServerError()
+            start = (page - 1) * limit
+            data = [
+                {"ip": f"45.1.{i // 250}.{i % 250 + 1}", "port": str(8000 + i), "protocols": ["socks5"]}
+                for i in range(start, min(start + limit, TOTAL))
+            ]
+            return web.json_response({"data": data, "total": TOTAL, "page": page, "limit": limit})
+        finally:
+            state["in_flight"] -= 1
+
+    app = web.Application()
+    app.router.add_get("/api/proxy-list", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    state["url"] = f"http://127.0.0.1:{port}/api/proxy-list"
+    yield state
+    await runner.cleanup()
+
+
+def make_source(api, **kwargs):
+    source = GeonodeSource(**kwargs)
+    source.url = api["url"]
+    source.page_size = 20
+    return source
+
+
+@pytest.mark.asyncio
+async def test_iter_pages_fetches_all_pages(api):
+    """Все страницы загружаются, первая отдается первой."""
+    pages = [page async for page in make_source(api, max_concurrency=3).iter_pages()]
+
+    assert len(pages) == 13
+    assert api["pages"][0] == 1
+    assert len(set().union(*pages)) == TOTAL
+    assert {p.protocol for p in pages[0]} == {"socks5"}
+    assert api["max_in_flight"] <= 3
+
+
+@pytest.mark.asyncio
+async def test_iter_pages_skips_failed_page(api):
+    """Ошибка одной страницы не прерывает загрузку остальных."""
+    api["broken"].add(3)
+    pages = [page async for page in make_source(api).iter_pages()]
+
+    assert len(pages) == 12
+    assert len(set().union(*pages)) == TOTAL - 20
+
+
+@pytest.mark.asyncio
+async def test_iter_pages_max_pages(api):
+    pages = [page async for page in make_source(api, max_pages=2).iter_pages()]
+    assert sorted(api["pages"]) == [1, 2]
+    assert sum(len(page) for page in pages) == 40
+
+
+@pytest.mark.asyncio
+async def test_collector_ingests_paged_source(api, proxy_manager):
+    """Коллектор сохраняет страницы постраничного источника."""
+    collector = ProxyCollector(proxy_manager)
+    collector.sources = [{"source": make_source(api)}]
+
+    await collector.collect_all()
+
+    assert proxy_manager.get_statistics()["total"] == TOTAL
+
+
+def test_get_proxies_sync():
+    """Синхронный get_proxies недоступного источника возвращает пустой набор."""
+    source = GeonodeSource()
+    source.url = "http://127.0.0.1:9/api"
+    assert source.get_proxies() == set()
+
+
+@pytest.mark.asyncio
+async def test_pipeline_checks_paged_source(api, proxy_manager):
+    """Конвейер проверяет прокси постраничного источника и сохраняет результат."""
+    collector = ProxyCollector(proxy_manager)
+    collector.sources = [{"source": make_source(api, max_pages=2)}]
+    checker = ProxyChecker(proxy_manager, subnet_failure_threshold=None)
+
+    async def probe(proxy):
+        # Как настоящая проверка: результат записывается в сам прокси
+        proxy.status, proxy.response_time = "working", 0.1
+        proxy.exit_ip = proxy.ip
+        return True
+
+    checker.probe = probe
+    report = await ProxyPipeline(proxy_manager, collector, checker).run()
+
+    assert len(report.working) == 40
+    assert {p.protocol for p in report.working} == {"socks5"}
+    stats = proxy_manager.get_statistics()
+    assert (stats["total"], stats["working"]) == (40, 40)
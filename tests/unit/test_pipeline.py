@@ -0,0 +1,115 @@
+"""Тесты потокового сбора и проверки прокси."""
+
+import asyncio
+import time
+import pytest
+from unittest.mock import patch
+from proxy_manager import ProxyChecker, ProxyCollector
+from proxy_manager.pipeline import ProxyPipeline
+from proxy_manager.proxy import Proxy
+from proxy_manager.subnets import SubnetHealth
+
+
+@pytest.fixture
+def collector(proxy_manager):
+    collector = ProxyCollector(proxy_manager)
+    collector.sources = [
+        {"url": "http://fast.test/list", "protocol": "http"},
+        {"url": "http://slow.test/list", "protocol": "http"},
+    ]
+    return collector
+
+
+async def fake_collect(url, protocol):
+    if "slow" in url:
+        await asyncio.sleep(0.5)
+        return [Proxy("10.0.0.1", "80"), Proxy("10.0.1.2", "80"), Proxy("10.0.2.1", "bad")]
+    return [Proxy("10.0.0.1", "80"), Proxy("10.0.1.1", "80"), Proxy("10.0.2.2", "80")]
+
+
+def pipeline_for(proxy_manager, collector, **kwargs):
+    checker = ProxyChecker(proxy_manager, subnet_failure_threshold=None)
+
+    async def probe(proxy):
+        await asyncio.sleep(0.01)
+        proxy.status = "working" if proxy.ip.startswith("10.0.0.") else "failed"
+        proxy.response_time = 0.1 if proxy.status == "working" else None
+        return proxy.status == "working"
+
+    checker.probe = probe
+    return ProxyPipeline(proxy_manager, collector, checker, **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_stream_yields_before_slow_source(proxy_manager, collector):
+    pipeline = pipeline_for(proxy_manager, collector, concurrency=2, queue_size=1)
+    started = time.monotonic()
+    with patch.object(collector, "_collect_from_api", side_effect=fake_collect):
+        stream = pipeline.stream()
+        first = await stream.__anext__()
+        assert first.ip == "10.0.0.1"
+        assert time.monotonic() - started < 0.4
+        rest = [proxy async for proxy in stream]
+
+    assert rest == []
+    report = pipeline.report
+    assert (report.checked, len(report.working)) == (4, 1)
+    assert pipeline.duplicates == 1
+
+    stats = proxy_manager.get_statistics()
+    assert (stats["working"], stats["failed"], stats["unchecked"]) == (1, 3, 0)
+    sources = {s["name"]: s for s in proxy_manager.get_source_stats()}
+    assert sources["http://fast.test/list"]["working"] == 1
+    assert sources["http://slow.test/list"]["checked"] == 1
+
+
+@pytest.mark.asyncio
+async def test_run_stops_at_target_and_keeps_candidates(proxy_manager, collector):
+    collector.sources = collector.sources[:1]
+    pipeline = pipeline_for(proxy_manager, collector, concurrency=1)
+
+    async def many(url, protocol):
+        return [Proxy(f"10.0.0.{i}", "80") for i in range(1, 51)]
+
+    with patch.object(collector, "_collect_from_api", side_effect=many):
+        report = await pipeline.run(target=2)
+
+    assert len(report.working) == 2
+    stats = proxy_manager.get_statistics()
+    # Непроверенные кандидаты сохранены в базе для обычной проверки
+    assert stats["working"] == 2
+    assert stats["total"] == 50
+    assert stats["unchecked"] == 48
+
+
+@pytest.mark.asyncio
+async def test_skips_recently_dead(proxy_manager, collector):
+    collector.sources = collector.sources[:1]
+    pipeline = pipeline_for(proxy_manager, collector)
+
+    with patch.object(proxy_manager, "is_known_dead", side_effect=lambda ip, port: ip == "10.0.1.1"), \
+            patch.object(collector, "_collect_from_api", side_effect=fake_collect):
+        report = await pipeline.run()
+
+    assert report.checked == 2
+    assert pipeline.skipped_dead == 1
+
+
+@pytest.mark.asyncio
+async def test_dead_subnet_saved_unchecked(proxy_manager, collector):
+    """Прокси мертвой подсети не проверяются и сохраняются непроверенными."""
+    collector.sources = collector.sources[:1]
+    pipeline = pipeline_for(proxy_manager, collector, concurrency=1)
+    pipeline.checker.subnet_health = SubnetHealth(2)
+
+    async def subnet(url, protocol):
+        return [Proxy(f"10.0.5.{i}", "80") for i in range(1, 7)]
+
+    with patch.object(collector, "_collect_from_api", side_effect=subnet):
+        report = await pipeline.run()
+
+    assert (report.checked, report.skipped) == (2, 4)
+    stats = proxy_manager.get_statistics()
+    assert (stats["total"], stats["failed"], stats["unchecked"]) == (6, 2, 4)
+    source = proxy_manager.get_source_stats()[0]
+    assert (source["collected"], source["checked"]) == (6, 2)
@@ -0,0 +1,178 @@
+"""Тесты для ProtocolProber на локальных имитациях прокси."""
+
+import asyncio
+import struct
+import pytest
+from proxy_manager import ProxyChecker
+from proxy_manager.prober import ProbeError, ProtocolProber
+from proxy_manager.proxy import Proxy
+
+OK = b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\n{}"
+
+
+async def _answer_get(reader, writer):
+    """Отвечает на проверочный GET так, как ответил бы целевой хост."""
+    line = await reader.readline()
+    while await reader.readline() not in (b"\r\n", b""):
+        pass
+    writer.write(OK if line.startswith(b"GET ") else b"HTTP/1.1 400 Bad Request\r\n\r\n")
+
+
+def fake_proxy(*protocols):
+    """Обработчик соединений, понимающий только перечисленные протоколы."""
+    async def handle(reader, writer):
+        try:
+            first = await reader.readexactly(1)
+            if first == b"\x05" and "socks5" in protocols:
+                await reader.readexactly(2)
+                writer.write(b"\x05\x00")
+                _, _, _, address_type, length = await reader.readexactly(5)
+                await reader.readexactly(length + 2)
+                writer.write(b"\x05\x00\x00\x01" + bytes(4) + struct.pack(">H", 0))
+                await _answer_get(reader, writer)
+            elif first == b"\x04" and "socks4" in protocols:
+                await reader.readexactly(7)
+                await reader.readuntil(b"\x00")  # user id
+                await reader.readuntil(b"\x00")  # имя хоста SOCKS4a
+                writer.write(b"\x00\x5a" + bytes(6))
+                await _answer_get(reader, writer)
+            elif first == b"C" and "https" in protocols:
+                while await reader.readline() not in (b"\r\n", b""):
+                    pass
+                writer.write(b"HTTP/1.1 200 Connection established\r\n\r\n")
+                await _answer_get(reader, writer)
+            elif first == b"G" and "http" in protocols:
+                line = first + await reader.readline()
+                assert line.startswith(b"GET http://api.ipify.org/")
+                while await reader.readline() not in (b"\r\n", b""):
+                    pass
+                writer.write(OK)
+            await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+    return handle
+
+
+@pytest.fixture
+def serve():
+    """Запускает имитацию прокси и возвращает ее порт."""
+    servers = []
+
+    async def start(*protocols):
+        server = await asyncio.start_server(fake_proxy(*protocols), "127.0.0.1", 0)
+        servers.append(server)
+        return server.sockets[0].getsockname()[1]
+
+    yield start
+    for server in servers:
+        server.close()
+
+
+@pytest.fixture
+def prober():
+    return ProtocolProber(timeout=2)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("protocol", ["http", "https", "socks4", "socks5"])
+async def test_probe_single_protocol(serve, prober, protocol):
+    """Каждое рукопожатие проходит на прокси с этим протоколом."""
+    port = await serve(protocol)
+    assert await prober.probe("127.0.0.1", port, protocol) >= 0
+
+
+@pytest.mark.asyncio
+async def test_probe_wrong_protocol(serve, prober):
+    """Чужое рукопожатие завершается ProbeError."""
+    port = await serve("http")
+    with pytest.raises(ProbeError):
+        await prober.probe("127.0.0.1", port, "socks5")
+    with pytest.raises(ValueError):
+        await prober.probe("127.0.0.1", port, "ftp")
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("race", [False, True])
+async def test_detect_all_protocols(serve, prober, race):
+    """Находятся все рабочие протоколы, и по очереди, и одновременно."""
+    port = await serve("socks5", "http", "https")
+    result = await prober.detect("127.0.0.1", port, race=race)
+
+    assert set(result.protocols) == {"socks5", "http", "https"}
+    assert result.fastest in result.protocols
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("race", [False, True])
+async def test_detect_first_protocol(serve, prober, race):
+    """С find_all=False проверка останавливается на первом рабочем протоколе."""
+    port = await serve("socks4", "http")
+    result = await prober.detect("127.0.0.1", port, hint="http", race=race, find_all=False)
+
+    assert len(result.protocols) == 1
+    if not race:
+        assert result.protocols == ("http",)
+
+
+@pytest.mark.asyncio
+async def test_detect_dead_proxy(serve, prober):
+    """Закрытый порт не дает ни одного протокола."""
+    port = await serve()
+    result = await prober.detect("127.0.0.1", port, race=True)
+    assert not result.working
+    assert result.fastest is None
+
+
+def test_from_url():
+    prober = ProtocolProber.from_url("http://example.com:8080/ip?format=json")
+    assert (prober.target_host, prober.target_port, prober.path) == (
+        "example.com", 8080, "/ip?format=json"
+    )
+
+
+@pytest.mark.asyncio
+async def test_checker_detect_protocols(serve, proxy_manager):
+    """Checker сохраняет рабочие протоколы и исправляет неверный протокол."""
+    port = await serve("socks5", "socks4")
+    checker = ProxyChecker(proxy_manager)
+    checker.prober.timeout = 2
+    proxy = Proxy("127.0.0.1", port, "http")
+    proxy_id = proxy_manager.add_proxy(proxy)
+
+    assert await checker.detect_protocols(proxy) is True
+
+    stored = proxy_manager.get_proxy_by_id(proxy_id)
+    assert stored.status == "working"
+    assert stored.protocol in ("socks4", "socks5")
+    assert sorted(stored.protocols) == ["socks4", "socks5"]
+
+
+@pytest.mark.asyncio
+async def test_checker_socks_proxy(serve, proxy_manager):
+    """SOCKS-прокси проверяются рукопожатием, а не через aiohttp."""
+    port = await serve("socks5")
+    checker = ProxyChecker(proxy_manager)
+    proxy = Proxy("127.0.0.1", port, "socks5")
+    proxy_manager.add_proxy(proxy)
+
+    assert await checker.check_proxy(proxy) is True
+    assert proxy.status == "working"
+
+
+@pytest.mark.asyncio
+async def test_probe_read_timeout():
+    """Прокси, который принимает соединение и молчит, обрывается по сроку ответа."""
+    async def silent(reader, writer):
+        await reader.read()
+        writer.close()
+
+    server = await asyncio.start_server(silent, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    prober = ProtocolProber(timeout=10)
+    try:
+        with pytest.raises(asyncio.TimeoutError):
+            await prober.probe("127.0.0.1", port, "http", timeout=0.1, connect_timeout=0.5)
+    finally:
+        server.close()
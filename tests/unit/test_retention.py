@@ -0,0 +1,123 @@
+"""Тесты для RetentionJob."""
+
+import pytest
+from proxy_manager.proxy import Proxy
+from proxy_manager.retention import RetentionJob
+from proxy_manager.storage import SQLiteStorage
+
+
+def _fill(storage, count):
+    """Добавляет count прокси с последовательными адресами."""
+    storage.add_proxies(Proxy(ip=f"10.0.{i // 250}.{i % 250 + 1}", port=8080) for i in range(count))
+
+
+def test_job_deletes_in_batches(storage):
+    """Очистка проходит весь диапазон ID несколькими пачками."""
+    _fill(storage, 50)
+    batches = []
+    job = RetentionJob(
+        storage, max_age_days=-1, batch_size=10, max_batch_size=10,
+        pause=0, on_progress=lambda p: batches.append(p.deleted)
+    )
+
+    progress = job.run()
+
+    assert progress.done
+    assert progress.deleted == 50
+    assert progress.batches == 5
+    assert batches == [10, 20, 30, 40, 50]
+    assert storage.get_statistics()["total"] == 0
+
+
+def test_job_keeps_fresh_records(storage):
+    """Свежие записи не удаляются."""
+    _fill(storage, 5)
+
+    progress = RetentionJob(storage, max_age_days=7, pause=0).run()
+
+    assert progress.done
+    assert progress.deleted == 0
+    assert storage.get_statistics()["total"] == 5
+
+
+def test_job_time_budget_resumes(storage):
+    """Проход, прерванный по бюджету времени, продолжается со следующего вызова."""
+    _fill(storage, 30)
+    job = RetentionJob(storage, max_age_days=-1, batch_size=10, max_batch_size=10,
+                       pause=0, time_budget=0)
+
+    first = job.run()
+    assert not first.done
+    assert first.batches == 1
+    assert 0 < first.fraction < 1
+
+    while not job.run().done:
+        pass
+    assert job.progress.deleted == 30
+    assert job.progress.fraction == 1.0
+
+
+def test_job_adapts_batch_size(storage):
+    """Быстрые пачки увеличивают размер следующей пачки."""
+    _fill(storage, 100)
+    job = RetentionJob(storage, max_age_days=-1, batch_size=1, max_batch_size=64,
+                       batch_target=10, pause=0)
+
+    job.run()
+
+    assert job.batch_size == 64
+    assert job.progress.batches < 100
+
+
+def test_job_empty_storage(storage):
+    """Пустое хранилище сразу дает завершенный проход."""
+    progress = RetentionJob(storage).run()
+
+    assert progress.done
+    assert progress.batches == 0
+
+
+@pytest.mark.asyncio
+async def test_job_run_async(storage):
+    """Асинхронный проход дает тот же результат."""
+    _fill(storage, 20)
+
+    progress = await RetentionJob(storage, max_age_days=-1, batch_size=5,
+                                  max_batch_size=5, pause=0).run_async()
+
+    assert progress.done
+    assert progress.deleted == 20
+
+
+def test_job_background_thread(storage):
+    """Фоновый проход можно дождаться и остановить."""
+    _fill(storage, 20)
+    job = RetentionJob(storage, max_age_days=-1, batch_size=5, max_batch_size=5, pause=0)
+
+    job.start().join(timeout=5)
+    job.stop()
+
+    assert job.progress.done
+    assert job.progress.deleted == 20
+
+
+def test_incremental_vacuum_releases_pages(temp_db_path):
+    """Новая база SQLite поддерживает возврат места по частям."""
+    storage = SQLiteStorage(temp_db_path)
+    storage.setup()
+    _fill(storage, 2000)
+
+    progress = RetentionJob(storage, max_age_days=-1, pause=0, vacuum_pages=1000).run()
+
+    assert progress.deleted == 2000
+    assert progress.vacuumed_pages > 0
+
+
+def test_manager_cleanup_old_data(proxy_manager, sample_proxies):
+    """cleanup_old_data возвращает итог прохода."""
+    for data in sample_proxies:
+        proxy_manager.add_proxy(Proxy(**data))
+
+    assert proxy_manager.cleanup_old_data().deleted == 0
+    assert proxy_manager.cleanup_old_data(max_age_days=-1, batch_size=1).deleted == 3
+    assert proxy_manager.get_statistics()["total"] == 0
@@ -0,0 +1,86 @@
+"""Тесты для снимков пула рабочих прокси."""
+
+import pytest
+from proxy_manager import ProxyManager
+from proxy_manager.proxy import Proxy
+from proxy_manager.snapshot import RECORD, SnapshotError, read_snapshot, write_snapshot
+from proxy_manager.storage import ProxyRecord
+
+
+def test_snapshot_roundtrip(tmp_path):
+    """Записи переживают запись и чтение снимка."""
+    path = str(tmp_path / "pool.snap")
+    records = [
+        ProxyRecord("1.2.3.4", 8080, "http", 0.5, 1700000000, 1690000000),
+        ProxyRecord("5.6.7.8", 1080, "socks5", None, 1700000100, 1690000100),
+    ]
+
+    assert write_snapshot(path, records) == 2
+    created, loaded = read_snapshot(path)
+
+    assert created > 0
+    assert loaded == records
+
+
+def test_snapshot_skips_unsupported_records(tmp_path):
+    """Не-IPv4 адреса и неизвестные протоколы не попадают в снимок."""
+    path = str(tmp_path / "pool.snap")
+    records = [
+        ProxyRecord("::1", 8080, "http", 0.5, 1, 1),
+        ProxyRecord("1.2.3.4", 8080, "ftp", 0.5, 1, 1),
+        ProxyRecord("1.2.3.4", 8080, "https", 0.5, 1, 1),
+    ]
+
+    assert write_snapshot(path, records) == 1
+    assert [r.protocol for r in read_snapshot(path)[1]] == ["https"]
+
+
+def test_snapshot_rejects_corrupted_file(tmp_path):
+    """Обрезанный или чужой файл вызывает SnapshotError."""
+    path = tmp_path / "pool.snap"
+    write_snapshot(str(path), [ProxyRecord("1.2.3.4", 80, "http", 0.1, 1, 1)])
+    data = path.read_bytes()
+
+    path.write_bytes(data[:-RECORD.size // 2])
+    with pytest.raises(SnapshotError):
+        read_snapshot(str(path))
+
+    path.write_bytes(b"garbage" + data)
+    with pytest.raises(SnapshotError):
+        read_snapshot(str(path))
+
+
+def test_manager_warm_start(proxy_manager, sample_proxies, tmp_path):
+    """Пул, сохраненный одним менеджером, сразу доступен другому."""
+    for i, data in enumerate(sample_proxies):
+        proxy = Proxy(**data)
+        proxy_manager.add_proxy(proxy)
+        proxy.status = "working"
+        proxy.response_time = 0.1 * (i + 1)
+        proxy_manager.update_proxy_status(proxy)
+    path = str(tmp_path / "pool.snap")
+
+    assert proxy_manager.dump_snapshot(path) == 3
+
+    fresh = ProxyManager(storage="memory")
+    assert fresh.load_snapshot(path) == 3
+    best = fresh.get_working_proxy()
+    assert best["ip"] == sample_proxies[0]["ip"]
+    assert best["response_time"] == pytest.approx(0.1)
+
+
+def test_manager_load_snapshot_filters_and_tolerates_errors(proxy_manager, tmp_path):
+    """Старые записи отбрасываются, а отсутствующий или битый снимок не ломает старт."""
+    path = tmp_path / "pool.snap"
+    write_snapshot(str(path), [ProxyRecord("1.2.3.4", 80, "http", 0.1, 1000, 1000)])
+
+    assert proxy_manager.load_snapshot(str(path), max_age_hours=24) == 0
+    assert proxy_manager.load_snapshot(str(tmp_path / "missing.snap")) == 0
+    path.write_bytes(b"\0" * 40)
+    assert proxy_manager.load_snapshot(str(path)) == 0
+
+
+def test_default_snapshot_path(temp_db_path):
+    """Снимок по умолчанию лежит рядом с базой."""
+    manager = ProxyManager(db_path=temp_db_path)
+    assert manager.snapshot_path == temp_db_path[:-len(".db")] + ".snap"
@@ -0,0 +1,539 @@
+"""Общий набор тестов соответствия для всех движков хранения."""
+
+import pytest
+from datetime import datetime, timedelta
+from proxy_manager import ProxyManager
+from proxy_manager.proxy import Proxy
+from proxy_manager.storage import BaseStorage, MemoryStorage, ProxyRecord, create_storage
+from proxy_manager.targets import Target
+from proxy_manager.tracing import CheckPhases
+
+
+def _add(storage, data, status=None, response_time=None):
+    """Добавляет прокси и при необходимости выставляет ему статус."""
+    proxy = Proxy(**data)
+    proxy_id = storage.add_proxy(proxy)
+    if status is not None:
+        proxy.status = status
+        proxy.response_time = response_time
+        storage.update_proxy_status(proxy)
+    return proxy_id
+
+
+def test_add_proxy_is_idempotent(storage, sample_proxies):
+    """Повторное добавление возвращает тот же ID."""
+    first = _add(storage, sample_proxies[0])
+    second = _add(storage, sample_proxies[0])
+
+    assert first == second
+    assert storage.get_statistics()["total"] == 1
+
+
+def test_add_proxies_counts_new(storage, sample_proxies):
+    """Пакетное добавление возвращает число новых прокси."""
+    proxies = [Proxy(**data) for data in sample_proxies]
+
+    assert storage.add_proxies(proxies) == 3
+    assert storage.add_proxies(proxies[:1]) == 0
+    assert storage.get_statistics()["unchecked"] == 3
+
+
+def test_get_proxy_by_id(storage, sample_proxies):
+    """Получение прокси по ID."""
+    proxy_id = _add(storage, sample_proxies[1], "working", 0.3)
+
+    proxy = storage.get_proxy_by_id(proxy_id)
+
+    assert proxy.ip == sample_proxies[1]["ip"]
+    assert str(proxy.port) == str(sample_proxies[1]["port"])
+    assert proxy.status == "working"
+    assert proxy.response_time == 0.3
+    assert proxy.last_check is not None
+    assert storage.get_proxy_by_id(proxy_id + 100) is None
+
+
+def test_update_saves_protocols(storage, sample_proxies):
+    """Определенные протоколы сохраняются и не стираются обычной проверкой."""
+    proxy_id = _add(storage, sample_proxies[0])
+    assert storage.get_proxy_by_id(proxy_id).protocols is None
+
+    proxy = Proxy(**sample_proxies[0])
+    proxy.protocol = "socks5"
+    proxy.protocols = ["socks5", "http"]
+    proxy.status = "working"
+    storage.update_proxy_status(proxy)
+
+    proxy.protocols = None
+    proxy.status = "failed"
+    storage.update_proxy_status(proxy)
+
+    stored = storage.get_proxy_by_id(proxy_id)
+    assert stored.protocol == "socks5"
+    assert stored.protocols == ["socks5", "http"]
+    assert stored.status == "failed"
+
+
+def test_get_working_sorted_by_response_time(storage, sample_proxies):
+    """Рабочие прокси возвращаются от быстрого к медленному."""
+    _add(storage, sample_proxies[0], "working", 0.9)
+    _add(storage, sample_proxies[1], "working", 0.1)
+    _add(storage, sample_proxies[2], "failed")
+
+    working = storage.get_working(10)
+
+    assert [p.ip for p in working] == [sample_proxies[1]["ip"], sample_proxies[0]["ip"]]
+    assert len(storage.get_working(1)) == 1
+
+
+def test_get_working_status_change_reindexes(storage, sample_proxies):
+    """Смена статуса убирает прокси из выборки рабочих."""
+    _add(storage, sample_proxies[0], "working", 0.5)
+    proxy = Proxy(**sample_proxies[0])
+    proxy.status = "failed"
+    storage.update_proxy_statuses([proxy])
+
+    assert storage.get_working(10) == []
+
+
+def test_get_working_attribute_filters(storage):
+    """Фильтры по стране, анонимности и протоколу, с нормализацией значений."""
+    rows = [
+        ("45.1.1.1", "us", "elite proxy", "http", 0.4),
+        ("45.1.1.2", "US", "anonymous", "socks5", 0.2),
+        ("45.1.1.3", "DE", "elite", "socks5", 0.1),
+        ("45.1.1.4", "", None, "http", 0.3),
+    ]
+    for ip, country, anonymity, protocol, rt in rows:
+        proxy = Proxy(ip, 8080, protocol, country=country, anonymity=anonymity)
+        storage.add_proxy(proxy)
+        proxy.status, proxy.response_time = "working", rt
+        storage.update_proxy_status(proxy)
+
+    def ips(**filters):
+        return [p.ip for p in storage.get_working(10, **filters)]
+
+    assert ips(country="us") == ["45.1.1.2", "45.1.1.1"]
+    assert ips(anonymity="elite") == ["45.1.1.3", "45.1.1.1"]
+    assert ips(protocol="socks5") == ["45.1.1.3", "45.1.1.2"]
+    assert ips(country="US", protocol="socks5") == ["45.1.1.2"]
+    assert ips(country="FR") == []
+    assert len(storage.get_working(10, random_order=True, country="US")) == 2
+
+    working = storage.get_working(1, country="DE")[0]
+    assert (working.country, working.anonymity) == ("DE", "elite")
+
+    # Смена статуса и протокола перекладывает прокси между корзинами
+    proxy = Proxy("45.1.1.3", 8080, "http")
+    proxy.status, proxy.response_time = "working", 0.1
+    storage.update_proxy_status(proxy)
+    assert ips(protocol="socks5") == ["45.1.1.2"]
+    proxy.status = "failed"
+    storage.update_proxy_status(proxy)
+    assert ips(anonymity="elite") == ["45.1.1.1"]
+
+
+def test_get_working_date_filters(storage, sample_proxies):
+    """Фильтры по датам проверки и сбора."""
+    _add(storage, sample_proxies[0], "working", 0.5)
+    past = datetime.now() - timedelta(hours=1)
+    future = datetime.now() + timedelta(hours=1)
+
+    assert len(storage.get_working(10, min_last_check=past)) == 1
+    assert storage.get_working(10, min_last_check=future) == []
+    assert len(storage.get_working(10, min_collection_date=past)) == 1
+    assert storage.get_working(10, min_collection_date=future) == []
+    assert len(storage.get_working(10, min_collection_date=past, random_order=True)) == 1
+    assert storage.count_working(past) == 1
+    assert storage.count_working(future) == 0
+
+
+def test_get_unchecked(storage, sample_proxies):
+    """Непроверенные прокси не включают проверенные и устаревшие."""
+    _add(storage, sample_proxies[0], "working", 0.5)
+    _add(storage, sample_proxies[1])
+    _add(storage, sample_proxies[2])
+
+    unchecked = storage.get_unchecked(10)
+
+    assert {p.ip for p in unchecked} == {sample_proxies[1]["ip"], sample_proxies[2]["ip"]}
+    assert len(storage.get_unchecked(1)) == 1
+
+
+def test_mark_failed(storage, sample_proxies):
+    """Отметка прокси как нерабочего по ID."""
+    proxy_id = _add(storage, sample_proxies[0], "working", 0.5)
+
+    storage.mark_failed(proxy_id)
+
+    assert storage.get_proxy_by_id(proxy_id).status == "failed"
+    assert storage.get_working(10) == []
+
+
+def test_mark_all_outdated(storage, sample_proxies):
+    """Устаревшие прокси не выдаются ни как рабочие, ни как непроверенные."""
+    _add(storage, sample_proxies[0], "working", 0.5)
+    _add(storage, sample_proxies[1])
+
+    storage.mark_all_outdated()
+
+    assert storage.get_working(10) == []
+    assert storage.get_unchecked(10) == []
+    assert storage.get_statistics()["outdated"] == 2
+
+
+def test_statistics(storage, sample_proxies):
+    """Статистика совпадает у всех движков."""
+    _add(storage, sample_proxies[0], "working", 0.5)
+    _add(storage, sample_proxies[1], "failed")
+    _add(storage, sample_proxies[2])
+
+    stats = storage.get_statistics()
+
+    assert stats["total"] == 3
+    assert stats["working"] == 1
+    assert stats["failed"] == 1
+    assert stats["unchecked"] == 1
+    assert stats["outdated"] == 0
+    assert stats["avg_response_time"] == 0.5
+    assert stats["oldest_proxy"] is not None
+    assert stats["latest_check"] is not None
+
+
+def test_statistics_empty(storage):
+    """Статистика пустого хранилища."""
+    stats = storage.get_statistics()
+
+    assert stats["total"] == 0
+    assert stats["avg_response_time"] is None
+    assert stats["oldest_proxy"] is None
+
+
+def test_cleanup(storage, sample_proxies):
+    """Очистка удаляет записи старше границы и позволяет добавить их заново."""
+    _add(storage, sample_proxies[0], "working", 0.5)
+    _add(storage, sample_proxies[1], "failed")
+
+    assert storage.cleanup(datetime.now() - timedelta(days=1)) == 0
+    assert storage.cleanup(datetime.now() + timedelta(days=1)) == 2
+    assert storage.get_statistics()["total"] == 0
+    assert storage.get_working(10) == []
+
+    assert storage.add_proxies([Proxy(**sample_proxies[0])]) == 1
+
+
+def test_create_storage_unknown():
+    """Неизвестный движок вызывает ValueError."""
+    with pytest.raises(ValueError):
+        create_storage("redis")
+
+
+def test_manager_with_memory_storage(sample_proxies):
+    """ProxyManager работает поверх хранилища в памяти."""
+    manager = ProxyManager(storage="memory")
+    assert isinstance(manager.storage, MemoryStorage)
+    assert isinstance(manager.storage, BaseStorage)
+    assert manager.db_path is None
+
+    proxy = Proxy(**sample_proxies[0])
+    manager.add_proxy(proxy)
+    proxy.status = "working"
+    proxy.response_time = 0.2
+    manager.update_proxy_status(proxy)
+
+    assert manager.get_working_proxy()["ip"] == proxy.ip
+    assert manager.get_multiple_working_proxies()[0]["url"] == proxy.url
+    assert manager.needs_update()  # меньше 10 свежих рабочих прокси
+    with pytest.raises(TypeError):
+        manager.get_connection()
+
+
+def test_statistics_match_recompute(storage, sample_proxies):
+    """Инкрементальные счетчики совпадают с полным пересчетом после любых записей."""
+    ids = [_add(storage, data) for data in sample_proxies]
+    assert storage.get_statistics() == storage.recompute_statistics()
+
+    _add(storage, sample_proxies[0], "working", 0.5)
+    _add(storage, sample_proxies[1], "working", 0.25)
+    _add(storage, sample_proxies[0], "working", 1.5)
+    assert storage.get_statistics() == storage.recompute_statistics()
+
+    storage.mark_failed(ids[1])
+    assert storage.get_statistics() == storage.recompute_statistics()
+
+    storage.mark_all_outdated()
+    assert storage.get_statistics() == storage.recompute_statistics()
+
+    storage.cleanup(datetime.now() + timedelta(days=1))
+    assert storage.get_statistics() == storage.recompute_statistics()
+    assert storage.get_statistics()["total"] == 0
+
+
+def test_cleanup_range(storage, sample_proxies):
+    """Очистка по диапазону ID трогает только записи внутри диапазона."""
+    ids = [_add(storage, data) for data in sample_proxies]
+    assert storage.get_id_range() == (ids[0], ids[-1])
+
+    future = datetime.now() + timedelta(days=1)
+    assert storage.cleanup_range(future, ids[0], ids[1]) == 2
+    assert storage.cleanup_range(future, ids[0], ids[1]) == 0
+    assert storage.get_id_range() == (ids[2], ids[2])
+    assert storage.get_statistics() == storage.recompute_statistics()
+
+
+def test_get_id_range_empty(storage):
+    """Пустое хранилище не имеет диапазона ID."""
+    assert storage.get_id_range() == (None, None)
+
+
+def test_working_records_and_restore(storage, sample_proxies):
+    """Экспорт рабочих прокси и загрузка их в другое хранилище."""
+    _add(storage, sample_proxies[0], "working", 0.7)
+    _add(storage, sample_proxies[1], "working", 0.2)
+    _add(storage, sample_proxies[2], "failed")
+
+    records = storage.working_records()
+    assert [r.ip for r in records] == [sample_proxies[1]["ip"], sample_proxies[0]["ip"]]
+    assert storage.working_records(limit=1) == records[:1]
+
+    target = MemoryStorage()
+    assert target.restore_working(records) == 2
+    assert target.working_records() == records
+    assert target.get_statistics() == target.recompute_statistics()
+
+    # Более старая проверка не перезаписывает свежую
+    stale = [records[0]._replace(last_check=records[0].last_check - 100, response_time=9.0)]
+    assert storage.restore_working(stale) == 0
+    assert storage.working_records()[0].response_time == records[0].response_time
+
+    # Более свежая проверка возвращает нерабочий прокси в пул
+    failed = Proxy(**sample_proxies[2])
+    revived = [records[0]._replace(ip=failed.ip, port=failed.port, last_check=records[0].last_check + 100)]
+    assert storage.restore_working(revived) == 1
+    assert len(storage.working_records()) == 3
+    assert storage.get_statistics() == storage.recompute_statistics()
+
+
+def test_memory_restore_without_collection_date():
+    """Запись снимка без даты сбора восстанавливается и не ломает очистку."""
+    storage = MemoryStorage()
+    now = int(datetime.now().timestamp())
+    records = [
+        ProxyRecord("1.2.3.4", 8080, "http", 0.2, now, None),
+        ProxyRecord("5.6.7.8", 3128, "http", 0.3, None, None),
+    ]
+
+    assert storage.restore_working(records) == 2
+    assert storage.count_working(datetime.now() - timedelta(days=1)) == 2
+    assert storage.cleanup(datetime.now() - timedelta(days=1)) == 0
+    assert storage.get_statistics() == storage.recompute_statistics()
+
+
+def _first_check(storage, proxy, status, response_time=None):
+    proxy.status = status
+    proxy.response_time = response_time
+    storage.update_proxy_status(proxy)
+
+
+def test_source_stats_and_yield_order(storage):
+    """Счетчики источников по первой проверке и выборка от лучшего источника."""
+    good = [Proxy(f"10.0.0.{i}", 80) for i in range(1, 5)]
+    bad = [Proxy(f"10.0.1.{i}", 80) for i in range(1, 5)]
+    assert storage.add_proxies(bad, source="bad") == 4
+    assert storage.add_proxies(good, source="good") == 4
+    # Прокси из двух источников учитывается в обоих
+    assert storage.add_proxy(good[0], source="bad") == storage.add_proxy(good[0])
+    storage.add_proxy(Proxy("10.0.2.1", 80))
+
+    _first_check(storage, good[0], "working", 0.5)
+    _first_check(storage, good[1], "working", 0.3)
+    _first_check(storage, bad[0], "failed")
+    _first_check(storage, bad[1], "failed")
+    # Повторная проверка счетчики источника не меняет
+    _first_check(storage, good[0], "failed")
+
+    stats = {source.name: source for source in storage.get_source_stats()}
+    assert tuple(stats["good"])[1:] == (4, 2, 2, 0.8, 2)
+    assert tuple(stats["bad"])[1:] == (5, 3, 1, 0.5, 1)
+    assert stats["good"].score == 3 / 4
+    assert stats["good"].avg_response_time == pytest.approx(0.4)
+
+    ranked = storage.get_unchecked_by_yield(10)
+    assert [p.ip for p in ranked] == ["10.0.0.3", "10.0.0.4", "10.0.1.3", "10.0.1.4", "10.0.2.1"]
+    assert [p.ip for p in storage.get_unchecked_by_yield(3)] == ["10.0.0.3", "10.0.0.4", "10.0.1.3"]
+    assert storage.get_unchecked_from_source("missing", 10) == []
+
+
+def test_source_links_removed_with_proxy(storage):
+    """Удаленный прокси пропадает из выборки источника, счетчики остаются."""
+    storage.add_proxies([Proxy("10.0.0.1", 80), Proxy("10.0.0.2", 80)], source="list")
+    first, last = storage.get_id_range()
+
+    assert storage.cleanup_range(datetime.now() + timedelta(days=1), first, first) == 1
+
+    assert [p.ip for p in storage.get_unchecked_from_source("list", 10)] == ["10.0.0.2"]
+    assert storage.get_source_stats()[0].collected == 2
+
+
+def test_exit_ip_saved_and_indexed(storage):
+    """Внешний адрес сохраняется при проверке и не стирается проверкой без него."""
+    for ip, response_time in (("10.0.0.1", 0.3), ("10.0.0.2", 0.1), ("10.0.0.3", 0.2)):
+        proxy = Proxy(ip, 80)
+        storage.add_proxy(proxy)
+        proxy.status = "working"
+        proxy.response_time = response_time
+        proxy.exit_ip = "5.5.5.5" if ip != "10.0.0.3" else "6.6.6.6"
+        storage.update_proxy_status(proxy)
+
+    assert [p.ip for p in storage.get_by_exit_ip("5.5.5.5")] == ["10.0.0.2", "10.0.0.1"]
+    assert storage.get_working(10)[0].exit_ip == "5.5.5.5"
+
+    recheck = Proxy("10.0.0.2", 80)
+    recheck.status = "working"
+    recheck.response_time = 0.1
+    storage.update_proxy_status(recheck)
+    assert [p.ip for p in storage.get_by_exit_ip("5.5.5.5")] == ["10.0.0.2", "10.0.0.1"]
+
+    moved = Proxy("10.0.0.1", 80)
+    moved.status = "working"
+    moved.response_time = 0.3
+    moved.exit_ip = "6.6.6.6"
+    storage.update_proxy_status(moved)
+    assert [p.ip for p in storage.get_by_exit_ip("6.6.6.6")] == ["10.0.0.3", "10.0.0.1"]
+    assert storage.get_by_exit_ip("7.7.7.7") == []
+
+
+def test_target_results_filter_selection(storage):
+    """Выборка по цели отдает только прокси со свежим успешным результатом на ней."""
+    from proxy_manager.storage import TargetResult
+    for ip, response_time in (("10.0.0.1", 0.1), ("10.0.0.2", 0.2), ("10.0.0.3", 0.3)):
+        _add(storage, {"ip": ip, "port": 80}, "working", response_time)
+    hour_ago = datetime.now() - timedelta(hours=1)
+
+    assert [p.ip for p in storage.get_target_candidates("shop", 10, hour_ago)] == [
+        "10.0.0.1", "10.0.0.2", "10.0.0.3"
+    ]
+    storage.record_target_results("shop", [
+        TargetResult("10.0.0.1", 80, False), TargetResult("10.0.0.2", 80, True),
+        TargetResult("10.9.9.9", 80, True),
+    ])
+
+    assert [p.ip for p in storage.get_working(10, target="shop", min_target_check=hour_ago)] == ["10.0.0.2"]
+    assert [p.ip for p in storage.get_target_candidates("shop", 10, hour_ago)] == ["10.0.0.3"]
+    # Результат старше срока не учитывается
+    future = datetime.now() + timedelta(minutes=1)
+    assert storage.get_working(10, target="shop", min_target_check=future) == []
+    assert len(storage.get_target_candidates("shop", 10, future)) == 3
+    assert storage.get_working(10, target="other") == []
+
+    # Повторная проверка заменяет результат, удаление прокси убирает его
+    storage.record_target_results("shop", [TargetResult("10.0.0.2", 80, False)])
+    assert storage.get_working(10, target="shop") == []
+    storage.record_target_results("shop", [TargetResult("10.0.0.1", 80, True)])
+    first, _ = storage.get_id_range()
+    storage.mark_failed(first)
+    assert storage.cleanup_range(datetime.now() + timedelta(days=1), first, first) == 1
+    _add(storage, {"ip": "10.0.0.1", "port": 80}, "working", 0.1)
+    assert storage.get_working(10, target="shop") == []
+
+
+def test_target_definitions_saved(storage):
+    """Описание цели сохраняется и заменяется по имени."""
+    storage.save_target(Target("shop.test", "https://shop.test/", ttl=60))
+    storage.save_target(Target("shop.test", "https://shop.test/robots.txt", must_contain="User-agent"))
+    storage.save_target(Target("b.test", "http://b.test/", statuses=(200, 204)))
+
+    targets = {target.name: target for target in storage.get_targets()}
+    assert targets["shop.test"] == Target("shop.test", "https://shop.test/robots.txt",
+                                          must_contain="User-agent")
+    assert targets["b.test"].statuses == (200, 204)
+
+
+def test_bandwidth_ranking(storage):
+    """Замер скорости сохраняется отдельно от статуса, выборка по нему идет от быстрых."""
+    for ip, response_time in (("10.0.0.1", 0.1), ("10.0.0.2", 0.2), ("10.0.0.3", 0.3)):
+        _add(storage, {"ip": ip, "port": 80}, "working", response_time)
+    measured = []
+    for ip, bandwidth in (("10.0.0.1", 2e4), ("10.0.0.3", 5e6)):
+        proxy = Proxy(ip, 80)
+        proxy.bandwidth, proxy.ttfb = bandwidth, 0.4
+        measured.append(proxy)
+    storage.update_bandwidth(measured)
+
+    assert [p.ip for p in storage.get_working(10, by_bandwidth=True)] == ["10.0.0.3", "10.0.0.1"]
+    assert [p.ip for p in storage.get_working(10, min_bandwidth=1e5)] == ["10.0.0.3"]
+    fastest = storage.get_working(1)[0]
+    assert (fastest.ip, fastest.bandwidth, fastest.ttfb) == ("10.0.0.1", 2e4, 0.4)
+    assert storage.get_working(10)[1].bandwidth is None
+    assert storage.get_statistics()["working"] == 3
+
+
+def test_check_phases_smoothed(storage):
+    """Фазы проверки сглаживаются между проверками и попадают в статистику."""
+    for ip, connect in (("10.0.0.1", 0.2), ("10.0.0.2", 0.05), ("10.0.0.3", None)):
+        proxy = Proxy(ip, 80)
+        storage.add_proxy(proxy)
+        proxy.status, proxy.response_time = "working", 0.5
+        if connect is not None:
+            proxy.phases = CheckPhases(None, connect, 0.3, 0.01)
+        storage.update_proxy_statuses([proxy])
+    proxy = Proxy("10.0.0.1", 80)
+    proxy.status, proxy.response_time = "working", 0.5
+    proxy.phases = CheckPhases(None, 0.1, 0.3, None)
+    storage.update_proxy_statuses([proxy])
+
+    ordered = storage.get_working(10, by_connect_time=True)
+    assert [p.ip for p in ordered] == ["10.0.0.2", "10.0.0.1"]
+    phases = ordered[1].phases
+    assert phases.dns is None
+    assert phases.connect == pytest.approx(0.7 * 0.2 + 0.3 * 0.1)
+    assert phases.transfer == pytest.approx(0.01)
+    unmeasured = [p for p in storage.get_working(10) if p.ip == "10.0.0.3"]
+    assert unmeasured[0].phases is None
+
+    stats = storage.get_statistics()
+    assert stats["phases"]["connect"] == round((0.17 + 0.05) / 2, 3)
+    assert stats["phases"]["dns"] is None
+    assert stats == storage.recompute_statistics()
+
+
+def test_iter_working_is_stable_under_writes(storage):
+    """Обход порциями выдает каждый прокси один раз, даже если база меняется по ходу."""
+    for i in range(1, 8):
+        _add(storage, {"ip": f"10.0.0.{i}", "port": 80}, "working", 1.0 / i)
+    _add(storage, {"ip": "10.0.1.1", "port": 80})
+
+    seen = []
+    for proxy in storage.iter_working(chunk_size=2):
+        seen.append(proxy.ip)
+        if proxy.ip == "10.0.0.2":
+            # Уже выданный прокси уходит в конец порядка по скорости,
+            # еще не выданный перестает работать, появляется новый
+            _add(storage, {"ip": "10.0.0.1", "port": 80}, "working", 5.0)
+            storage.mark_failed(storage.add_proxy(Proxy("10.0.0.5", 80)))
+            _add(storage, {"ip": "10.0.0.8", "port": 80}, "working", 0.1)
+
+    assert seen == ["10.0.0.1", "10.0.0.2", "10.0.0.3", "10.0.0.4", "10.0.0.6", "10.0.0.7", "10.0.0.8"]
+    records = list(storage.iter_working(chunk_size=4, records=True))
+    assert all(type(record) is ProxyRecord for record in records)
+    assert [r.ip for r in records] == seen
+    assert records[0].response_time == 5.0
+    with pytest.raises(ValueError):
+        storage.iter_working(chunk_size=0)
+
+
+def test_iter_unchecked_while_checking(storage):
+    """Проверка прокси по ходу обхода не сбивает порции непроверенных."""
+    for i in range(1, 6):
+        _add(storage, {"ip": f"10.0.0.{i}", "port": 80})
+    _add(storage, {"ip": "10.0.1.1", "port": 80}, "working", 0.1)
+
+    seen = []
+    for proxy in storage.iter_unchecked(chunk_size=2):
+        seen.append(proxy.ip)
+        proxy.status, proxy.response_time = "working", 0.2
+        storage.update_proxy_status(proxy)
+
+    assert seen == [f"10.0.0.{i}" for i in range(1, 6)]
+    assert list(storage.iter_unchecked(records=True)) == []
+    _add(storage, {"ip": "10.0.2.1", "port": 3128})
+    assert list(storage.iter_unchecked(records=True)) == [("10.0.2.1", 3128, "http")]
@@ -0,0 +1,132 @@
+"""Тесты выбора с учетом подсетей и учета отказов по подсетям."""
+
+import pytest
+from unittest.mock import patch
+from proxy_manager import ProxyChecker
+from proxy_manager.proxy import Proxy
+from proxy_manager.subnets import SubnetHealth, diversify, group_by_exit_ip, interleave, subnet_key
+
+
+def make(ip, asn=None):
+    return Proxy(ip, 8080, asn=asn)
+
+
+def test_subnet_key():
+    assert subnet_key("45.10.1.1") == subnet_key("45.10.1.254")
+    assert subnet_key("45.10.1.1") != subnet_key("45.10.2.1")
+    assert subnet_key("45.10.1.1", prefix=16) == subnet_key("45.10.2.1", prefix=16)
+    assert subnet_key("proxy.example") == "proxy.example"
+
+
+def test_diversify_caps_subnet_and_asn():
+    proxies = [
+        make("45.10.1.1", asn=1), make("45.10.1.2", asn=1), make("45.10.2.1", asn=1),
+        make("45.10.3.1", asn=2), make("45.10.4.1"), make("45.10.4.2"),
+    ]
+    picked = diversify(proxies, 10, max_per_subnet=1)
+    assert [p.ip for p in picked] == ["45.10.1.1", "45.10.2.1", "45.10.3.1", "45.10.4.1"]
+
+    # Прокси с неизвестным ASN не ограничиваются
+    picked = diversify(proxies, 10, max_per_asn=1)
+    assert [p.ip for p in picked] == ["45.10.1.1", "45.10.3.1", "45.10.4.1", "45.10.4.2"]
+
+    assert len(diversify(proxies, 2, max_per_subnet=1)) == 2
+    assert diversify(proxies, 10) == proxies
+
+
+def test_diversify_and_group_by_exit_ip():
+    proxies = [make("45.10.1.1"), make("45.10.2.1"), make("45.10.3.1"), make("45.10.4.1")]
+    for proxy, exit_ip in zip(proxies, ["9.9.9.9", "9.9.9.9", None, "8.8.8.8"]):
+        proxy.exit_ip = exit_ip
+
+    picked = diversify(proxies, 10, max_per_exit_ip=1)
+    assert [p.ip for p in picked] == ["45.10.1.1", "45.10.3.1", "45.10.4.1"]
+
+    groups = group_by_exit_ip(proxies)
+    assert [[p.ip for p in group] for group in groups] == [
+        ["45.10.1.1", "45.10.2.1"], ["45.10.3.1"], ["45.10.4.1"]
+    ]
+
+
+def test_interleave_round_robin():
+    proxies = [make("45.10.1.1"), make("45.10.1.2"), make("45.10.1.3"), make("45.10.2.1")]
+    assert [p.ip for p in interleave(proxies)] == [
+        "45.10.1.1", "45.10.2.1", "45.10.1.2", "45.10.1.3"
+    ]
+    assert interleave([]) == []
+
+
+def test_subnet_health_threshold_reset_and_window():
+    health = SubnetHealth(threshold=2, window=60)
+    health.record("45.10.1.1", False)
+    assert not health.is_dead("45.10.1.9")
+    health.record("45.10.1.2", False)
+    assert health.is_dead("45.10.1.9")
+    assert not health.is_dead("45.10.2.1")
+
+    health.record("45.10.1.3", True)
+    assert health.failures("45.10.1.9") == 0
+
+    health.record("45.10.1.1", False)
+    health.record("45.10.1.2", False)
+    with patch("proxy_manager.subnets.time.monotonic", return_value=10 ** 9):
+        assert not health.is_dead("45.10.1.9")
+
+
+def test_get_multiple_working_proxies_max_per_subnet(proxy_manager):
+    for i, ip in enumerate(["45.10.1.1", "45.10.1.2", "45.10.1.3", "45.10.2.1", "45.10.1.4"]):
+        proxy = make(ip, asn=7 if i < 4 else 8)
+        proxy_manager.add_proxy(proxy)
+        proxy.status = "working"
+        proxy.response_time = 0.1 * (i + 1)
+        proxy_manager.update_proxy_status(proxy)
+
+    assert len(proxy_manager.get_multiple_working_proxies(limit=3)) == 3
+    proxies = proxy_manager.get_multiple_working_proxies(limit=3, max_per_subnet=1)
+    assert [p["ip"] for p in proxies] == ["45.10.1.1", "45.10.2.1"]
+
+    proxies = proxy_manager.get_working_proxies(limit=3, max_per_subnet=3, max_per_asn=2)
+    assert [p.ip for p in proxies] == ["45.10.1.1", "45.10.1.2", "45.10.1.4"]
+
+
+@pytest.mark.asyncio
+async def test_check_random_proxies_skips_dead_subnet(proxy_manager):
+    checker = ProxyChecker(proxy_manager, subnet_failure_threshold=2)
+    for ip in ["45.10.1.1", "45.10.1.2", "45.10.1.3", "45.10.1.4", "45.10.2.1"]:
+        proxy_manager.add_proxy(make(ip))
+
+    checked = []
+
+    async def mock_check_proxy(proxy):
+        checked.append(proxy.ip)
+        return proxy.ip == "45.10.2.1"
+
+    with patch.object(checker, 'check_proxy', side_effect=mock_check_proxy):
+        working = await checker.check_random_proxies(limit=10)
+
+    assert [p.ip for p in working] == ["45.10.2.1"]
+    assert len(checked) == 3
+    # Пропущенные прокси мертвой подсети остаются непроверенными
+    skipped = {p.ip for p in proxy_manager.get_unchecked_proxies()} - set(checked)
+    assert len(skipped) == 2 and all(ip.startswith("45.10.1.") for ip in skipped)
+    assert proxy_manager.get_statistics()["failed"] == 0
+    assert not any(proxy_manager.is_known_dead(ip, 8080) for ip in skipped)
+
+
+@pytest.mark.asyncio
+async def test_dead_subnet_leaves_source_stats_alone(proxy_manager):
+    """Пропущенные прокси мертвой подсети не считаются проверенными в статистике источника."""
+    checker = ProxyChecker(proxy_manager, subnet_failure_threshold=3)
+    proxy_manager.add_proxies([make(f"45.10.1.{i}") for i in range(1, 11)], source="list")
+
+    async def probe(proxy):
+        proxy.status = "failed"
+        return False
+
+    with patch.object(checker, 'probe', side_effect=probe):
+        report = await checker.check_proxies(proxy_manager.get_unchecked_proxies(limit=10))
+
+    assert (report.checked, report.skipped) == (3, 7)
+    source = proxy_manager.get_source_stats()[0]
+    assert (source["checked"], source["working"]) == (3, 0)
+    assert len(proxy_manager.get_unchecked_proxies(limit=10)) == 7
@@ -0,0 +1,67 @@
+"""Тесты извлечения таблиц и разбора free-proxy-list.net."""
+
+import os
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from unittest.mock import MagicMock, patch
+from proxy_manager.sources.freeproxylist import FreeProxyListSource, parse_page
+from proxy_manager.sources.tables import extract_rows, parse_pages
+
+FIXTURE = os.path.join(os.path.dirname(os.path.dirname(__file__)), "fixtures", "free_proxy_list.html")
+
+
+@pytest.fixture(scope="module")
+def page():
+    with open(FIXTURE, encoding="utf-8") as f:
+        return f.read()
+
+
+def test_regex_matches_bs4(page):
+    """Быстрый парсер дает те же строки, что и BeautifulSoup."""
+    rows = extract_rows(page)
+
+    assert rows == extract_rows(page, "bs4")
+    assert len(rows) == 43
+    assert rows[-1][:5] == ["51.15.242.202", "8888", "FR", "France", "elite proxy"]
+
+
+def test_lxml_matches_regex(page):
+    pytest.importorskip("lxml")
+    assert extract_rows(page, "lxml") == extract_rows(page)
+
+
+def test_extract_rows_edge_cases():
+    """Необязательные закрывающие теги и страницы без таблицы."""
+    html = "<table><tr><th>IP<tr><td>1.1.1.1<td>80</table><table><tr><td>x</td></tr></table>"
+
+    assert extract_rows(html) == [["1.1.1.1", "80"]]
+    assert extract_rows("<p>no table</p>") == []
+    with pytest.raises(ValueError):
+        extract_rows(html, "html5lib")
+
+
+def test_parse_page_filters_invalid(page):
+    """Приватные адреса и нечисловые порты отбрасываются."""
+    proxies = parse_page(page)
+
+    assert len(proxies) == 41
+    assert all(p.is_valid_public_ip for p in proxies)
+    assert {p.protocol for p in proxies} <= {"http", "https"}
+    assert parse_page(page, "bs4") == proxies
+
+
+def test_parse_pages_in_process_pool(page):
+    """Страницы разбираются в пуле процессов, порядок сохраняется."""
+    results = parse_pages(partial(parse_page, parser="regex"), [page, "<html></html>"], max_workers=2)
+
+    assert results == [parse_page(page), set()]
+
+
+def test_source_uses_executor(page):
+    """Источник отдает разбор страницы переданному пулу."""
+    response = MagicMock(text=page)
+    with ThreadPoolExecutor(1) as executor, patch("requests.get", return_value=response):
+        proxies = FreeProxyListSource(executor=executor).get_proxies()
+
+    assert proxies == parse_page(page)
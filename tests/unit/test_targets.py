@@ -0,0 +1,88 @@
+"""Тесты целевых сайтов и проверки прокси на них."""
+
+import pytest
+from unittest.mock import patch
+from proxy_manager import ProxyChecker, ProxyManager
+from proxy_manager.proxy import Proxy
+from proxy_manager.storage import TargetResult
+from proxy_manager.targets import Target
+
+
+def add_working(manager, ip, response_time, protocol="http"):
+    proxy = Proxy(ip, 8080, protocol)
+    manager.add_proxy(proxy)
+    proxy.status = "working"
+    proxy.response_time = response_time
+    manager.update_proxy_status(proxy)
+
+
+def test_target_accepts():
+    target = Target("shop.test", "https://shop.test/robots.txt", statuses=(200, 204),
+                    must_contain="User-agent", must_not_contain=("captcha",))
+    assert target.needs_body
+    assert target.accepts(200, "User-agent: *")
+    assert target.accepts(204, "User-agent: *")
+    assert not target.accepts(403, "User-agent: *")
+    assert not target.accepts(200, "<html>blocked</html>")
+    assert not target.accepts(200, "User-agent: * <div>CAPTCHA</div>")
+    assert not Target("a.test", "http://a.test/").needs_body
+
+
+def test_register_target(proxy_manager):
+    target = proxy_manager.register_target("shop.test", "https://shop.test/", ttl=60)
+    assert proxy_manager.get_target("shop.test") is target
+    assert proxy_manager.register_target(Target("b.test", "http://b.test/")).name == "b.test"
+    with pytest.raises(ValueError):
+        proxy_manager.register_target("c.test")
+    with pytest.raises(ValueError):
+        proxy_manager.get_working_proxies(target="missing.test")
+
+
+@pytest.mark.asyncio
+async def test_check_target_fills_matrix(proxy_manager):
+    proxy_manager.register_target("shop.test", "https://shop.test/")
+    for ip, response_time in (("10.0.0.1", 0.1), ("10.0.1.1", 0.2), ("10.0.2.1", 0.3)):
+        add_working(proxy_manager, ip, response_time)
+    add_working(proxy_manager, "10.0.3.1", 0.05, protocol="socks5")
+    checker = ProxyChecker(proxy_manager)
+    probed = []
+
+    async def probe(session, proxy, target):
+        probed.append(proxy.ip)
+        return proxy.ip != "10.0.1.1"
+
+    with patch.object(checker, "_probe_target", side_effect=probe):
+        working = await checker.check_target("shop.test", limit=10)
+        # Результаты действительны ttl, повторная проверка их не трогает
+        assert await checker.check_target("shop.test", limit=10) == []
+
+    # SOCKS-прокси не проверяется и результата на цели не получает
+    assert probed == ["10.0.0.1", "10.0.1.1", "10.0.2.1"]
+    assert [p.ip for p in working] == ["10.0.0.1", "10.0.2.1"]
+    selected = proxy_manager.get_working_proxies(limit=10, target="shop.test")
+    assert [p.ip for p in selected] == ["10.0.0.1", "10.0.2.1"]
+    assert [p.ip for p in proxy_manager.get_target_candidates("shop.test")] == ["10.0.3.1"]
+    assert len(proxy_manager.get_working_proxies(limit=10)) == 4
+
+
+@pytest.mark.asyncio
+async def test_probe_target_skips_socks(proxy_manager):
+    checker = ProxyChecker(proxy_manager)
+    target = Target("shop.test", "https://shop.test/")
+    assert await checker._probe_target(None, Proxy("10.0.0.1", 1080, "socks5"), target) is False
+
+
+def test_targets_survive_restart(temp_db_path):
+    """Описание цели хранится в базе: после перезапуска выборка по ней работает."""
+    manager = ProxyManager(db_path=temp_db_path)
+    target = manager.register_target("shop.test", "https://shop.test/", statuses=(200, 204),
+                                     must_not_contain=("captcha",), ttl=60)
+    add_working(manager, "10.0.0.1", 0.1)
+    add_working(manager, "10.0.1.1", 0.2)
+    manager.record_target_results("shop.test", [TargetResult("10.0.0.1", 8080, True)])
+
+    restarted = ProxyManager(db_path=temp_db_path)
+    assert [p.ip for p in restarted.get_working_proxies(10, target="shop.test")] == ["10.0.0.1"]
+    assert restarted.get_target("shop.test") == target
+    with pytest.raises(ValueError):
+        restarted.get_target("missing.test")
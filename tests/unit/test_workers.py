@@ -0,0 +1,60 @@
+"""Тесты многопроцессной проверки прокси."""
+
+import socket
+import socketserver
+import threading
+import pytest
+from proxy_manager.latency import CheckTimeouts
+from proxy_manager.proxy import Proxy
+from proxy_manager.workers import ShardedChecker
+
+
+class StandInProxy(socketserver.StreamRequestHandler):
+    """Отвечает на любой запрос через прокси так, как ответил бы целевой хост."""
+
+    def handle(self):
+        while self.rfile.readline() not in (b"\r\n", b""):
+            pass
+        self.wfile.write(b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\nConnection: close\r\n\r\n{}")
+
+
+@pytest.fixture
+def stand_in():
+    server = socketserver.ThreadingTCPServer(("0.0.0.0", 0), StandInProxy)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server.server_address[1]
+    server.shutdown()
+    server.server_close()
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def test_sharded_check(proxy_manager, stand_in):
+    dead = free_port()
+    proxies = [Proxy(f"127.0.0.{i}", stand_in) for i in range(1, 7)]
+    proxies += [Proxy(f"127.0.0.{i}", dead) for i in range(1, 3)]
+    for proxy in proxies:
+        proxy_manager.add_proxy(proxy)
+
+    checker = ShardedChecker(
+        proxy_manager, processes=2, concurrency=4, batch_size=2, write_batch=3,
+        timeouts=CheckTimeouts(1.0, 2.0), fast_loop=False
+    )
+    report = checker.check_unchecked()
+
+    assert report.checked == 8
+    assert sorted(p.ip for p in report.working) == [f"127.0.0.{i}" for i in range(1, 7)]
+    assert all(p.response_time > 0 for p in report.working)
+    stats = proxy_manager.get_statistics()
+    assert (stats["working"], stats["failed"], stats["unchecked"]) == (6, 2, 0)
+
+
+def test_sharded_check_empty(proxy_manager):
+    report = ShardedChecker(proxy_manager, processes=2).check([])
+    assert report.checked == 0 and report.working == []